@@ -0,0 +1,166 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class ImportTime:
+    """
+    the import time of a module as reported by python -X importtime
+    """
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    level: int  # nesting level - 0 for the modules imported directly
+
+
+class ImportBenchmark:
+    """
+    measure the import times of modules in fresh interpreters
+    the way python -X importtime reports them
+    """
+
+    line_pattern = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+    def __init__(self, repeats: int = 3, python: str = None):
+        """
+        constructor
+
+        Args:
+            repeats (int): the number of runs - the fastest run is reported
+                to reduce the noise of the first run and of other processes
+            python (str): the python interpreter to use - default: the current one
+        """
+        self.repeats = repeats
+        self.python = python or sys.executable
+
+    @classmethod
+    def parse(cls, stderr: str) -> List[ImportTime]:
+        """
+        parse the -X importtime output
+
+        Args:
+            stderr (str): the output
+
+        Returns:
+            List[ImportTime]: the import times in import order
+        """
+        import_times = []
+        for line in stderr.splitlines():
+            match = cls.line_pattern.match(line)
+            if match:
+                self_us, cumulative_us, indent, module = match.groups()
+                import_times.append(
+                    ImportTime(
+                        module=module,
+                        self_us=int(self_us),
+                        cumulative_us=int(cumulative_us),
+                        level=(len(indent) - 1) // 2,
+                    )
+                )
+        return import_times
+
+    def run(self, module: str) -> List[ImportTime]:
+        """
+        import the given module once in a fresh interpreter
+
+        Args:
+            module (str): the module to import
+
+        Returns:
+            List[ImportTime]: the import times of all modules that have been loaded
+        """
+        result = subprocess.run(
+            [self.python, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_times = self.parse(result.stderr)
+        return import_times
+
+    def measure(self, module: str) -> Dict[str, ImportTime]:
+        """
+        get the import times of the fastest of the runs for the given module
+
+        Args:
+            module (str): the module to import
+
+        Returns:
+            Dict[str, ImportTime]: the import times by module name
+        """
+        best = None
+        best_total = None
+        for _ in range(self.repeats):
+            import_times = self.run(module)
+            total = sum(import_time.self_us for import_time in import_times)
+            if best_total is None or total < best_total:
+                best = import_times
+                best_total = total
+        return {import_time.module: import_time for import_time in best}
+
+    def report(self, module: str, top: int = 20, packages: List[str] = None) -> str:
+        """
+        report the total import time of the given module and the slowest imports
+
+        Args:
+            module (str): the module to import
+            top (int): the number of slowest top level packages to show
+            packages (List[str]): packages whose import time is always shown
+
+        Returns:
+            str: the report
+        """
+        import_times = self.measure(module)
+        total_us = sum(import_time.self_us for import_time in import_times.values())
+        # the cumulative time of the top level packages
+        package_us = {}
+        for import_time in import_times.values():
+            if "." not in import_time.module:
+                package_us[import_time.module] = import_time.cumulative_us
+        lines = [f"import {module}: {total_us / 1e6:.3f}s {len(import_times)} modules"]
+        slowest = sorted(package_us.items(), key=lambda item: item[1], reverse=True)
+        for package, cumulative_us in slowest[:top]:
+            lines.append(f"  {cumulative_us / 1e6:8.3f}s {package}")
+        for package in packages or []:
+            state = (
+                f"{package_us[package] / 1e6:.3f}s"
+                if package in package_us
+                else "not imported"
+            )
+            lines.append(f"  {package}: {state}")
+        return "\n".join(lines)
+
+
+def main(argv: list = None):
+    """
+    report the import times of the given modules
+    """
+    parser = argparse.ArgumentParser(description=ImportBenchmark.__doc__)
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=["genwiki.genwiki_cmd", "genwiki.webserver"],
+        help="the modules to import (default: %(default)s)",
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="number of runs")
+    parser.add_argument("--top", type=int, default=20, help="number of packages")
+    args = parser.parse_args(argv)
+    benchmark = ImportBenchmark(repeats=args.repeats)
+    heavy_packages = ["pyarrow", "lodstorage", "wd", "ez_wikidata", "geopy"]
+    for module in args.modules:
+        print(benchmark.report(module, top=args.top, packages=heavy_packages))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
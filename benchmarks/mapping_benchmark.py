@@ -0,0 +1,149 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from lodstorage.sql import SQLDB
+
+from genwiki.convert import ParquetAdressbokToSql
+from genwiki.genwiki_paths import GenWikiPaths
+from genwiki.parquet import Parquet
+
+
+class MappingBenchmark:
+    """
+    time the column mapping and year injection of the import paths of
+    ParquetAdressbokToSql.to_db on a synthetic address book: the row dict
+    conversion of the read and the streamed address book and the Arrow
+    native bulk loader
+    """
+
+    modes = ["read", "stream", "arrow"]
+
+    def __init__(self, source: str = "weimarTH1851.parquet"):
+        """
+        constructor
+
+        Args:
+            source (str): the example address book whose layout is used
+        """
+        self.source = source
+
+    def get_synthetic_address_book(self, row_count: int) -> pa.Table:
+        """
+        get a synthetic address book with the layout of the source
+
+        Args:
+            row_count(int): the number of rows
+
+        Returns:
+            pa.Table: the synthetic address book
+        """
+        schema = Parquet().get_record_batch_schema(
+            os.path.join(GenWikiPaths.get_examples_path(), self.source)
+        )
+        pool = pa.array([f"value{i}" for i in range(1000)])
+        indices = pa.array([i % 1000 for i in range(row_count)])
+        values = pool.take(indices)
+        columns = {}
+        for arrow_field in schema:
+            if arrow_field.name == "source":
+                continue
+            if arrow_field.name == "id":
+                columns["id"] = pa.array(range(row_count), pa.int64())
+            else:
+                columns[arrow_field.name] = values
+        return pa.table(columns)
+
+    def write_synthetic_address_book(self, folder: str, row_count: int) -> str:
+        """
+        write a synthetic address book with the name of the source to the given folder
+
+        Args:
+            folder(str): the folder to write to
+            row_count(int): the number of rows
+
+        Returns:
+            str: the path of the parquet file
+        """
+        path = os.path.join(folder, self.source)
+        pq.write_table(self.get_synthetic_address_book(row_count), path)
+        return path
+
+    def import_address_books(
+        self, folder: str, mode: str, chunk_size: int = 100000
+    ) -> SQLDB:
+        """
+        import the address books of the given folder with the given import path
+
+        Args:
+            folder(str): the folder with the parquet files
+            mode(str): one of the modes - read, stream or arrow
+            chunk_size(int): the rows per batch of the stream and arrow import
+
+        Returns:
+            SQLDB: the in memory database with the imported address books
+        """
+        pats = ParquetAdressbokToSql(folder=folder)
+        db = SQLDB()
+        if mode == "read":
+            pats.to_db(db)
+        elif mode == "stream":
+            pats.to_db(db, batch_size=chunk_size)
+        elif mode == "arrow":
+            pats.to_db(db, batch_size=chunk_size, use_arrow=True)
+        else:
+            raise ValueError(f"invalid mode {mode}")
+        return db
+
+    def run(self, row_count: int, chunk_size: int = 100000) -> Dict[str, float]:
+        """
+        time the import paths on a synthetic address book
+
+        Args:
+            row_count (int): the number of rows
+            chunk_size (int): the rows per batch of the stream and arrow import
+
+        Returns:
+            Dict[str, float]: the seconds per mode
+        """
+        times = {}
+        with tempfile.TemporaryDirectory() as folder:
+            self.write_synthetic_address_book(folder, row_count)
+            for mode in self.modes:
+                start = time.perf_counter()
+                db = self.import_address_books(folder, mode, chunk_size)
+                times[mode] = time.perf_counter() - start
+                db.close()
+        return times
+
+
+def main(argv: list = None):
+    """
+    report the times of the import paths
+    """
+    parser = argparse.ArgumentParser(description=MappingBenchmark.__doc__)
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1000000,
+        help="number of rows (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    times = MappingBenchmark().run(args.rows)
+    report = " ".join(f"{mode} {secs:.3f} s" for mode, secs in times.items())
+    print(f"{args.rows} rows: {report}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from lodstorage.sql import SQLDB
+
+from genwiki.convert import ParquetAdressbokToSql
+from genwiki.genwiki_paths import GenWikiPaths
+from genwiki.sql_pool import SQLDBPool
+
+
+class PoolBenchmark:
+    """
+    compare the query throughput of a single shared connection
+    with the SQLDBPool for a growing number of concurrent clients
+    """
+
+    sql = """SELECT street, occupation, COUNT(*) AS count FROM address
+GROUP BY street, occupation ORDER BY count DESC LIMIT 10"""
+
+    def __init__(self, db_path: str, pool_size: int = 8, queries: int = 200):
+        """
+        constructor
+
+        Args:
+            db_path (str): the path of the address database
+            pool_size (int): the number of readers of the pool
+            queries (int): the number of queries per measurement
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.queries = queries
+
+    @classmethod
+    def build_db(cls, db_path: str) -> None:
+        """
+        build the address database of the example address books
+        """
+        pool = SQLDBPool(db_path, size=1)
+        pats = ParquetAdressbokToSql(
+            folder=GenWikiPaths.get_examples_path(), materialized=True
+        )
+        pats.update_db(pool.writer, use_arrow=True)
+        pool.close()
+
+    def get_throughput(self, query_func: Callable[[], List], clients: int) -> float:
+        """
+        run the given query function with the given number of concurrent clients
+
+        Returns:
+            float: the number of queries per second
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            futures = [executor.submit(query_func) for _ in range(self.queries)]
+            for future in futures:
+                future.result()
+        throughput = self.queries / (time.perf_counter() - start)
+        return throughput
+
+    def run(self, client_counts: List[int]) -> Dict[int, Dict[str, float]]:
+        """
+        measure the throughput of the shared connection and the pool
+
+        Args:
+            client_counts (List[int]): the numbers of concurrent clients
+
+        Returns:
+            Dict[int, Dict[str, float]]: queries per second by clients and mode
+        """
+        shared_db = SQLDB(self.db_path, check_same_thread=False)
+        shared_lock = threading.Lock()
+        pool = SQLDBPool(self.db_path, size=self.pool_size)
+
+        def shared_query():
+            # a shared connection needs to be serialized
+            with shared_lock:
+                return shared_db.query(self.sql)
+
+        def pool_query():
+            return pool.query(self.sql)
+
+        results = {}
+        try:
+            for clients in client_counts:
+                results[clients] = {
+                    "shared": self.get_throughput(shared_query, clients),
+                    "pool": self.get_throughput(pool_query, clients),
+                }
+        finally:
+            shared_db.close()
+            pool.close()
+        return results
+
+
+def main(argv: list = None):
+    """
+    report the query throughput of the shared connection and the pool
+    """
+    parser = argparse.ArgumentParser(description=PoolBenchmark.__doc__)
+    parser.add_argument(
+        "--clients",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="numbers of concurrent clients (default: %(default)s)",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="number of queries")
+    parser.add_argument("--size", type=int, default=8, help="number of pool readers")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "address.db")
+        PoolBenchmark.build_db(db_path)
+        benchmark = PoolBenchmark(db_path, pool_size=args.size, queries=args.queries)
+        for clients, throughput in benchmark.run(args.clients).items():
+            print(
+                f"{clients} clients: shared {throughput['shared']:.0f} q/s"
+                f" pool {throughput['pool']:.0f} q/s"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
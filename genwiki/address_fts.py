@@ -0,0 +1,177 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from typing import Any, Dict, List
+
+from lodstorage.sql import SQLDB
+
+from genwiki.query_spec import QuerySpec
+
+
+class AddressFullTextIndex:
+    """
+    SQLite FTS5 full text index over the person related columns
+    of the per source address tables
+    """
+
+    def __init__(
+        self,
+        db: SQLDB,
+        table_name: str = "address_fts",
+        columns: List[str] = None,
+        stored_columns: List[str] = None,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            db (SQLDB): the database with the address tables
+            table_name (str): the name of the FTS5 virtual table
+            columns (List[str]): the columns to index
+            stored_columns (List[str]): additional unindexed columns to return with the results
+            debug (bool): If True, enables debug output.
+        """
+        self.db = db
+        self.table_name = table_name
+        if columns is None:
+            columns = ["lastname", "firstname", "occupation", "street", "company_name"]
+        self.columns = columns
+        if stored_columns is None:
+            stored_columns = ["location", "year"]
+        self.stored_columns = stored_columns
+        self.debug = debug
+
+    @property
+    def all_columns(self) -> List[str]:
+        """
+        all columns of the full text table
+        """
+        return self.columns + self.stored_columns + ["source"]
+
+    def exists(self) -> bool:
+        """
+        check whether the full text table exists
+        """
+        row = self.db.c.execute(
+            "SELECT 1 FROM sqlite_master WHERE name=?", (self.table_name,)
+        ).fetchone()
+        return row is not None
+
+    def create(self) -> None:
+        """
+        create the full text table if it does not exist - does not commit
+        """
+        cols = ",".join(self.columns)
+        unindexed = ",".join(
+            f"{col} UNINDEXED" for col in self.stored_columns + ["source"]
+        )
+        self.db.c.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name}
+USING fts5({cols},{unindexed},tokenize="unicode61 remove_diacritics 2")""")
+
+    def remove_source(self, source: str) -> None:
+        """
+        remove the rows of the given source - does not commit
+
+        Args:
+            source (str): the parquet file name of the source
+        """
+        self.db.c.execute(f"DELETE FROM {self.table_name} WHERE source=?", (source,))
+
+    def index_table(self, table_name: str, source: str) -> None:
+        """
+        (re)index the rows of the given address table - does not commit
+
+        Args:
+            table_name (str): the address table of the source
+            source (str): the parquet file name of the source
+        """
+        self.create()
+        self.remove_source(source)
+        table_columns = [
+            row[1] for row in self.db.c.execute(f'PRAGMA table_info("{table_name}")')
+        ]
+        # columns a table does not have are indexed as NULL
+        select_cols = ",".join(
+            f'"{col}"' if col in table_columns else "NULL"
+            for col in self.columns + self.stored_columns
+        )
+        insert_cols = ",".join(self.all_columns)
+        self.db.c.execute(
+            f"""INSERT INTO {self.table_name}({insert_cols})
+SELECT {select_cols},? FROM "{table_name}\"""",
+            (source,),
+        )
+
+    def search(
+        self, match: str, limit: int = 20, page: int = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        search the full text index
+
+        Args:
+            match (str): the FTS5 match expression e.g. Zieg*
+            limit (int): the number of results per page
+            page (int): the 1 based number of the page to return
+
+        Returns:
+            List[Dict[str, Any]]: the matching rows ordered by bm25 rank
+        """
+        offset = (max(page, 1) - 1) * limit
+        cols = ",".join(self.all_columns)
+        sql = f"""SELECT {cols},bm25({self.table_name}) AS rank
+FROM {self.table_name}
+WHERE {self.table_name} MATCH ?
+ORDER BY rank
+LIMIT ? OFFSET ?"""
+        lod = self.db.query(sql, (match, limit, offset))
+        return lod
+
+    @classmethod
+    def to_prefix_match(cls, term: str) -> str:
+        """
+        get the FTS5 match expression for the given search term as a prefix phrase
+        so that user input like Müller-Lüd or a:b is not parsed as query syntax
+
+        Args:
+            term (str): the search term
+
+        Returns:
+            str: the quoted phrase with a prefix wildcard e.g. "Müller-Lüd"*
+        """
+        phrase = '"' + term.replace('"', '""') + '"*'
+        return phrase
+
+    def search_by_spec(
+        self, spec: str, params: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        search with the given query spec as used for the fts
+        query language e.g.
+
+            term: '{{ suchbegriff }}'
+            limit: 20
+            page: 1
+
+        The values of the {{ }} placeholders are taken from the given parameters
+        and are never substituted into the yaml text. The term is searched as
+        a prefix phrase.
+
+        Args:
+            spec (str): the yaml query spec
+            params (Dict[str, Any]): the parameter values by name
+
+        Returns:
+            List[Dict[str, Any]]: the matching rows ordered by bm25 rank
+        """
+        spec_dict = QuerySpec.load(spec, params)
+        term = "" if spec_dict.get("term") is None else str(spec_dict["term"])
+        lod = self.search(
+            self.to_prefix_match(term),
+            limit=int(spec_dict.get("limit", 20)),
+            page=int(spec_dict.get("page", 1)),
+        )
+        return lod
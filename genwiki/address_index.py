@@ -0,0 +1,166 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import logging
+import sqlite3
+from typing import Dict, List
+
+from lodstorage.params import Params
+from lodstorage.query import Query
+from lodstorage.sql import SQLDB
+
+
+class AddressIndexer:
+    """
+    create secondary indexes for the address tables
+    and check the query plans of SQL queries for full scans
+    """
+
+    def __init__(
+        self,
+        db: SQLDB,
+        columns: List[str] = None,
+        combined_columns: List[str] = None,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            db (SQLDB): the database with the address tables
+            columns (List[str]): the columns to index
+            combined_columns (List[str]): the columns to index only on a combined table
+                of several address books e.g. the year which is constant per source table
+            debug (bool): If True, enables debug output.
+        """
+        self.db = db
+        if columns is None:
+            columns = ["lastname", "street", "occupation", "location_code"]
+        if combined_columns is None:
+            combined_columns = ["year"]
+        self.columns = columns
+        self.combined_columns = combined_columns
+        self.debug = debug
+
+    def get_index_name(self, table_name: str, column: str) -> str:
+        """
+        get the name of the index for the given table and column
+        """
+        index_name = f"{table_name}_{column}_idx"
+        return index_name
+
+    def create_indexes(
+        self, table_names: List[str], combined: bool = False
+    ) -> List[str]:
+        """
+        create the indexes for the given tables - columns a table
+        does not have are skipped
+
+        Does not commit - the caller controls the transaction.
+
+        Args:
+            table_names (List[str]): the tables to index
+            combined (bool): if True the tables combine several address books
+                and the combined columns are indexed as well
+
+        Returns:
+            List[str]: the names of the indexes
+        """
+        columns = self.columns + self.combined_columns if combined else self.columns
+        index_names = []
+        for table_name in table_names:
+            table_columns = [
+                row[1]
+                for row in self.db.c.execute(f'PRAGMA table_info("{table_name}")')
+            ]
+            for column in columns:
+                if column not in table_columns:
+                    continue
+                index_name = self.get_index_name(table_name, column)
+                self.db.c.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}"("{column}")'
+                )
+                index_names.append(index_name)
+        if self.debug:
+            logging.debug(f"created indexes {index_names}")
+        return index_names
+
+    def explain(self, sql: str, params: Dict = None) -> List[Dict]:
+        """
+        get the query plan for the given sql query
+
+        Args:
+            sql (str): the query
+            params (Dict): the values of the bound parameters of the query if any
+
+        Returns:
+            List[Dict]: the query plan records with id, parent, notused and detail
+        """
+        plan = self.db.query(f"EXPLAIN QUERY PLAN {sql}", params)
+        return plan
+
+    def get_scans(self, sql: str) -> List[str]:
+        """
+        get the full table or index scans of the given sql query
+
+        Args:
+            sql (str): the query
+
+        Returns:
+            List[str]: the details of the SCAN steps of the query plan
+        """
+        scans = [
+            record["detail"]
+            for record in self.explain(sql)
+            if record["detail"].startswith("SCAN")
+        ]
+        return scans
+
+    def get_query_sql(self, query: Query) -> str:
+        """
+        get the sql of the given query with its default parameters applied
+        """
+        params_dict = {}
+        query.set_default_params(params_dict)
+        sql = Params(query.query).apply_parameters_with_check(params_dict)
+        return sql
+
+    def check_queries(self, queries: List[Query]) -> Dict[str, List[str]]:
+        """
+        check the query plans of the given sql queries
+
+        Args:
+            queries (List[Query]): the queries to check
+
+        Returns:
+            Dict[str, List[str]]: the names of the queries that still scan (or can not be explained)
+                mapped to their scans
+        """
+        scanning = {}
+        for query in queries:
+            sql = self.get_query_sql(query)
+            try:
+                scans = self.get_scans(sql)
+            except sqlite3.Error as ex:
+                scans = [f"EXPLAIN failed: {ex}"]
+            if scans:
+                scanning[query.name] = scans
+        return scanning
+
+    def report(self, queries: List[Query]) -> Dict[str, List[str]]:
+        """
+        log a warning for each of the given queries that still scans
+
+        Args:
+            queries (List[Query]): the queries to check
+
+        Returns:
+            Dict[str, List[str]]: the names of the queries that still scan mapped to their scans
+        """
+        scanning = self.check_queries(queries)
+        for name, scans in scanning.items():
+            logging.warning(f"query {name} scans: {'; '.join(scans)}")
+        return scanning
@@ -0,0 +1,181 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import logging
+from typing import Dict
+
+from lodstorage.sql import SQLDB
+
+
+class MaterializedAddressTable:
+    """
+    A physical table combining the rows of all address books
+    with a source column - in contrast to the UNION view
+    of the per source tables it can be indexed.
+
+    The per source tables are replaced by views on the combined table
+    so that queries on a single address book keep working.
+    """
+
+    def __init__(self, db: SQLDB, table_name: str = "address", debug: bool = False):
+        """
+        constructor
+
+        Args:
+            db (SQLDB): the database with the address tables
+            table_name (str): the name of the combined table
+            debug (bool): If True, enables debug output.
+        """
+        self.db = db
+        self.table_name = table_name
+        self.debug = debug
+
+    @classmethod
+    def get_type(cls, db: SQLDB, name: str) -> str:
+        """
+        get the type of the given schema object
+
+        Args:
+            db (SQLDB): the database
+            name (str): the name of the table or view
+
+        Returns:
+            str: "table", "view" or None if there is no such object
+        """
+        row = db.c.execute(
+            "SELECT type FROM sqlite_master WHERE name=? AND type IN ('table','view')",
+            (name,),
+        ).fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def drop(cls, db: SQLDB, name: str) -> None:
+        """
+        drop the table or view with the given name if it exists - does not commit
+
+        Args:
+            db (SQLDB): the database
+            name (str): the name of the table or view
+        """
+        object_type = cls.get_type(db, name)
+        if object_type:
+            db.c.execute(f'DROP {object_type.upper()} "{name}"')
+
+    def exists(self) -> bool:
+        """
+        check whether the combined physical table exists
+        """
+        return self.get_type(self.db, self.table_name) == "table"
+
+    def get_columns(self, name: str) -> Dict[str, str]:
+        """
+        get the columns of the given table or view
+
+        Args:
+            name (str): the name of the table or view
+
+        Returns:
+            Dict[str, str]: the column names mapped to the declared types
+        """
+        columns = {
+            row[1]: row[2] for row in self.db.c.execute(f'PRAGMA table_info("{name}")')
+        }
+        return columns
+
+    def add_columns(self, columns: Dict[str, str]) -> None:
+        """
+        create the combined table or add the columns it does not have yet - does not commit
+
+        Args:
+            columns (Dict[str, str]): the column names mapped to the declared types
+        """
+        if not self.exists():
+            cols = ",".join(
+                f'"{name}" {sql_type}' for name, sql_type in columns.items()
+            )
+            if "source" not in columns:
+                cols += ",source TEXT"
+            self.db.c.execute(f'CREATE TABLE "{self.table_name}"({cols})')
+            self.db.c.execute(
+                f'CREATE INDEX IF NOT EXISTS "{self.table_name}_source_idx" ON "{self.table_name}"(source)'
+            )
+            return
+        table_columns = self.get_columns(self.table_name)
+        for name, sql_type in columns.items():
+            if name not in table_columns:
+                self.db.c.execute(
+                    f'ALTER TABLE "{self.table_name}" ADD COLUMN "{name}" {sql_type}'
+                )
+
+    def remove_source(self, source: str, view_name: str = None) -> None:
+        """
+        remove the rows of the given source and its view - does not commit
+
+        Args:
+            source (str): the parquet file name of the source
+            view_name (str): the name of the per source view to drop
+        """
+        if self.exists():
+            self.db.c.execute(
+                f'DELETE FROM "{self.table_name}" WHERE source=?', (source,)
+            )
+        if view_name and self.get_type(self.db, view_name) == "view":
+            self.db.c.execute(f'DROP VIEW "{view_name}"')
+
+    def refresh_source(self, staging_table: str, source: str) -> int:
+        """
+        replace the rows of the given source in the combined table by the rows
+        of the given freshly imported table which is then replaced by a view
+        with the same name and columns - does not commit
+
+        Args:
+            staging_table (str): the imported table of the source
+            source (str): the parquet file name of the source
+
+        Returns:
+            int: the number of rows of the source
+        """
+        columns = self.get_columns(staging_table)
+        self.add_columns(columns)
+        self.remove_source(source)
+        cols = ",".join(f'"{name}"' for name in columns)
+        cursor = self.db.c.execute(
+            f'INSERT INTO "{self.table_name}"({cols}) SELECT {cols} FROM "{staging_table}"'
+        )
+        row_count = cursor.rowcount
+        self.db.c.execute(f'DROP TABLE "{staging_table}"')
+        # views can not have bound parameters
+        self.db.c.execute(
+            f'CREATE VIEW "{staging_table}" AS SELECT {cols} FROM "{self.table_name}" '
+            f"WHERE source={self.quote(source)}"
+        )
+        if self.debug:
+            logging.debug(
+                f"materialized {row_count} rows of {source} into {self.table_name}"
+            )
+        return row_count
+
+    @classmethod
+    def quote(cls, value: str) -> str:
+        """
+        quote the given value as an SQL string literal
+        """
+        return "'" + value.replace("'", "''") + "'"
+
+    def materialize(self, sources: Dict[str, str]) -> int:
+        """
+        refresh the rows of all given sources - does not commit
+
+        Args:
+            sources (Dict[str, str]): the imported tables mapped to their parquet file names
+
+        Returns:
+            int: the number of rows refreshed
+        """
+        row_count = 0
+        for staging_table, source in sources.items():
+            row_count += self.refresh_source(staging_table, source)
+        return row_count
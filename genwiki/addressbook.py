@@ -3,6 +3,7 @@ Created on 19.08.2024
 
 @author: wf
 """
+import asyncio
 import json
 import logging
 import os
@@ -157,12 +158,15 @@ class AddressBookConverter:
         record["genwikiurl"] = f"https://wiki.genealogy.net/{page_title}"
         if "image" in record and record["image"]:
             record["image"] = f"""File:{record["image"]}"""
-        items_dict = self.locator.locate(gov_id)
+        # the conversion runs outside of an event loop
+        items_dict = asyncio.run(self.locator.locate_async(gov_id))
         if len(items_dict) > 0:
+            # one request for all candidate items instead of one per item
+            lookups = self.locator.lookup_items(list(items_dict.values()))
             for key, item in items_dict.items():
                 if not item:
                     continue
-                lookup_qlod = self.locator.lookup_item(item)
+                lookup_qlod = lookups.get(item, [])
                 location_title = self.locator.to_path(lookup_qlod)
                 if location_title:
                     record["at"] = location_title
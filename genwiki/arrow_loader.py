@@ -0,0 +1,217 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import datetime
+import logging
+from typing import Any, Dict, Iterable, Tuple
+
+import pyarrow as pa
+from lodstorage.sql import SQLDB
+
+
+class ArrowSqlLoader:
+    """
+    Load Arrow record batches into SQLite tables.
+
+    The table layout is derived directly from the Arrow schema and the rows
+    are inserted column-wise with executemany - no intermediate row dicts
+    and no EntityInfo sampling are needed.
+
+    Attributes:
+        db (SQLDB): the database to load into
+        debug (bool): If True, debug information will be logged.
+    """
+
+    def __init__(self, db: SQLDB, debug: bool = False):
+        """
+        Initialize the loader.
+
+        Args:
+            db (SQLDB): the database to load into
+            debug (bool): If True, enables debug output. Defaults to False.
+        """
+        self.db = db
+        self.debug = debug
+        # the names of the columns skipped for an unsupported type
+        self.skipped_columns = set()
+
+    def log(self, msg: str) -> None:
+        """
+        Log a message if debug is True.
+
+        Args:
+            msg (str): The message to log.
+        """
+        if self.debug:
+            logging.debug(msg)
+
+    @classmethod
+    def get_types(cls, arrow_type: pa.DataType) -> Tuple[type, str]:
+        """
+        Get the python and SQLite type for the given Arrow type.
+
+        Args:
+            arrow_type (pa.DataType): the Arrow type of a column
+
+        Returns:
+            Tuple[type, str]: the python type and the SQL type - (None, None) if unsupported
+        """
+        if pa.types.is_dictionary(arrow_type):
+            arrow_type = arrow_type.value_type
+        if pa.types.is_null(arrow_type):
+            # a column without any value e.g. an empty column of a spreadsheet
+            types = (str, "TEXT")
+        elif pa.types.is_boolean(arrow_type):
+            types = (bool, "BOOLEAN")
+        elif pa.types.is_integer(arrow_type):
+            types = (int, "INTEGER")
+        elif pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+            types = (float, "FLOAT")
+        elif pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+            types = (str, "TEXT")
+        elif pa.types.is_date(arrow_type):
+            types = (datetime.date, "DATE")
+        elif pa.types.is_timestamp(arrow_type):
+            types = (datetime.datetime, "TIMESTAMP")
+        else:
+            types = (None, None)
+        return types
+
+    def get_columns(self, schema: pa.Schema) -> Dict[str, Tuple[type, str]]:
+        """
+        Get the supported columns of the given schema.
+
+        Args:
+            schema (pa.Schema): the Arrow schema
+
+        Returns:
+            Dict[str, Tuple[type, str]]: column names mapped to python and SQL type
+        """
+        columns = {}
+        for arrow_field in schema:
+            python_type, sql_type = self.get_types(arrow_field.type)
+            if sql_type is None:
+                if arrow_field.name not in self.skipped_columns:
+                    self.skipped_columns.add(arrow_field.name)
+                    logging.warning(
+                        f"skipping column {arrow_field.name} of unsupported type {arrow_field.type}"
+                    )
+                continue
+            columns[arrow_field.name] = (python_type, sql_type)
+        return columns
+
+    def get_create_table_cmd(self, table_name: str, schema: pa.Schema) -> str:
+        """
+        Get the CREATE TABLE DDL command for the given Arrow schema.
+
+        Args:
+            table_name (str): the name of the table
+            schema (pa.Schema): the Arrow schema
+
+        Returns:
+            str: the DDL command
+        """
+        columns = self.get_columns(schema)
+        cols = ",".join(
+            f'"{name}" {sql_type}' for name, (_, sql_type) in columns.items()
+        )
+        ddl = f'CREATE TABLE "{table_name}"({cols})'
+        return ddl
+
+    def get_insert_cmd(self, table_name: str, schema: pa.Schema) -> str:
+        """
+        Get the positional INSERT command for the given Arrow schema.
+
+        Args:
+            table_name (str): the name of the table
+            schema (pa.Schema): the Arrow schema
+
+        Returns:
+            str: the INSERT command
+        """
+        columns = self.get_columns(schema)
+        cols = ",".join(f'"{name}"' for name in columns)
+        placeholders = ",".join("?" for _ in columns)
+        insert_cmd = f'INSERT INTO "{table_name}" ({cols}) VALUES ({placeholders})'
+        return insert_cmd
+
+    def get_table(self, table_name: str, schema: pa.Schema) -> Dict[str, Any]:
+        """
+        Get the table description for the lodstorage Schema view generation.
+
+        The column types are given the same way as for the EntityInfo based
+        conversion so that tables of both conversions can be combined in one view.
+
+        Args:
+            table_name (str): the name of the table
+            schema (pa.Schema): the Arrow schema
+
+        Returns:
+            Dict[str, Any]: the table dict with name and columns
+        """
+        columns = self.get_columns(schema)
+        table = {
+            "name": table_name,
+            "columns": [
+                {"name": name, "type": str(python_type)}
+                for name, (python_type, _) in columns.items()
+            ],
+        }
+        return table
+
+    def insert_batches(
+        self, table_name: str, schema: pa.Schema, batches: Iterable[pa.RecordBatch]
+    ) -> int:
+        """
+        Insert the given record batches with one executemany call per batch.
+
+        Does not commit - the caller controls the transaction.
+
+        Args:
+            table_name (str): the name of the table
+            schema (pa.Schema): the Arrow schema of the batches
+            batches (Iterable[pa.RecordBatch]): the record batches to insert
+
+        Returns:
+            int: the number of rows inserted
+        """
+        insert_cmd = self.get_insert_cmd(table_name, schema)
+        names = list(self.get_columns(schema).keys())
+        row_count = 0
+        for batch in batches:
+            columns = [batch.column(name).to_pylist() for name in names]
+            self.db.c.executemany(insert_cmd, zip(*columns))
+            row_count += batch.num_rows
+        return row_count
+
+    def load(
+        self,
+        table_name: str,
+        schema: pa.Schema,
+        batches: Iterable[pa.RecordBatch],
+        with_drop: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        (Re)create the table for the given schema and insert the given batches.
+
+        Does not commit - the caller controls the transaction.
+
+        Args:
+            table_name (str): the name of the table
+            schema (pa.Schema): the Arrow schema of the batches
+            batches (Iterable[pa.RecordBatch]): the record batches to insert
+            with_drop (bool): if True drop an existing table first
+
+        Returns:
+            Dict[str, Any]: the table dict with name and columns
+        """
+        if with_drop:
+            self.db.c.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        self.db.c.execute(self.get_create_table_cmd(table_name, schema))
+        row_count = self.insert_batches(table_name, schema, batches)
+        self.log(f"Added {row_count} rows to SQLite table '{table_name}'")
+        table = self.get_table(table_name, schema)
+        return table
@@ -0,0 +1,179 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+from typing import Any, Dict, List
+
+import pyarrow as pa
+
+from genwiki.convert import ParquetAdressbokToSql
+from genwiki.query_spec import QuerySpec
+
+
+class ArrowQuery:
+    """
+    run filter and aggregation queries directly on the parquet
+    address books with Arrow compute - no SQLite import needed
+
+    A query is given as a yaml spec using the sql column names e.g.
+
+        filter: [[street, like, "%Frauen%"]]
+        group_by: [street]
+        aggregate: [["*", count, Anzahl]]
+        order_by: [[Anzahl, descending]]
+        limit: 20
+
+    filter is in disjunctive normal form - a list of [column, op, value]
+    predicates or a list of such lists. Filters and the projection of the
+    needed columns are pushed down into the parquet reader.
+    """
+
+    def __init__(self, folder: str, batch_size: int = 50000, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            folder (str): the folder with the parquet files
+            batch_size (int): the maximum number of rows per record batch
+            debug (bool): If True, enables debug output.
+        """
+        self.folder = folder
+        self.batch_size = batch_size
+        self.debug = debug
+
+    def get_aggregations(self, spec: Dict[str, Any]) -> List[tuple]:
+        """
+        get the pyarrow aggregations of the given query spec
+
+        Returns:
+            List[tuple]: tuples of the pyarrow aggregation, its result column name and the alias
+        """
+        aggregations = []
+        for aggregate in spec.get("aggregate", []):
+            column, function = aggregate[0], aggregate[1]
+            if column == "*":
+                aggregation = ([], "count_all")
+                name = "count_all"
+            else:
+                aggregation = (column, function)
+                name = f"{column}_{function}"
+            alias = aggregate[2] if len(aggregate) > 2 else name
+            aggregations.append((aggregation, name, alias))
+        return aggregations
+
+    def get_columns(self, spec: Dict[str, Any]) -> List[str]:
+        """
+        get the columns needed for the given query spec
+
+        Returns:
+            List[str]: the sql column names - None for all columns
+        """
+        if "columns" not in spec and "aggregate" not in spec:
+            return None
+        columns = list(spec.get("columns", [])) + list(spec.get("group_by", []))
+        for (column, _function), _name, _alias in self.get_aggregations(spec):
+            if column:
+                columns.append(column)
+        return columns
+
+    def get_filters(self, spec: Dict[str, Any]) -> List:
+        """
+        get the filters of the given query spec as tuples
+        """
+        filters = spec.get("filter")
+        if not filters:
+            return None
+        if isinstance(filters[0][0], str):
+            filters = [filters]
+        dnf = [
+            [tuple(predicate) for predicate in conjunction] for conjunction in filters
+        ]
+        return dnf
+
+    def get_table(self, spec: Dict[str, Any]) -> pa.Table:
+        """
+        read the filtered rows of all parquet files as one Arrow table
+
+        Args:
+            spec (Dict[str, Any]): the query spec
+
+        Returns:
+            pa.Table: the rows with the sql column names, source and year
+        """
+        pats = ParquetAdressbokToSql(
+            folder=self.folder,
+            columns=self.get_columns(spec),
+            filters=self.get_filters(spec),
+            debug=self.debug,
+        )
+        handler = pats.parquet_handler
+        extra_columns = pats.get_extra_columns()
+        tables = []
+        for parquet_file in handler.get_parquet_files(self.folder):
+            batches = list(
+                handler.iter_record_batches(
+                    os.path.join(self.folder, parquet_file),
+                    batch_size=self.batch_size,
+                    column_mapping=pats.column_mapping,
+                    extra_columns=extra_columns.get(parquet_file),
+                )
+            )
+            if batches:
+                tables.append(pa.Table.from_batches(batches))
+        if not tables:
+            return pa.table({})
+        # the address books do not all have the same columns
+        table = pa.concat_tables(tables, promote_options="default")
+        return table
+
+    def query(self, spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        run the given query
+
+        Args:
+            spec (Dict[str, Any]): the query spec
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+        """
+        table = self.get_table(spec)
+        aggregations = self.get_aggregations(spec)
+        if aggregations:
+            group_by = spec.get("group_by", [])
+            if table.num_columns == 0:
+                table = pa.table({name: pa.array([], pa.null()) for name in group_by})
+            table = table.group_by(group_by).aggregate(
+                [aggregation for aggregation, _name, _alias in aggregations]
+            )
+            aliases = {name: alias for _aggregation, name, alias in aggregations}
+            table = table.rename_columns(
+                [aliases.get(name, name) for name in table.column_names]
+            )
+        elif "columns" in spec:
+            table = table.select(spec["columns"])
+        if "order_by" in spec:
+            table = table.sort_by([tuple(order) for order in spec["order_by"]])
+        if "limit" in spec:
+            table = table.slice(0, int(spec["limit"]))
+        lod = table.to_pylist()
+        return lod
+
+    def query_by_spec(
+        self, spec: str, params: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        run the query of the given yaml spec
+
+        Args:
+            spec (str): the yaml query spec
+            params (Dict[str, Any]): the values of its {{ }} placeholders by name -
+                never substituted into the yaml text
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+        """
+        lod = self.query(QuerySpec.load(spec, params))
+        return lod
@@ -8,7 +8,11 @@ import os
 
 from lodstorage.sql import SQLDB
 
+from genwiki.address_fts import AddressFullTextIndex
+from genwiki.address_index import AddressIndexer
+from genwiki.address_table import MaterializedAddressTable
 from genwiki.parquet import Parquet
+from genwiki.parquet_manifest import ManifestChanges, ParquetManifest
 
 
 class ParquetAdressbokToSql:
@@ -22,8 +26,35 @@ class ParquetAdressbokToSql:
         column_mapping: dict = None,
         table_name: str = "address",
         debug: bool = False,
+        columns: list = None,
+        filters: list = None,
+        memory_map: bool = False,
+        index_columns: list = None,
+        with_fts: bool = False,
+        materialized: bool = False,
     ):
-        self.parquet_handler = Parquet(debug=debug)
+        """
+        constructor
+
+        Args:
+            folder(str): the folder with the parquet files
+            column_mapping(dict): mapping of parquet column names to sql column names
+            table_name(str): the name of the combined view
+            debug(bool): if True show debug information
+            columns(list): optional projection - the sql column names to import
+                e.g. list(column_mapping.values()) to skip unmapped columns
+            filters(list): optional row filter in disjunctive normal form using
+                sql column names e.g. [("year", "=", 1853), ("district", "=", "Ilm-Bezirk")]
+                or a pyarrow compute expression using parquet column names
+            memory_map(bool): if True memory map the parquet files
+            index_columns(list): the sql columns to create secondary indexes for
+                default: lastname, street, occupation and location_code -
+                the materialized combined table is indexed by year as well
+            with_fts(bool): if True maintain the FTS5 full text index for person lookup
+            materialized(bool): if True combine the address books in one indexed
+                physical table instead of a UNION view - the per source tables
+                are then views on the combined table
+        """
         if not os.path.exists(folder):
             raise ValueError(f"Invalid folder {folder}")
         self.folder = folder
@@ -52,32 +83,316 @@ class ParquetAdressbokToSql:
             }
         self.year_mapping = {"weimarTH1851.parquet": 1851, "weimarTH1853.parquet": 1853}
         self.column_mapping = column_mapping
+        self.index_columns = index_columns
+        self.with_fts = with_fts
+        self.materialized = materialized
+        self.parquet_handler = Parquet(
+            debug=debug,
+            columns=self.to_parquet_columns(columns),
+            filters=self.to_parquet_filters(filters),
+            memory_map=memory_map,
+        )
 
-    def inject_year(self):
-        # Add year to each row based on the year_mapping
-        for _table_name, rows in self.parquet_data.items():
-            for row in rows:
-                source = row.get("source")
-                if source in self.year_mapping:
-                    row["jahr"] = self.year_mapping[source]
-                else:
-                    print(f"Warning: No year mapping found for source {source}")
+    def to_parquet_name(self, name: str) -> str:
+        # reverse the column mapping for the given sql column name
+        for parquet_name, sql_name in self.column_mapping.items():
+            if sql_name == name:
+                return parquet_name
+        return name
+
+    def to_parquet_columns(self, columns: list) -> list:
+        # translate a projection of sql column names to parquet column names
+        if columns is None:
+            return None
+        parquet_columns = [self.to_parquet_name(name) for name in columns]
+        return parquet_columns
+
+    def to_parquet_filters(self, filters):
+        # translate filters in disjunctive normal form to parquet column names
+        if not isinstance(filters, list) or not filters:
+            return filters
+        if isinstance(filters[0], tuple):
+            return [(self.to_parquet_name(n), op, v) for n, op, v in filters]
+        return [self.to_parquet_filters(conjunction) for conjunction in filters]
 
     def read(self):
-        # Read all parquet files
-        self.parquet_data = self.parquet_handler.read_parquet_files(self.folder)
+        # Read all parquet files as Arrow tables with the year injected
+        self.parquet_data = self.parquet_handler.read_parquet_tables(
+            self.folder, extra_columns=self.get_extra_columns()
+        )
+        return self.parquet_data
+
+    def stream(self, batch_size: int = 10000):
+        # Lazily read all parquet files in record batches of batch_size rows with the year injected
+        self.parquet_data = self.parquet_handler.stream_parquet_files(
+            self.folder, batch_size=batch_size, extra_columns=self.get_extra_columns()
+        )
         return self.parquet_data
 
     def convert(self, db: SQLDB):
         # Convert to SQLite with the correct table name and column mapping
+        table_names = list(self.parquet_data.keys())
+        self.drop_tables(db, table_names)
         self.parquet_handler.convert_parquet_to_sqlite(
             self.parquet_data,
             db=db,
             table_name=self.table_name,
             column_mapping=self.column_mapping,
         )
+        self.finish_tables(db, table_names)
+
+    def drop_tables(self, db: SQLDB, table_names: list):
+        # drop the combined table or view and the given per source tables or views
+        # before a full import - the combined table is replaced by a view or vice versa
+        with db.c:
+            for name in [self.table_name] + table_names:
+                MaterializedAddressTable.drop(db, name)
+
+    def finish_tables(self, db: SQLDB, table_names: list):
+        # materialize the freshly imported tables if needed and index them
+        if self.materialized:
+            self.materialize(db, table_names)
+            self.create_indexes(db, [self.table_name], combined=True)
+        else:
+            self.create_indexes(db, table_names)
+        self.update_fts(db, table_names)
+
+    def materialize(self, db: SQLDB, table_names: list):
+        """
+        move the rows of the given freshly imported tables to the combined table
+        replacing the rows of the same sources
+
+        Args:
+            db(SQLDB): the database with the address tables
+            table_names(list): the imported tables
+        """
+        address_table = MaterializedAddressTable(
+            db, self.table_name, debug=self.parquet_handler.debug
+        )
+        with db.c:
+            if address_table.get_type(db, self.table_name) == "view":
+                db.c.execute(f'DROP VIEW "{self.table_name}"')
+            address_table.materialize(
+                {table_name: f"{table_name}.parquet" for table_name in table_names}
+            )
+
+    def create_indexes(self, db: SQLDB, table_names: list, combined: bool = False):
+        # create the secondary indexes for the given tables
+        # the year is only worth an index on the combined table
+        indexer = AddressIndexer(db, columns=self.index_columns)
+        with db.c:
+            indexer.create_indexes(table_names, combined=combined)
+
+    def update_fts(self, db: SQLDB, table_names: list, removed_tables: list = None):
+        """
+        (re)index the given tables in the full text index and remove
+        the rows of the removed tables - only if with_fts is set
+
+        Args:
+            db(SQLDB): the database with the address tables
+            table_names(list): the tables to (re)index
+            removed_tables(list): the tables whose rows are to be removed
+        """
+        if not self.with_fts:
+            return
+        fts = AddressFullTextIndex(db, debug=self.parquet_handler.debug)
+        with db.c:
+            fts.create()
+            for table_name in removed_tables or []:
+                fts.remove_source(f"{table_name}.parquet")
+            for table_name in table_names:
+                fts.index_table(table_name, f"{table_name}.parquet")
+
+    def get_extra_columns(self) -> dict:
+        """
+        get the constant columns to add per parquet file - the year
+        """
+        extra_columns = {}
+        for parquet_file in self.parquet_handler.get_parquet_files(self.folder):
+            if parquet_file in self.year_mapping:
+                extra_columns[parquet_file] = {"jahr": self.year_mapping[parquet_file]}
+            else:
+                print(f"Warning: No year mapping found for source {parquet_file}")
+        return extra_columns
+
+    def check_workers(self, use_arrow: bool, max_workers: int):
+        # only the Arrow native bulk loader converts files in parallel
+        if max_workers and max_workers > 1 and not use_arrow:
+            raise ValueError(
+                f"max_workers={max_workers} needs use_arrow - "
+                "the row dict conversion is serial"
+            )
+
+    def load(self, db: SQLDB, batch_size: int = 50000, max_workers: int = 1):
+        # Load the parquet files via Arrow record batches without row dicts
+        # with more than one worker the files are converted in parallel processes
+        parquet_files = self.parquet_handler.get_parquet_files(self.folder)
+        self.drop_tables(db, [os.path.splitext(f)[0] for f in parquet_files])
+        table_list = self.parquet_handler.load_parquet_files_to_sqlite(
+            self.folder,
+            db=db,
+            table_name=self.table_name,
+            column_mapping=self.column_mapping,
+            extra_columns=self.get_extra_columns(),
+            batch_size=batch_size,
+            max_workers=max_workers,
+            with_view=not self.materialized,
+        )
+        self.finish_tables(db, [table["name"] for table in table_list])
+
+    def update_db(
+        self,
+        db: SQLDB,
+        batch_size: int = 50000,
+        use_arrow: bool = False,
+        max_workers: int = 1,
+    ) -> ManifestChanges:
+        """
+        incrementally update the given database using the parquet manifest:
+        only added or changed files are imported, tables of removed files are dropped
+        and the combined view is only regenerated if the table set changes -
+        in materialized mode only the rows of the modified sources are replaced
+
+        The files are imported with the same loader as `to_db` so that both
+        give the same column types - the EntityInfo row dict conversion
+        unless use_arrow is set.
+
+        Args:
+            db(SQLDB): the database to update
+            batch_size(int): the maximum number of rows per batch
+            use_arrow(bool): if True use the Arrow native bulk loader
+            max_workers(int): number of worker processes for the Arrow native
+                bulk loader - 1 for a serial load
+
+        Returns:
+            ManifestChanges: the changes that have been applied
+
+        Raises:
+            ValueError: if more than one worker is requested without use_arrow
+        """
+        self.check_workers(use_arrow, max_workers)
+        manifest = ParquetManifest(db, debug=self.parquet_handler.debug)
+        parquet_files = self.parquet_handler.get_parquet_files(self.folder)
+        changes = manifest.get_changes(self.folder, parquet_files)
+        combined_type = MaterializedAddressTable.get_type(db, self.table_name)
+        expected_type = "table" if self.materialized else "view"
+        if changes.unchanged and combined_type != expected_type:
+            # the storage mode has been switched or the combined table is missing
+            changes.changed.extend(changes.unchanged)
+            changes.unchanged = []
+        modified = changes.modified
+        # a missing full text index is built for all tables
+        fts_missing = self.with_fts and not AddressFullTextIndex(db).exists()
+        old_table_list = self.parquet_handler.get_table_list(
+            db, [entry.table_name for entry in changes.changed]
+        )
+        if changes.removed:
+            address_table = MaterializedAddressTable(db, self.table_name)
+            with db.c:
+                for entry in changes.removed:
+                    address_table.remove_source(entry.source)
+                    MaterializedAddressTable.drop(db, entry.table_name)
+                manifest.remove(changes.removed)
+        if modified:
+            with db.c:
+                if combined_type and combined_type != expected_type:
+                    MaterializedAddressTable.drop(db, self.table_name)
+                for entry in modified:
+                    MaterializedAddressTable.drop(db, entry.table_name)
+            extra_columns = self.get_extra_columns()
+            modified_files = [entry.source for entry in modified]
+            if use_arrow:
+                self.parquet_handler.load_parquet_files_to_sqlite(
+                    self.folder,
+                    db=db,
+                    column_mapping=self.column_mapping,
+                    extra_columns=extra_columns,
+                    batch_size=batch_size,
+                    max_workers=max_workers,
+                    parquet_files=modified_files,
+                    with_view=False,
+                )
+            else:
+                parquet_data = self.parquet_handler.stream_parquet_files(
+                    self.folder,
+                    batch_size=batch_size,
+                    extra_columns=extra_columns,
+                    parquet_files=modified_files,
+                )
+                self.parquet_handler.convert_parquet_to_sqlite(
+                    parquet_data,
+                    db=db,
+                    column_mapping=self.column_mapping,
+                    with_view=False,
+                )
+            table_names = [entry.table_name for entry in modified]
+            if self.materialized:
+                self.materialize(db, table_names)
+                self.create_indexes(db, [self.table_name], combined=True)
+            else:
+                self.create_indexes(db, table_names)
+        fts_entries = modified + changes.unchanged if fts_missing else modified
+        self.update_fts(
+            db,
+            [entry.table_name for entry in fts_entries],
+            removed_tables=[entry.table_name for entry in changes.removed],
+        )
+        with db.c:
+            manifest.store(modified + changes.unchanged)
+        if self.materialized:
+            return changes
+        # the view depends on the table set and the columns of the tables
+        view_exists = db.c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='view' AND name=?",
+            (self.table_name,),
+        ).fetchone()
+        new_table_list = self.parquet_handler.get_table_list(
+            db, [entry.table_name for entry in changes.changed]
+        )
+        if (
+            changes.table_set_changed
+            or not view_exists
+            or old_table_list != new_table_list
+        ):
+            table_names = [os.path.splitext(f)[0] for f in parquet_files]
+            table_list = self.parquet_handler.get_table_list(db, table_names)
+            with db.c:
+                if table_list:
+                    self.parquet_handler.create_view(db, table_list, self.table_name)
+                else:
+                    db.c.execute(f"DROP VIEW IF EXISTS {self.table_name}")
+        return changes
+
+    def to_db(
+        self,
+        db: SQLDB,
+        batch_size: int = None,
+        use_arrow: bool = False,
+        max_workers: int = 1,
+    ):
+        """
+        read, enrich and convert all parquet files to the given database
+
+        Args:
+            db(SQLDB): the database to store the tables and the view in
+            batch_size(int): if set stream the files in chunks of this many rows
+                so that the memory needed is bounded by the chunk size
+            use_arrow(bool): if True use the Arrow native bulk loader
+                instead of the EntityInfo row dict conversion - opt-in since the
+                column types are derived from the Arrow schema instead of sampled
+            max_workers(int): number of worker processes for the Arrow native
+                bulk loader - 1 for a serial load
 
-    def to_db(self, db: SQLDB):
-        self.read()
-        self.inject_year()
+        Raises:
+            ValueError: if more than one worker is requested without use_arrow
+                since the row dict conversion is serial only
+        """
+        self.check_workers(use_arrow, max_workers)
+        if use_arrow:
+            self.load(db, batch_size=batch_size or 50000, max_workers=max_workers)
+            return
+        if batch_size:
+            self.stream(batch_size=batch_size)
+        else:
+            self.read()
         self.convert(db)
@@ -0,0 +1,116 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class BackgroundBuild:
+    """
+    run a database build in a background thread and report its state
+    so that the server can accept connections while the build is running
+    """
+
+    def __init__(self, name: str, build: Callable[[], Any], debug: bool = False):
+        """
+        constructor
+
+        Args:
+            name (str): the name of the build e.g. address.db
+            build (Callable[[], Any]): the function that builds the database
+            debug (bool): If True, enables debug output.
+        """
+        self.name = name
+        self.build = build
+        self.debug = debug
+        self.ready = threading.Event()
+        self.done = threading.Event()
+        self.error = None
+        self.start_time = None
+        self.duration = None
+        self.thread = None
+
+    def start(self) -> "BackgroundBuild":
+        """
+        start the build in a daemon thread
+        """
+        self.start_time = time.time()
+        self.thread = threading.Thread(
+            target=self.run, name=f"build {self.name}", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        """
+        run the build and record its outcome
+        """
+        try:
+            self.build()
+            self.ready.set()
+        except Exception as ex:
+            self.error = ex
+            logging.error(f"build of {self.name} failed: {ex}")
+        finally:
+            self.duration = time.time() - self.start_time
+            if self.debug:
+                print(
+                    f"build of {self.name}: {self.get_state()} in {self.duration:.1f}s"
+                )
+            self.done.set()
+
+    def get_state(self) -> str:
+        """
+        get the state of the build
+
+        Returns:
+            str: "loading", "ready" or "failed"
+        """
+        if self.ready.is_set():
+            return "ready"
+        if self.done.is_set():
+            return "failed"
+        return "loading"
+
+    def is_ready(self) -> bool:
+        """
+        check whether the build has completed successfully
+        """
+        return self.ready.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        wait for the build to finish
+
+        Args:
+            timeout (float): the maximum number of seconds to wait
+
+        Returns:
+            bool: True if the build has completed successfully
+        """
+        self.done.wait(timeout)
+        return self.is_ready()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        get the status of the build as a JSON compatible dict
+        """
+        if self.duration is not None:
+            elapsed = self.duration
+        elif self.start_time is not None:
+            elapsed = time.time() - self.start_time
+        else:
+            elapsed = 0.0
+        status = {
+            "name": self.name,
+            "state": self.get_state(),
+            "elapsed_secs": round(elapsed, 3),
+        }
+        if self.error is not None:
+            status["error"] = str(self.error)
+        return status
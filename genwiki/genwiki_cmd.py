@@ -5,10 +5,11 @@ Created on 2024-08-15
 """
 
 import sys
+from argparse import ArgumentParser
 
 from ngwidgets.cmd import WebserverCmd
 
-from genwiki.webserver import GenWikiWebServer
+from genwiki.webserver_config import GenWikiWebserverConfig
 
 
 class GenWikiCmd(WebserverCmd):
@@ -20,8 +21,75 @@ class GenWikiCmd(WebserverCmd):
         """
         constructor
         """
-        config = GenWikiWebServer.get_config()
-        WebserverCmd.__init__(self, config, GenWikiWebServer, DEBUG)
+        config = GenWikiWebserverConfig.get_config()
+        WebserverCmd.__init__(self, config, GenWikiCmd.create_webserver, DEBUG)
+
+    @classmethod
+    def create_webserver(cls):
+        """
+        create the webserver - its dependencies are only imported when serving
+        so that e.g. --help and --version do not need to load them
+        """
+        from genwiki.webserver import GenWikiWebServer
+
+        return GenWikiWebServer()
+
+    def add_arguments(self, parser: ArgumentParser):
+        """
+        add the genwiki specific command line arguments
+
+        Args:
+            parser (ArgumentParser): the parser to add arguments to.
+        """
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--build-location-index",
+            nargs="+",
+            metavar="QID",
+            help="harvest the admin units of the given Wikidata regions e.g. Q1205"
+            " into the offline location index",
+        )
+        parser.add_argument(
+            "--location-index",
+            help="path of the offline location index to build and to look up"
+            " locations in"
+            " (default: $GENWIKI_LOCATION_INDEX or ~/.genwiki/locations.db)",
+        )
+        parser.add_argument(
+            "--location-langs",
+            nargs="+",
+            default=["de", "en"],
+            help="languages of the labels of the location index (default: %(default)s)",
+        )
+
+    def handle_args(self, args) -> bool:
+        """
+        handle the genwiki specific command line arguments
+
+        Args:
+            args: The parsed command line arguments.
+
+        Returns:
+            bool: True if any argument was handled, False otherwise.
+        """
+        handled = False
+        if args.location_index:
+            from genwiki.location_index import LocationIndex
+
+            # the Locators of the webserver use the default index
+            LocationIndex.set_default_path(args.location_index)
+        if args.build_location_index:
+            from genwiki.location_index import LocationIndex
+
+            db_path = LocationIndex.get_default_path()
+            location_index = LocationIndex(db_path, debug=args.debug)
+            stats = location_index.harvest(
+                args.build_location_index, langs=args.location_langs
+            )
+            print(f"location index {db_path}: {stats} {location_index.get_stats()}")
+            handled = True
+        handled = super().handle_args(args) or handled
+        return handled
 
 
 def main(argv: list = None):
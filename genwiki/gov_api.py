@@ -10,7 +10,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional
 
-import requests
+from genwiki.http_scheduler import HttpScheduler
+from genwiki.metrics import MetricsRegistry
 
 
 @dataclass
@@ -123,8 +124,11 @@ class GOV_API:
 
         # If not in cache, fetch from API
         params = {"itemId": gov_id}
-        response = requests.get(self.url, params=params)
-        response.raise_for_status()
+        with MetricsRegistry.get_instance().timed_call("gov", "getObject"):
+            response = HttpScheduler.get_instance().request(
+                "GET", self.url, params=params
+            )
+            response.raise_for_status()
         data = response.json()
 
         # Save to cache
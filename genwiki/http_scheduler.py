@@ -0,0 +1,460 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Generator, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from genwiki.metrics import MetricsRegistry
+
+T = TypeVar("T")
+
+
+class RequestCancelledError(Exception):
+    """
+    raised when a request has been cancelled while waiting for its host
+    """
+
+
+class TokenBucket:
+    """
+    token bucket of the requests to a host in its virtual scheduling form:
+    each request reserves the next free slot so that waiting
+    requests are served in order at the given rate after a burst
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        constructor
+
+        Args:
+            rate (float): the number of requests per second
+            burst (int): the number of requests that may be made at once
+        """
+        self.rate = rate
+        self.burst = burst
+        # the theoretical arrival time of the next request
+        self.tat = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        reserve a token
+
+        Returns:
+            float: the seconds to wait before the token may be used
+        """
+        interval = 1.0 / self.rate
+        tolerance = (self.burst - 1) * interval
+        with self.lock:
+            now = time.monotonic()
+            tat = max(self.tat, now)
+            start = max(now, tat - tolerance)
+            self.tat = tat + interval
+        wait = start - now
+        return wait
+
+    def pause(self, secs: float) -> None:
+        """
+        hold back all requests for the given number of seconds
+        e.g. as asked for by a Retry-After header
+        """
+        interval = 1.0 / self.rate
+        tolerance = (self.burst - 1) * interval
+        with self.lock:
+            self.tat = max(self.tat, time.monotonic() + secs + tolerance)
+
+
+class HttpScheduler:
+    """
+    central scheduler of the outbound HTTP requests of genwiki
+
+    The requests to a host are throttled by a token bucket per host and
+    sent on a shared keep-alive connection pool. Responses with a status of
+    429 or 5xx and connection errors are retried with jittered exponential
+    backoff - a Retry-After header holds back all requests to the host.
+    """
+
+    instance: Optional["HttpScheduler"] = None
+    instance_lock = threading.Lock()
+    # requests per second and burst by host
+    default_rates = {
+        # https://operations.osmfoundation.org/policies/nominatim/
+        "nominatim.openstreetmap.org": (1.0, 1),
+        "query.wikidata.org": (1.0, 5),
+        "www.wikidata.org": (5.0, 5),
+        "gov.genealogy.net": (5.0, 5),
+    }
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        rates: Dict[str, Tuple[float, int]] = None,
+        default_rate: Tuple[float, int] = (10.0, 10),
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        max_delay: float = 60.0,
+        pool_size: int = 10,
+        timeout: float = 30.0,
+    ):
+        """
+        constructor
+
+        Args:
+            rates (Dict[str, Tuple[float, int]]): requests per second and burst by host
+            default_rate (Tuple[float, int]): requests per second and burst of other hosts
+            max_retries (int): the default number of retries of a request
+            backoff_base (float): the seconds of the first backoff
+            max_delay (float): the maximum seconds of a backoff or Retry-After
+            pool_size (int): the number of keep-alive connections per host
+            timeout (float): the default timeout in seconds of a request
+        """
+        self.rates = dict(self.default_rates)
+        if rates:
+            self.rates.update(rates)
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.queue_depths: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        registry = MetricsRegistry.get_instance()
+        self.requests_total = registry.counter(
+            "genwiki_http_requests_total",
+            "outbound HTTP requests by host and status",
+            ["host", "status"],
+        )
+        self.retries_total = registry.counter(
+            "genwiki_http_retries_total",
+            "retried outbound HTTP requests by host",
+            ["host"],
+        )
+        self.wait_seconds = registry.histogram(
+            "genwiki_http_wait_seconds",
+            "time outbound HTTP requests waited for their host's rate limit",
+            ["host"],
+        )
+        self.queue_depth = registry.gauge(
+            "genwiki_http_queue_depth",
+            "outbound HTTP requests waiting for their host's rate limit",
+            ["host"],
+        )
+
+    @classmethod
+    def get_instance(cls) -> "HttpScheduler":
+        """
+        get the process wide scheduler
+        """
+        with cls.instance_lock:
+            if cls.instance is None:
+                cls.instance = cls()
+        return cls.instance
+
+    @classmethod
+    def get_host(cls, url: str) -> str:
+        """
+        get the host of the given url
+        """
+        host = urlparse(url).netloc
+        return host
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        """
+        get the token bucket of the given host
+        """
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate, burst = self.rates.get(host, self.default_rate)
+                bucket = TokenBucket(rate, burst)
+                self.buckets[host] = bucket
+        return bucket
+
+    def update_queue_depth(self, host: str, delta: int) -> None:
+        """
+        change the number of requests waiting for the given host by delta
+        """
+        with self.lock:
+            depth = self.queue_depths.get(host, 0) + delta
+            self.queue_depths[host] = depth
+            self.queue_depth.set(depth, host=host)
+
+    @classmethod
+    def sleep(cls, secs: float, cancelled: threading.Event = None) -> None:
+        """
+        sleep for the given number of seconds
+
+        Args:
+            secs (float): the seconds to sleep
+            cancelled (threading.Event): if given wake up when it is set
+
+        Raises:
+            RequestCancelledError: if the cancelled event is set
+        """
+        if cancelled is None:
+            time.sleep(secs)
+        elif cancelled.wait(secs):
+            raise RequestCancelledError("request cancelled")
+
+    def acquire(self, host: str, cancelled: threading.Event = None) -> float:
+        """
+        wait until a request to the given host may be sent
+
+        Args:
+            host (str): the host
+            cancelled (threading.Event): if given stop waiting when it is set
+
+        Returns:
+            float: the seconds waited
+
+        Raises:
+            RequestCancelledError: if the cancelled event is set
+        """
+        wait = self.get_bucket(host).reserve()
+        if wait > 0:
+            self.update_queue_depth(host, 1)
+            try:
+                self.sleep(wait, cancelled)
+            finally:
+                self.update_queue_depth(host, -1)
+        self.wait_seconds.observe(max(wait, 0.0), host=host)
+        return wait
+
+    @classmethod
+    def parse_retry_after(cls, retry_after: Optional[str]) -> Optional[float]:
+        """
+        parse the given Retry-After header value
+
+        Args:
+            retry_after (Optional[str]): delay seconds or an HTTP date
+
+        Returns:
+            Optional[float]: the seconds to wait - None if not given or invalid
+        """
+        if not retry_after:
+            return None
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            retry_date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        secs = max(0.0, retry_date.timestamp() - time.time())
+        return secs
+
+    def get_backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        get the seconds to wait before the given retry
+
+        Args:
+            attempt (int): the 0 based number of the failed attempt
+            retry_after (Optional[str]): the Retry-After header of the response
+
+        Returns:
+            float: the Retry-After delay if given else a full jitter
+            exponential backoff - at most max_delay
+        """
+        delay = self.parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, self.backoff_base * 2**attempt)
+        delay = min(delay, self.max_delay)
+        return delay
+
+    def call(
+        self,
+        url: str,
+        send: Callable[[], Tuple[int, Optional[str], T]],
+        max_retries: int = None,
+        retry_exceptions: Tuple = (),
+        cancelled: threading.Event = None,
+    ) -> T:
+        """
+        send a request to the given url rate limited and with retries
+
+        Args:
+            url (str): the url of the request
+            send (Callable[[], Tuple[int, Optional[str], T]]): the function that
+                sends the request once and returns the status,
+                the Retry-After header and the result
+            max_retries (int): the number of retries - default: my max_retries
+            retry_exceptions (Tuple): the exceptions of send to retry
+            cancelled (threading.Event): if given stop waiting for the rate limit
+                or a backoff when it is set
+
+        Returns:
+            T: the result of the last attempt
+
+        Raises:
+            RequestCancelledError: if the cancelled event is set before a send
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        host = self.get_host(url)
+        attempt = 0
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                raise RequestCancelledError(f"request to {url} cancelled")
+            self.acquire(host, cancelled)
+            try:
+                status, retry_after, result = send()
+            except retry_exceptions as ex:
+                self.requests_total.inc(host=host, status=type(ex).__name__)
+                if attempt >= max_retries:
+                    raise
+                status, retry_after, result = None, None, None
+            else:
+                self.requests_total.inc(host=host, status=str(status))
+                if status not in self.retry_statuses or attempt >= max_retries:
+                    return result
+            delay = self.get_backoff(attempt, retry_after)
+            if retry_after:
+                # the server asks all our requests to wait
+                self.get_bucket(host).pause(delay)
+            else:
+                self.sleep(delay, cancelled)
+            self.retries_total.inc(host=host)
+            attempt += 1
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        max_retries: int = None,
+        cancelled: threading.Event = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        send the given request on the shared connection pool
+
+        Args:
+            method (str): the HTTP method e.g. GET
+            url (str): the url
+            max_retries (int): the number of retries - default: my max_retries
+            cancelled (threading.Event): if given stop waiting when it is set
+            **kwargs: the arguments of requests.Session.request e.g. params or headers
+
+        Returns:
+            requests.Response: the response of the last attempt
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        def send():
+            response = self.session.request(method, url, **kwargs)
+            return response.status_code, response.headers.get("Retry-After"), response
+
+        response = self.call(
+            url,
+            send,
+            max_retries=max_retries,
+            retry_exceptions=(requests.ConnectionError, requests.Timeout),
+            cancelled=cancelled,
+        )
+        return response
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        get the rate and queue depth per host
+        """
+        with self.lock:
+            stats = {
+                host: {
+                    "rate": bucket.rate,
+                    "burst": bucket.burst,
+                    "queue_depth": self.queue_depths.get(host, 0),
+                }
+                for host, bucket in self.buckets.items()
+            }
+        return stats
+
+    def mount(self, session: requests.Session) -> "ScheduledAdapter":
+        """
+        send the requests of the given session e.g. the one of a third party
+        client through this scheduler
+
+        Args:
+            session (requests.Session): the session
+
+        Returns:
+            ScheduledAdapter: the adapter mounted for http and https
+        """
+        adapter = ScheduledAdapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return adapter
+
+
+class ScheduledAdapter(HTTPAdapter):
+    """
+    transport adapter that sends the requests of a requests.Session
+    rate limited and retried by the HttpScheduler
+
+    The waits for the rate limit and the backoffs can be cancelled by an
+    event that is set per thread - a request that has already been sent
+    runs until it completes or times out.
+    """
+
+    def __init__(self, scheduler: HttpScheduler):
+        """
+        constructor
+
+        Args:
+            scheduler (HttpScheduler): the scheduler to send the requests with
+        """
+        super().__init__()
+        self.scheduler = scheduler
+        self.local = threading.local()
+
+    @contextmanager
+    def cancellable(
+        self, cancelled: threading.Event = None
+    ) -> Generator["ScheduledAdapter", None, None]:
+        """
+        make the requests of the current thread within this context
+        cancellable by the given event
+
+        Args:
+            cancelled (threading.Event): the event to stop waiting with
+        """
+        previous = getattr(self.local, "cancelled", None)
+        self.local.cancelled = cancelled
+        try:
+            yield self
+        finally:
+            self.local.cancelled = previous
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """
+        send the given request via my scheduler - with my scheduler's
+        timeout if the client did not set one
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.scheduler.timeout
+
+        def send():
+            response = super(ScheduledAdapter, self).send(request, **kwargs)
+            return response.status_code, response.headers.get("Retry-After"), response
+
+        response = self.scheduler.call(
+            request.url,
+            send,
+            retry_exceptions=(requests.ConnectionError, requests.Timeout),
+            cancelled=getattr(self.local, "cancelled", None),
+        )
+        return response
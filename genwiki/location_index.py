@@ -0,0 +1,415 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from lodstorage.sql import SQLDB
+
+
+class LocationIndex:
+    """
+    compact local SQLite index of a regional subset of the Wikidata admin units
+    with their labels, coordinates, ISO 3166 codes, admin parents,
+    geonames and NUTS ids so that the Locator can answer without
+    querying the Wikidata endpoint
+    """
+
+    item_prefix = "http://www.wikidata.org/entity/"
+    # the geo id kinds of the GOV external references by index kind
+    geoid_kinds = {"geonames": "geonames", "NUTS2003": "NUTS", "NUTS1999": "NUTS"}
+    default_path = None
+    default_instance = None
+    default_lock = threading.Lock()
+
+    def __init__(self, db_path: str = ":memory:", debug: bool = False):
+        """
+        constructor
+
+        Args:
+            db_path (str): the path of the SQLite database of the index
+            debug (bool): If True, enables debug output.
+        """
+        self.db_path = db_path
+        self.debug = debug
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db = SQLDB(db_path, check_same_thread=False)
+        # the connection is shared by the threads of the webserver
+        self.lock = threading.Lock()
+        self.create()
+
+    @classmethod
+    def set_default_path(cls, db_path: str) -> None:
+        """
+        set the path of the default index e.g. from the --location-index
+        command line option
+
+        Args:
+            db_path (str): the path of the SQLite database of the index
+        """
+        with cls.default_lock:
+            if db_path != cls.default_path:
+                cls.default_path = db_path
+                cls.default_instance = None
+
+    @classmethod
+    def get_default_path(cls) -> str:
+        """
+        get the path of the default index - the path that has been set,
+        GENWIKI_LOCATION_INDEX or ~/.genwiki/locations.db
+        """
+        db_path = cls.default_path or os.environ.get("GENWIKI_LOCATION_INDEX")
+        if not db_path:
+            db_path = os.path.expanduser("~/.genwiki/locations.db")
+        return db_path
+
+    @classmethod
+    def get_default(cls) -> Optional["LocationIndex"]:
+        """
+        get the process wide default index
+
+        Returns:
+            Optional[LocationIndex]: the index - None if it has not been built
+        """
+        with cls.default_lock:
+            if cls.default_instance is None:
+                db_path = cls.get_default_path()
+                if os.path.isfile(db_path):
+                    cls.default_instance = cls(db_path)
+        return cls.default_instance
+
+    def create(self) -> None:
+        """
+        create the tables of the index if they do not exist
+        """
+        with self.lock:
+            self.db.c.executescript("""
+CREATE TABLE IF NOT EXISTS location_meta(
+  name TEXT PRIMARY KEY, value TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS location(
+  qid TEXT PRIMARY KEY,
+  coordinates TEXT, lat REAL, lon REAL,
+  country_iso_code TEXT, region_iso_code TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS location_label(
+  qid TEXT, lang TEXT, label TEXT, PRIMARY KEY(qid, lang)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS location_parent(
+  qid TEXT, parent TEXT, PRIMARY KEY(qid, parent)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS location_geoid(
+  kind TEXT, geo_id TEXT, qid TEXT, PRIMARY KEY(kind, geo_id, qid)
+) WITHOUT ROWID;
+""")
+
+    @classmethod
+    def unprefix(cls, item: str) -> str:
+        """
+        get the Q-Identifier of the given item uri
+        """
+        if item and item.startswith(cls.item_prefix):
+            item = item[len(cls.item_prefix) :]
+        return item
+
+    @classmethod
+    def parse_point(cls, coordinates: str) -> Tuple[Optional[float], Optional[float]]:
+        """
+        parse the given WKT point e.g. Point(11.3 50.98)
+
+        Returns:
+            Tuple[Optional[float], Optional[float]]: latitude and longitude
+        """
+        if not coordinates:
+            return None, None
+        lon, lat = map(float, coordinates.strip("Point()").split())
+        return lat, lon
+
+    def add_items(self, lod: List[Dict[str, Any]]) -> int:
+        """
+        add the given WikidataRegionIndex records - does not commit
+
+        Args:
+            lod (List[Dict[str, Any]]): the records with item, coordinates,
+                country_iso_code, region_iso_code and the space separated
+                parents, geonames_ids and nuts_codes
+
+        Returns:
+            int: the number of items added
+        """
+        with self.lock:
+            for record in lod:
+                qid = self.unprefix(record["item"])
+                coordinates = record.get("coordinates")
+                lat, lon = self.parse_point(coordinates)
+                self.db.c.execute(
+                    "INSERT OR REPLACE INTO location VALUES (?,?,?,?,?,?)",
+                    (
+                        qid,
+                        coordinates,
+                        lat,
+                        lon,
+                        record.get("country_iso_code"),
+                        record.get("region_iso_code"),
+                    ),
+                )
+                parents = (record.get("parents") or "").split()
+                self.db.c.executemany(
+                    "INSERT OR IGNORE INTO location_parent VALUES (?,?)",
+                    [(qid, parent) for parent in parents],
+                )
+                for name, kind in [
+                    ("geonames_ids", "geonames"),
+                    ("nuts_codes", "NUTS"),
+                ]:
+                    geo_ids = (record.get(name) or "").split()
+                    self.db.c.executemany(
+                        "INSERT OR IGNORE INTO location_geoid VALUES (?,?,?)",
+                        [(kind, geo_id, qid) for geo_id in geo_ids],
+                    )
+        return len(lod)
+
+    def add_labels(self, lod: List[Dict[str, Any]], lang: str) -> int:
+        """
+        add the given WikidataRegionIndexLabels records - does not commit
+
+        Args:
+            lod (List[Dict[str, Any]]): the records with item and label
+            lang (str): the language of the labels
+
+        Returns:
+            int: the number of labels added
+        """
+        with self.lock:
+            self.db.c.executemany(
+                "INSERT OR REPLACE INTO location_label VALUES (?,?,?)",
+                [
+                    (self.unprefix(record["item"]), lang, record["label"])
+                    for record in lod
+                ],
+            )
+        langs = self.get_langs()
+        if lang not in langs:
+            self.set_meta("langs", " ".join(langs + [lang]))
+        return len(lod)
+
+    def set_meta(self, name: str, value: str) -> None:
+        """
+        set the meta data value with the given name - does not commit
+        """
+        with self.lock:
+            self.db.c.execute(
+                "INSERT OR REPLACE INTO location_meta VALUES (?,?)", (name, value)
+            )
+
+    def get_meta(self) -> Dict[str, str]:
+        """
+        get the meta data of the index e.g. the regions and languages
+        """
+        with self.lock:
+            rows = self.db.c.execute("SELECT name, value FROM location_meta")
+            meta = {name: value for name, value in rows}
+        return meta
+
+    def get_langs(self) -> List[str]:
+        """
+        get the languages of the labels in the index
+        """
+        langs = (self.get_meta().get("langs") or "").split()
+        return langs
+
+    def commit(self) -> None:
+        """
+        commit the added items and labels
+        """
+        with self.lock:
+            self.db.c.commit()
+
+    def harvest(
+        self,
+        regions: List[str],
+        langs: List[str] = None,
+        timeout: float = 300.0,
+    ) -> Dict[str, Any]:
+        """
+        harvest the admin units within and above the given regions
+        from Wikidata into this index
+
+        Args:
+            regions (List[str]): the Q-Identifiers of the regions e.g. Q1205 for Thuringia
+            langs (List[str]): the languages of the labels - default: de and en
+            timeout (float): seconds to wait for each SPARQL response
+
+        Returns:
+            Dict[str, Any]: the number of items and labels and the duration
+        """
+        from genwiki.genwiki_paths import GenWikiPaths
+        from genwiki.multilang_querymanager import MultiLanguageQueryManager
+        from genwiki.query_task import QueryTask
+        from genwiki.wikidata import Wikidata
+
+        if langs is None:
+            langs = ["de", "en"]
+        start_time = time.time()
+        yaml_path = os.path.join(GenWikiPaths.get_examples_path(), "queries.yaml")
+        mlqm = MultiLanguageQueryManager(yaml_path=yaml_path)
+        sparql = Wikidata.get_sparql()
+        cache = Wikidata.get_cache()
+        regions_str = " ".join(f"wd:{region}" for region in regions)
+        query = mlqm.query4Name("WikidataRegionIndex")
+        param_dict = {"regions": regions_str}
+        task = QueryTask(query.name, timeout=timeout)
+        lod = task.sparql_query(sparql, query.query, param_dict, cache=cache)
+        stats = {"items": self.add_items(lod), "labels": 0}
+        query = mlqm.query4Name("WikidataRegionIndexLabels")
+        for lang in langs:
+            param_dict = {"regions": regions_str, "lang": lang}
+            task = QueryTask(query.name, timeout=timeout)
+            lod = task.sparql_query(sparql, query.query, param_dict, cache=cache)
+            stats["labels"] += self.add_labels(lod, lang)
+        meta = self.get_meta()
+        known_regions = (meta.get("regions") or "").split()
+        all_regions = known_regions + [r for r in regions if r not in known_regions]
+        self.set_meta("regions", " ".join(all_regions))
+        self.set_meta("built", time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self.commit()
+        stats["secs"] = round(time.time() - start_time, 1)
+        if self.debug:
+            print(f"location index {self.db_path}: {stats}")
+        return stats
+
+    def contains(self, qid: str) -> bool:
+        """
+        check whether the given item is in the index
+        """
+        with self.lock:
+            row = self.db.c.execute(
+                "SELECT 1 FROM location WHERE qid=?", (qid,)
+            ).fetchone()
+        return row is not None
+
+    def lookup_item(self, qid: str, lang: str = "de") -> Optional[List[Dict[str, Any]]]:
+        """
+        get the admin hierarchy of the given item as the WikidataLookup query
+        returns it - the ancestors with an ISO 3166 code ordered by level
+
+        Args:
+            qid (str): the Q-Identifier of the item
+            lang (str): the language of the labels
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: the lookup records - None if the index
+            can not answer since the item, its labels in the given language
+            or its country are not in the index
+        """
+        sql = """WITH RECURSIVE ancestor(qid) AS (
+  SELECT parent FROM location_parent WHERE qid=?
+  UNION
+  SELECT p.parent FROM location_parent p JOIN ancestor a ON p.qid=a.qid
+)
+SELECT a.qid,l.label,loc.country_iso_code,loc.region_iso_code
+FROM ancestor a
+JOIN location loc ON loc.qid=a.qid
+LEFT JOIN location_label l ON l.qid=a.qid AND l.lang=?
+WHERE a.qid!=?
+AND (loc.country_iso_code IS NOT NULL OR loc.region_iso_code IS NOT NULL)"""
+        with self.lock:
+            item_row = self.db.c.execute(
+                "SELECT coordinates FROM location WHERE qid=?", (qid,)
+            ).fetchone()
+            if item_row is None:
+                return None
+            label_row = self.db.c.execute(
+                "SELECT label FROM location_label WHERE qid=? AND lang=?", (qid, lang)
+            ).fetchone()
+            rows = self.db.c.execute(sql, (qid, lang, qid)).fetchall()
+        if not any(country_iso for _qid, _label, country_iso, _iso in rows):
+            # the hierarchy up to the country is not in the index
+            return None
+        if label_row is None:
+            known_langs = self.get_langs()
+            # without a label the WikidataLookup query has no result
+            return [] if lang in known_langs else None
+        coordinates = item_row[0]
+        qlod = []
+        for admin_qid, admin_label, country_iso, region_iso in rows:
+            if admin_label is None:
+                continue
+            record = {"item": f"{self.item_prefix}{qid}", "itemLabel": label_row[0]}
+            if coordinates:
+                record["coordinates"] = coordinates
+            record["intermediateAdmin"] = f"{self.item_prefix}{admin_qid}"
+            record["intermediateAdminLabel"] = admin_label
+            record["level"] = "3" if country_iso else "4"
+            record["iso_code"] = country_iso or region_iso
+            qlod.append(record)
+        qlod.sort(key=lambda record: record["level"], reverse=True)
+        return qlod
+
+    def get_coordinates(
+        self, qids: List[str]
+    ) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        get the coordinates of the given items
+
+        Args:
+            qids (List[str]): the Q-Identifiers of the items
+
+        Returns:
+            Dict[str, Optional[Tuple[float, float]]]: latitude and longitude
+            of the items in the index - None for items without coordinates
+        """
+        coordinates = {}
+        with self.lock:
+            for qid in qids:
+                row = self.db.c.execute(
+                    "SELECT lat, lon FROM location WHERE qid=?", (qid,)
+                ).fetchone()
+                if row is not None:
+                    lat, lon = row
+                    coordinates[qid] = (lat, lon) if lat is not None else None
+        return coordinates
+
+    def lookup_by_geoid(self, geoid_kind: str, geo_id: str) -> List[str]:
+        """
+        get the items with the given geonames id or NUTS code
+
+        Args:
+            geoid_kind (str): geonames, NUTS2003 or NUTS1999
+            geo_id (str): the id
+
+        Returns:
+            List[str]: the Q-Identifiers of the matching items in the index
+        """
+        kind = self.geoid_kinds.get(geoid_kind)
+        if kind is None:
+            raise ValueError(f"invalid geo_id_kind {geoid_kind}")
+        with self.lock:
+            rows = self.db.c.execute(
+                "SELECT qid FROM location_geoid WHERE kind=? AND geo_id=?",
+                (kind, geo_id),
+            ).fetchall()
+        qids = [row[0] for row in rows]
+        return qids
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        get the number of rows per table of the index
+        """
+        stats = {}
+        with self.lock:
+            for table in [
+                "location",
+                "location_label",
+                "location_parent",
+                "location_geoid",
+            ]:
+                row = self.db.c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+                stats[table] = row[0]
+        return stats
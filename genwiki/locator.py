@@ -4,6 +4,7 @@ Created on 15.09.2024
 @author: wf
 """
 
+import asyncio
 import logging
 import os
 from collections import Counter
@@ -15,27 +16,83 @@ from geopy.distance import geodesic
 
 from genwiki.genwiki_paths import GenWikiPaths
 from genwiki.gov_api import GOV_API
+from genwiki.http_scheduler import HttpScheduler
+from genwiki.location_index import LocationIndex
 from genwiki.multilang_querymanager import MultiLanguageQueryManager
 from genwiki.nominatim import NominatimWrapper
+from genwiki.query_task import QueryTask
 from genwiki.wikidata import Wikidata
 
 
+class ScheduledWikidataSearch(WikidataSearch):
+    """
+    Wikidata search that sends its requests via the HttpScheduler
+    """
+
+    def make_wikidata_request(self, apisearch: str):
+        response = HttpScheduler.get_instance().request(
+            "GET",
+            apisearch,
+            headers={"User-Agent": self.get_user_agent()},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
 class Locator:
     """
     find locations
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, location_index: LocationIndex = None):
+        """
+        constructor
+
+        Args:
+            debug (bool): If True, enables debug output.
+            location_index (LocationIndex): the offline index to answer from first -
+                default: the index built with --build-location-index if any
+        """
         self.nominatim = NominatimWrapper(user_agent="GenWiki2024LocationTest")
-        self.wds = WikidataSearch()
+        self.wds = ScheduledWikidataSearch()
+        # one search per language so that concurrent searches do not
+        # change each other's language
+        self.wds_by_lang = {}
         self.gov_api = GOV_API()
         self.sparql = Wikidata.get_sparql()
         yaml_path = os.path.join(GenWikiPaths.get_examples_path(), "queries.yaml")
         self.mlqm = MultiLanguageQueryManager(yaml_path=yaml_path)
         self.lookup_query = self.mlqm.query4Name("WikidataLookup")
+        # admin hierarchy lookup results by (item, lang)
+        self.lookups = {}
         self.limit = 11
         self.lang_map = {"deu": "de", "pol": "pl"}
         self.debug = debug
+        # seconds to wait for a SPARQL response
+        self.timeout = 60.0
+        # maximum number of concurrent requests per backend of locate_async
+        self.max_concurrency = {"gov": 2, "sparql": 4, "search": 4, "nominatim": 1}
+        # the semaphores of the bounds shared by the calls of locate_async
+        # on the same event loop
+        self.semaphores = {}
+        self.semaphores_loop = None
+        if location_index is None:
+            location_index = LocationIndex.get_default()
+        self.location_index = location_index
+
+    def query_sparql(
+        self, sparql_query: str, param_dict: dict, name: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        run the given SPARQL query on the Wikidata endpoint
+        with metrics and the persistent response cache
+        """
+        task = QueryTask(name, timeout=self.timeout)
+        qlod = task.sparql_query(
+            self.sparql, sparql_query, param_dict=param_dict, cache=Wikidata.get_cache()
+        )
+        return qlod
 
     def multi_item_query(
         self, query_name, items: List[str], lang: str = "en"
@@ -47,18 +104,23 @@ class Locator:
         items_str = " ".join([f"wd:{item}" for item in items if item])
         param_dict = {"items": items_str, "lang": lang}
         sparql_query = query.params.apply_parameters_with_check(param_dict)
-        qlod = self.sparql.queryAsListOfDicts(
-            queryString=sparql_query, param_dict=param_dict
-        )
+        qlod = self.query_sparql(sparql_query, param_dict, name=query.name)
         return qlod
 
     def get_coordinates(self, items: List[str]) -> Dict[str, tuple]:
         """
         Get coordinates for multiple Wikidata items
         """
-        qlod = self.multi_item_query(query_name="WikidataItemsCoordinates", items=items)
-
         coordinates = {}
+        if self.location_index:
+            indexed = self.location_index.get_coordinates(items)
+            for item, item_coords in indexed.items():
+                if item_coords:
+                    coordinates[item] = item_coords
+            items = [item for item in items if item not in indexed]
+            if not items:
+                return coordinates
+        qlod = self.multi_item_query(query_name="WikidataItemsCoordinates", items=items)
         for record in qlod:
             item = Wikidata.unprefix(record["item"])
             coord_str = record["coordinates"]
@@ -67,14 +129,64 @@ class Locator:
         return coordinates
 
     def lookup_item(self, item: str, lang: str = "de"):
+        key = (item, lang)
+        if key in self.lookups:
+            return self.lookups[key]
+        if self.location_index:
+            qlod = self.location_index.lookup_item(item, lang)
+            if qlod is not None:
+                self.lookups[key] = qlod
+                return qlod
         param_dict = {"item": item, "lang": lang}
         query = self.lookup_query
         sparql_query = query.params.apply_parameters_with_check(param_dict)
-        qlod = self.sparql.queryAsListOfDicts(
-            queryString=sparql_query, param_dict=param_dict
-        )
+        qlod = self.query_sparql(sparql_query, param_dict, name=query.name)
+        self.lookups[key] = qlod
         return qlod
 
+    def lookup_items(
+        self, items: List[str], lang: str = "de", chunk_size: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        lookup the admin hierarchy of the given items with a VALUES clause
+        in chunked requests instead of one request per item
+
+        Args:
+            items (List[str]): the wikidata Q-Identifiers
+            lang (str): the language of the labels
+            chunk_size (int): the maximum number of items per request
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: the lookup records per item as
+            lookup_item would return them - usable with to_path and check_location
+        """
+        missing = []
+        for item in items:
+            if item and (item, lang) not in self.lookups and item not in missing:
+                qlod = None
+                if self.location_index:
+                    qlod = self.location_index.lookup_item(item, lang)
+                if qlod is not None:
+                    self.lookups[(item, lang)] = qlod
+                else:
+                    missing.append(item)
+        for i in range(0, len(missing), chunk_size):
+            chunk = missing[i : i + chunk_size]
+            qlods = {item: [] for item in chunk}
+            qlod = self.multi_item_query("WikidataLookupMulti", chunk, lang=lang)
+            for record in qlod:
+                item = Wikidata.unprefix(record["item"])
+                if item in qlods:
+                    qlods[item].append(record)
+            for item, item_qlod in qlods.items():
+                self.lookups[(item, lang)] = item_qlod
+        lookups = {
+            item: self.lookups[(item, lang)]
+            for item in items
+            if item and (item, lang) in self.lookups
+        }
+        return lookups
+
     def to_path(self, qlod) -> str:
         path = None
         for record in qlod:
@@ -97,6 +209,14 @@ class Locator:
         self, geoid_kind: str, geo_id: str, lang: str = "en"
     ) -> str:
         result = None
+        if self.location_index:
+            items = self.location_index.lookup_by_geoid(geoid_kind, geo_id)
+            if len(items) == 1:
+                return items[0]
+            elif len(items) > 1:
+                raise ValueError(
+                    f"wikidata has multiple entries for {geoid_kind}:{geo_id}"
+                )
         if geoid_kind == "NUTS2003" or geoid_kind == "NUTS1999":
             query_name = "WikidataLookupByNutsCode"
             param_name = "nuts_code"
@@ -108,9 +228,7 @@ class Locator:
         query = self.mlqm.query4Name(query_name)
         param_dict = {param_name: geo_id, "lang": lang}
         sparql_query = query.params.apply_parameters_with_check(param_dict)
-        qlod = self.sparql.queryAsListOfDicts(
-            queryString=sparql_query, param_dict=param_dict
-        )
+        qlod = self.query_sparql(sparql_query, param_dict, name=query.name)
         if len(qlod) == 1:
             record = qlod[0]
             item = record["item"]
@@ -120,9 +238,18 @@ class Locator:
             raise ValueError(f"wikidata has multiple entries for {param_name}:{geo_id}")
         return result
 
+    def get_wds(self, language: str) -> WikidataSearch:
+        """
+        get the Wikidata search for the given language
+        """
+        wds = self.wds_by_lang.get(language)
+        if wds is None:
+            wds = ScheduledWikidataSearch(language)
+            wds = self.wds_by_lang.setdefault(language, wds)
+        return wds
+
     def locate_by_name(self, name: str, language: str = "de"):
-        self.wds.language = language
-        sr = self.wds.searchOptions(name, limit=self.limit)
+        sr = self.get_wds(language).searchOptions(name, limit=self.limit)
         for j, q_record in enumerate(sr):
             qid, qlabel, desc = q_record
             if self.debug:
@@ -170,7 +297,7 @@ class Locator:
         value_counts = Counter(items.values())
 
         # Sort items by value, then by frequency of value
-        sorted_items = sorted(items.items(), key=lambda x: (-value_counts[x[1]],x[1]))
+        sorted_items = sorted(items.items(), key=lambda x: (-value_counts[x[1]], x[1]))
 
         # Clear and update the original dictionary
         items.clear()
@@ -218,3 +345,93 @@ class Locator:
         self.validate(gov_obj, items)
         self.sort_items(items)
         return items
+
+    def get_semaphores(self) -> Dict[str, asyncio.Semaphore]:
+        """
+        get the semaphores of the backends for the running event loop -
+        a semaphore can not be shared between event loops e.g. those of
+        consecutive asyncio.run calls
+        """
+        loop = asyncio.get_running_loop()
+        if self.semaphores_loop is not loop:
+            self.semaphores = {
+                backend: asyncio.Semaphore(limit)
+                for backend, limit in self.max_concurrency.items()
+            }
+            self.semaphores_loop = loop
+        return self.semaphores
+
+    async def locate_async(self, gov_id: str) -> Dict[str, str]:
+        """
+        locate the location described by the given gov_id like locate does
+        but with the independent lookups running concurrently - bounded
+        per backend by max_concurrency - and each GOV name searched only once
+
+        Args:
+            gov_id (str): the GOV id of the location
+
+        Returns:
+            Dict[str, str]: the validated and sorted wikidata items by source
+        """
+        semaphores = self.get_semaphores()
+
+        async def call(backend: str, func, *args):
+            async with semaphores[backend]:
+                return await asyncio.to_thread(func, *args)
+
+        items = {}
+        gov_obj = None
+        try:
+            gov_obj = await call("gov", self.gov_api.get_raw_gov_object, gov_id)
+            refs = [ref["value"] for ref in gov_obj.get("externalReference", [])]
+            geoid_refs = []
+            for i, val in enumerate(refs):
+                if self.debug:
+                    print(f"{i}:{val}")
+                for geoid_kind in ["geonames", "NUTS2003", "NUTS1999"]:
+                    if val.startswith(geoid_kind):
+                        geo_id = val.split(":")[1]
+                        geoid_refs.append((i, val, geoid_kind, geo_id))
+            # the names are the same for each reference
+            names = {}
+            if refs:
+                for name_record in gov_obj["name"]:
+                    language = self.lang_map.get(name_record["lang"], "en")
+                    names[(name_record["value"], language)] = None
+            lookups = [
+                call("sparql", self.lookup_wikidata_id_by_geoid, geoid_kind, geo_id)
+                for _i, _val, geoid_kind, geo_id in geoid_refs
+            ]
+            searches = [
+                call("search", self.locate_by_name, name, language)
+                for name, language in names
+            ]
+            results = await asyncio.gather(*lookups, *searches, return_exceptions=True)
+            geoid_items = results[: len(lookups)]
+            name_items = results[len(lookups) :]
+            # keep the insertion order of locate for the sorting of equal counts
+            # and the items found before the first failed lookup of locate
+            for i in range(len(refs)):
+                for (ref_i, val, _kind, _geo_id), item in zip(geoid_refs, geoid_items):
+                    if ref_i != i:
+                        continue
+                    if isinstance(item, BaseException):
+                        raise item
+                    if item:
+                        items[val] = item
+                for (name, language), item in zip(names, name_items):
+                    if isinstance(item, BaseException):
+                        raise item
+                    items[f"gov-{name}@{language}"] = item
+        except Exception as ex:
+            if "404" in str(ex) or "501" in str(ex):
+                item = await call(
+                    "nominatim", self.nominatim.lookup_wikidata_id, gov_id
+                )
+                if item:
+                    items["nominatim"] = item
+            else:
+                raise ex
+        await call("sparql", self.validate, gov_obj, items)
+        self.sort_items(items)
+        return items
@@ -0,0 +1,324 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+
+class Metric:
+    """
+    a metric with optional labels in the Prometheus data model
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: List[str] = None):
+        """
+        constructor
+
+        Args:
+            name (str): the metric name e.g. genwiki_page_render_seconds
+            help_text (str): the description of the metric
+            labelnames (List[str]): the names of the labels
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames or []
+        self.values: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def get_key(self, labels: Dict[str, str]) -> Tuple:
+        """
+        get the key for the given label values
+
+        Raises:
+            ValueError: if the labels do not match the label names
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"metric {self.name} needs the labels {self.labelnames} but got {list(labels)}"
+            )
+        key = tuple(str(labels[labelname]) for labelname in self.labelnames)
+        return key
+
+    @classmethod
+    def escape(cls, value: str) -> str:
+        """
+        escape the given label value
+        """
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return escaped
+
+    @classmethod
+    def format_value(cls, value: float) -> str:
+        """
+        format the given sample value
+        """
+        if value == float("inf"):
+            return "+Inf"
+        text = repr(float(value)) if isinstance(value, float) else str(value)
+        return text
+
+    def format_labels(self, key: Tuple, extra: Dict[str, str] = None) -> str:
+        """
+        format the labels of the given key
+        """
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        markup = ",".join(f'{name}="{self.escape(value)}"' for name, value in pairs)
+        return f"{{{markup}}}"
+
+    def get_samples(self) -> List[str]:
+        """
+        get the sample lines of the text exposition format
+        """
+        with self.lock:
+            items = sorted(self.values.items())
+        lines = [
+            f"{self.name}{self.format_labels(key)} {self.format_value(value)}"
+            for key, value in items
+        ]
+        return lines
+
+    def to_text(self) -> str:
+        """
+        get the metric in the Prometheus text exposition format
+        """
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.get_samples())
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """
+    a monotonically increasing count
+    """
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        increment the counter with the given labels
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    a value that can go up and down
+    """
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        set the value with the given labels
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    """
+    a distribution of observed values in cumulative buckets
+    """
+
+    type_name = "histogram"
+    default_buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: List[str] = None,
+        buckets: List[float] = None,
+    ):
+        """
+        constructor
+
+        Args:
+            name (str): the metric name
+            help_text (str): the description of the metric
+            labelnames (List[str]): the names of the labels
+            buckets (List[float]): the upper bounds of the buckets
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = sorted(buckets or self.default_buckets)
+        # per label key: the bucket counts, the sum and the count
+        self.values: Dict[Tuple, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        observe the given value with the given labels
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            bucket_counts, total, count = self.values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    bucket_counts[i] += 1
+            self.values[key] = (bucket_counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels) -> Generator[None, None, None]:
+        """
+        observe the wall time of the with block in seconds
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get_samples(self) -> List[str]:
+        with self.lock:
+            items = sorted(
+                (key, (list(bucket_counts), total, count))
+                for key, (bucket_counts, total, count) in self.values.items()
+            )
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                labels = self.format_labels(key, {"le": self.format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = self.format_labels(key, {"le": "+Inf"})
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = self.format_labels(key)
+            lines.append(f"{self.name}_sum{labels} {self.format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    registry of the metrics of the process that modules report to
+
+    Collectors are called when the metrics are exposed to report
+    values that are kept elsewhere e.g. the statistics of a cache.
+    """
+
+    instance: Optional["MetricsRegistry"] = None
+    instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], List[Metric]]] = []
+        self.lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "MetricsRegistry":
+        """
+        get the process wide registry
+        """
+        with cls.instance_lock:
+            if cls.instance is None:
+                cls.instance = cls()
+        return cls.instance
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        register the given metric - an already registered metric
+        with the same name and type is returned instead
+
+        Raises:
+            ValueError: if a metric of another type has the same name
+        """
+        with self.lock:
+            registered = self.metrics.get(metric.name)
+            if registered is None:
+                self.metrics[metric.name] = metric
+                return metric
+        if type(registered) is not type(metric):
+            raise ValueError(
+                f"metric {metric.name} is already registered as {registered.type_name}"
+            )
+        return registered
+
+    def counter(
+        self, name: str, help_text: str, labelnames: List[str] = None
+    ) -> Counter:
+        """
+        get the counter with the given name
+        """
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: List[str] = None) -> Gauge:
+        """
+        get the gauge with the given name
+        """
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: List[str] = None,
+        buckets: List[float] = None,
+    ) -> Histogram:
+        """
+        get the histogram with the given name
+        """
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[Metric]]) -> None:
+        """
+        add a function that returns freshly filled metrics on each exposition
+        """
+        with self.lock:
+            self.collectors.append(collector)
+
+    def to_text(self) -> str:
+        """
+        get all metrics in the Prometheus text exposition format
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        text = "".join(metric.to_text() for metric in metrics)
+        return text
+
+    @contextmanager
+    def timed_call(self, service: str, operation: str) -> Generator[None, None, None]:
+        """
+        count and time a call of an external service
+        e.g. sparql, gov or nominatim by outcome
+
+        Args:
+            service (str): the name of the external service
+            operation (str): the name of the operation
+        """
+        calls = self.counter(
+            "genwiki_external_calls_total",
+            "calls of external services by outcome",
+            ["service", "operation", "outcome"],
+        )
+        seconds = self.histogram(
+            "genwiki_external_call_seconds",
+            "latency of the calls of external services",
+            ["service", "operation"],
+        )
+        outcome = "error"
+        try:
+            with seconds.time(service=service, operation=operation):
+                yield
+            outcome = "ok"
+        finally:
+            calls.inc(service=service, operation=operation, outcome=outcome)
@@ -4,7 +4,13 @@ Created on 2024-09-12
 @author: wf
 """
 
-from lodstorage.query import Query, QueryManager
+from typing import Dict, List
+
+from lodstorage.query import Query
+
+from genwiki.query_cache import QueryResultCache
+from genwiki.query_catalog import QueryCatalog
+from genwiki.query_stats import QueryStats
 
 
 class MultiLanguageQueryManager:
@@ -15,26 +21,30 @@ class MultiLanguageQueryManager:
     def __init__(
         self,
         yaml_path: str,
-        languages: list = ["sql", "sparql", "ask"],
+        languages: list = ["sql", "sparql", "ask", "fts", "arrow"],
         debug: bool = False,
+        cache: QueryResultCache = None,
+        stats: QueryStats = None,
     ):
         self.languages = languages
         self.debug = debug
-        self.qms = {}
-        for lang in languages:
-            qm = QueryManager(
-                lang=lang, queriesPath=yaml_path, with_default=False, debug=self.debug
-            )
-            self.qms[lang] = qm
+        # optional cache of the query results
+        self.cache = cache
+        # optional execution statistics of the queries
+        self.stats = stats
+        # the yaml file is parsed once per process
+        self.catalog = QueryCatalog.get_instance(yaml_path, debug=debug)
+
+    @property
+    def query_names(self) -> List[str]:
+        return self.catalog.get_query_names(self.languages)
 
-        self.query_names = []
-        for qm in self.qms.values():
-            self.query_names.extend(list(qm.queriesByName.keys()))
+    def get_queries(self, lang: str) -> Dict[str, Query]:
+        """
+        get the queries of the given language by name
+        """
+        return self.catalog.get_queries(lang)
 
     def query4Name(self, name: str) -> Query:
-        result = None
-        for qm in self.qms.values():
-            if name in qm.queriesByName:
-                result = qm.queriesByName[name]
-                break
+        result = self.catalog.query4Name(name, self.languages)
         return result
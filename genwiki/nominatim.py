@@ -6,9 +6,61 @@ Created on 25.08.2024
 
 import logging
 
-from geopy.exc import GeocoderQueryError, GeocoderTimedOut, GeocoderUnavailable
+import requests
+from geopy.adapters import AdapterHTTPError, BaseSyncAdapter
+from geopy.exc import (
+    GeocoderParseError,
+    GeocoderQueryError,
+    GeocoderTimedOut,
+    GeocoderUnavailable,
+)
 from geopy.geocoders import Nominatim
 
+from genwiki.http_scheduler import HttpScheduler
+from genwiki.metrics import MetricsRegistry
+
+
+class HttpSchedulerAdapter(BaseSyncAdapter):
+    """
+    geopy adapter that sends the geocoding requests via the HttpScheduler
+    """
+
+    def __init__(self, *, proxies, ssl_context):
+        super().__init__(proxies=proxies, ssl_context=ssl_context)
+        self.scheduler = HttpScheduler.get_instance()
+
+    def get_text(self, url, *, timeout, headers):
+        response = self.request(url, timeout=timeout, headers=headers)
+        return response.text
+
+    def get_json(self, url, *, timeout, headers):
+        response = self.request(url, timeout=timeout, headers=headers)
+        try:
+            return response.json()
+        except ValueError:
+            raise GeocoderParseError(f"Could not deserialize {response.text}")
+
+    def request(self, url, *, timeout, headers) -> requests.Response:
+        """
+        get the given url mapping the errors to the geopy exceptions
+        """
+        try:
+            response = self.scheduler.request(
+                "GET", url, timeout=timeout, headers=headers
+            )
+        except requests.Timeout:
+            raise GeocoderTimedOut("Service timed out")
+        except requests.ConnectionError as ex:
+            raise GeocoderUnavailable(str(ex))
+        if response.status_code >= 400:
+            raise AdapterHTTPError(
+                f"Non-successful status code {response.status_code}",
+                status_code=response.status_code,
+                headers=response.headers,
+                text=response.text,
+            )
+        return response
+
 
 class NominatimWrapper:
     """
@@ -22,38 +74,36 @@ class NominatimWrapper:
         Args:
             user_agent (str): The user agent to use for the geolocator
         """
-        self.geolocator = Nominatim(user_agent=user_agent)
+        self.geolocator = Nominatim(
+            user_agent=user_agent, adapter_factory=HttpSchedulerAdapter
+        )
         logging.getLogger("geopy").setLevel(logging.ERROR)
 
-    def lookup_wikidata_id(self, location_text: str, max_retries: int = 3):
+    def lookup_wikidata_id(self, location_text: str):
         """
         Lookup the Wikidata Identifier for the given location text
 
+        timeouts and unavailability are retried by the HttpScheduler
+
         Args:
             location_text (str): The location text to search for
-            max_retries (int): Maximum number of retries in case of timeout or unavailability
 
         Returns:
             str: The Wikidata Q identifier most fitting the given location text, or None if not found
         """
-        for attempt in range(max_retries):
-            try:
+        try:
+            with MetricsRegistry.get_instance().timed_call("nominatim", "geocode"):
                 location = self.geolocator.geocode(
                     location_text, exactly_one=True, extratags=True
                 )
-
-                if location:
-                    extratags = location.raw.get("extratags", {})
-                    if extratags and "wikidata" in extratags:
-                        return extratags["wikidata"]
-                return None
-            except (GeocoderTimedOut, GeocoderUnavailable):
-                if attempt == max_retries - 1:
-                    logging.error(f"Failed to geocode after {max_retries} attempts")
-                else:
-                    logging.warning(
-                        f"Geocoding attempt {attempt + 1} failed, retrying..."
-                    )
-            except GeocoderQueryError:
-                logging.warning("Geocoding failed")
+        except (GeocoderTimedOut, GeocoderUnavailable) as ex:
+            logging.error(f"Failed to geocode {location_text}: {ex}")
+            return None
+        except GeocoderQueryError:
+            logging.warning("Geocoding failed")
+            return None
+        if location:
+            extratags = location.raw.get("extratags", {})
+            if extratags and "wikidata" in extratags:
+                return extratags["wikidata"]
         return None
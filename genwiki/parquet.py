@@ -5,13 +5,23 @@ Created on 2024-08-26
 """
 
 import logging
+import operator
 import os
-from typing import Any, Dict, List
-
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
 from lodstorage.schema import Schema, SchemaManager
 from lodstorage.sql import SQLDB, EntityInfo
 
+from genwiki.arrow_loader import ArrowSqlLoader
+
 
 class Parquet:
     """
@@ -20,18 +30,111 @@ class Parquet:
     This class provides functionality to read Parquet files from a directory
     and convert their contents to an SQLite database using EntityInfo.
 
+    Reading can be restricted to a projection of columns and a row filter which
+    are pushed down into the Parquet reader so that columns and row groups
+    that are not needed are never decoded.
+
     Attributes:
         debug (bool): If True, debug information will be logged.
+        columns (List[str]): the Parquet columns to read - None for all columns
+        filters (Union[pc.Expression, List]): the row filter - None for all rows
+        memory_map (bool): If True, local Parquet files are memory mapped.
     """
 
-    def __init__(self, debug: bool = False):
+    # comparison operators of the disjunctive normal form filters
+    filter_ops = {
+        "=": operator.eq,
+        "==": operator.eq,
+        "!=": operator.ne,
+        "<": operator.lt,
+        ">": operator.gt,
+        "<=": operator.le,
+        ">=": operator.ge,
+        "in": lambda value, values: value in values,
+        "not in": lambda value, values: value not in values,
+        "like": lambda value, pattern: Parquet.like(value, pattern),
+        "not like": lambda value, pattern: not Parquet.like(value, pattern),
+    }
+
+    def __init__(
+        self,
+        debug: bool = False,
+        columns: List[str] = None,
+        filters: Union[pc.Expression, List] = None,
+        memory_map: bool = False,
+    ):
         """
         Initialize the Parquet handler.
 
         Args:
             debug (bool): If True, enables debug output. Defaults to False.
+            columns (List[str], optional): projection - the Parquet columns to read. Defaults to all columns.
+            filters (Union[pc.Expression, List], optional): row filter either as a pyarrow compute expression
+                or in the disjunctive normal form of pyarrow.parquet.read_table e.g. [("Bezirk", "=", "Ilm-Bezirk")].
+                The DNF form also supports the SQL "like" and "not like" operators.
+                Predicates of the DNF form on the source or other constant columns are decided per file
+                so that files that can not match are skipped completely.
+            memory_map (bool): If True, memory map local Parquet files. Defaults to False.
         """
         self.debug = debug
+        self.columns = columns
+        self.filters = filters
+        self.memory_map = memory_map
+
+    @classmethod
+    def like(cls, value: Any, pattern: str) -> bool:
+        """
+        Check whether the given value matches the given SQL LIKE pattern
+        case insensitive as SQLite does.
+
+        Args:
+            value (Any): the value to check
+            pattern (str): the pattern with % and _ wildcards
+
+        Returns:
+            bool: True if the value matches
+        """
+        if value is None:
+            return False
+        regex = "".join(
+            ".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern
+        )
+        return re.fullmatch(regex, str(value), re.IGNORECASE | re.DOTALL) is not None
+
+    @classmethod
+    def to_expression(cls, dnf: List[List[Tuple[str, str, Any]]]) -> pc.Expression:
+        """
+        Convert the given filter in disjunctive normal form to a pyarrow compute expression.
+
+        In addition to the operators of pyarrow.parquet.filters_to_expression
+        the SQL "like" and "not like" operators are supported.
+
+        Args:
+            dnf (List[List[Tuple[str, str, Any]]]): the disjunction of conjunctions of predicates
+
+        Returns:
+            pc.Expression: the expression
+        """
+        disjunction = None
+        for conjunction in dnf:
+            expression = None
+            for name, op, value in conjunction:
+                field = pc.field(name)
+                if op == "like":
+                    predicate = pc.match_like(field, value, ignore_case=True)
+                elif op == "not like":
+                    predicate = ~pc.match_like(field, value, ignore_case=True)
+                elif op == "in":
+                    predicate = field.isin(value)
+                elif op == "not in":
+                    predicate = ~field.isin(value)
+                else:
+                    predicate = cls.filter_ops[op](field, value)
+                expression = predicate if expression is None else expression & predicate
+            disjunction = (
+                expression if disjunction is None else disjunction | expression
+            )
+        return disjunction
 
     def log(self, msg: str) -> None:
         """
@@ -43,63 +146,614 @@ class Parquet:
         if self.debug:
             logging.debug(msg)
 
-    def read_parquet_files(self, directory: str) -> Dict[str, List[Dict[str, Any]]]:
+    def get_parquet_files(self, directory: str) -> List[str]:
         """
-        Read all Parquet files in the given directory and return their contents as a dictionary of table names to rows.
+        Get the names of the Parquet files in the given directory.
 
         Args:
             directory (str): The path to the directory containing Parquet files.
 
         Returns:
-            Dict[str, List[Dict[str, Any]]]: A dictionary where keys are table names (derived from file names)
-                                             and values are lists of dictionaries representing the rows.
+            List[str]: the sorted list of .parquet file names
 
         Raises:
             FileNotFoundError: If the specified directory does not exist.
         """
         if not os.path.exists(directory):
             raise FileNotFoundError(f"Directory not found: {directory}")
+        parquet_files = sorted(
+            f for f in os.listdir(directory) if f.endswith(".parquet")
+        )
+        return parquet_files
 
-        parquet_files = [f for f in os.listdir(directory) if f.endswith(".parquet")]
+    def stream_parquet_files(
+        self,
+        directory: str,
+        batch_size: int = 10000,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Dict[str, Any]] = None,
+        parquet_files: List[str] = None,
+    ) -> Dict[str, Generator[pa.RecordBatch, None, None]]:
+        """
+        Lazily read all Parquet files in the given directory.
+
+        Args:
+            directory (str): The path to the directory containing Parquet files.
+            batch_size (int): The maximum number of rows per chunk.
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Dict[str, Any]], optional): Parquet file names mapped to
+                the constant columns to append to the rows of that file
+            parquet_files (List[str], optional): the names of the files to read - default: all files in the directory
+
+        Returns:
+            Dict[str, Generator[pa.RecordBatch, None, None]]: A dictionary where keys are table names
+                (derived from file names) and values are generators of prepared record batches.
+        """
+        extra_columns = extra_columns or {}
+        if parquet_files is None:
+            parquet_files = self.get_parquet_files(directory)
         tables_data = {}
+        for parquet_file in parquet_files:
+            file_path = os.path.join(directory, parquet_file)
+            table_name = os.path.splitext(parquet_file)[0]
+            tables_data[table_name] = self.iter_record_batches(
+                file_path,
+                batch_size=batch_size,
+                column_mapping=column_mapping,
+                extra_columns=extra_columns.get(parquet_file),
+            )
+        return tables_data
+
+    def append_constant_columns(
+        self, batch: Union[pa.RecordBatch, pa.Table], constants: Dict[str, Any]
+    ) -> Union[pa.RecordBatch, pa.Table]:
+        """
+        Append a column for each of the given constants to the given record batch or table.
+
+        Args:
+            batch (Union[pa.RecordBatch, pa.Table]): the Arrow data
+            constants (Dict[str, Any]): column names mapped to constant values
+
+        Returns:
+            Union[pa.RecordBatch, pa.Table]: the Arrow data with the constant columns appended
+        """
+        for name, value in constants.items():
+            batch = batch.append_column(
+                name, pa.repeat(pa.scalar(value), batch.num_rows)
+            )
+        return batch
+
+    def rename_columns(
+        self, batch: Union[pa.RecordBatch, pa.Table], column_mapping: Dict[str, str]
+    ) -> Union[pa.RecordBatch, pa.Table]:
+        """
+        Rename the columns of the given record batch or table - only the schema is touched.
+
+        Args:
+            batch (Union[pa.RecordBatch, pa.Table]): the Arrow data
+            column_mapping (Dict[str, str]): Mapping of Parquet column names to SQLite column names.
+
+        Returns:
+            Union[pa.RecordBatch, pa.Table]: the Arrow data with renamed columns
+        """
+        names = [column_mapping.get(name, name) for name in batch.schema.names]
+        return batch.rename_columns(names)
+
+    def prepare_batch(
+        self,
+        batch: Union[pa.RecordBatch, pa.Table],
+        source: str,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Any] = None,
+    ) -> Union[pa.RecordBatch, pa.Table]:
+        """
+        Add the source and the given constant columns to the given record batch or table
+        and rename its columns according to the column mapping.
+
+        Args:
+            batch (Union[pa.RecordBatch, pa.Table]): the Arrow data to prepare
+            source (str): the value of the source column
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Any], optional): column names mapped to constant values to append
+
+        Returns:
+            Union[pa.RecordBatch, pa.Table]: the prepared Arrow data
+        """
+        constants = {"source": source}
+        if extra_columns:
+            constants.update(extra_columns)
+        batch = self.append_constant_columns(batch, constants)
+        if column_mapping:
+            batch = self.rename_columns(batch, column_mapping)
+        return batch
+
+    def get_dataset(self, file_path: str) -> ds.Dataset:
+        """
+        Get a dataset for the given Parquet file honoring the memory map setting.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+
+        Returns:
+            ds.Dataset: the dataset
+        """
+        filesystem = pafs.LocalFileSystem(use_mmap=self.memory_map)
+        dataset = ds.dataset(
+            os.path.abspath(file_path), format="parquet", filesystem=filesystem
+        )
+        return dataset
+
+    def get_projection(self, schema: pa.Schema) -> Optional[List[str]]:
+        """
+        Get the columns of the given schema that are part of the projection.
+
+        Args:
+            schema (pa.Schema): the schema of a Parquet file
+
+        Returns:
+            Optional[List[str]]: the column names in file order - None if there is no projection
+        """
+        if self.columns is None:
+            return None
+        projection = [name for name in schema.names if name in self.columns]
+        return projection
+
+    def get_filter_expression(
+        self, constants: Dict[str, Any], schema: Optional[pa.Schema] = None
+    ) -> Tuple[bool, Optional[pc.Expression]]:
+        """
+        Resolve the row filter for a file with the given constant columns.
+
+        A predicate on a column that is neither a constant nor in the schema of the file
+        e.g. the year of a file without a year mapping does not match as a NULL value would not.
+
+        Args:
+            constants (Dict[str, Any]): the constant columns of the file e.g. source
+            schema (pa.Schema, optional): the schema of the file - if given predicates on
+                missing columns are not pushed down
+
+        Returns:
+            Tuple[bool, Optional[pc.Expression]]: False if no row of the file can match -
+                otherwise True and the expression to push down (None for all rows)
+        """
+        if self.filters is None:
+            return True, None
+        if isinstance(self.filters, pc.Expression):
+            return True, self.filters
+        if self.filters and isinstance(self.filters[0], tuple):
+            dnf = [self.filters]
+        else:
+            dnf = self.filters
+        conjunctions = []
+        for conjunction in dnf:
+            remaining = []
+            matches = True
+            for name, op, value in conjunction:
+                if name in constants:
+                    matches = self.filter_ops[op](constants[name], value)
+                    if not matches:
+                        break
+                elif schema is not None and schema.get_field_index(name) < 0:
+                    matches = False
+                    break
+                else:
+                    remaining.append((name, op, value))
+            if not matches:
+                continue
+            if not remaining:
+                # all rows of the file match this conjunction
+                return True, None
+            conjunctions.append(remaining)
+        if not conjunctions:
+            return False, None
+        return True, self.to_expression(conjunctions)
+
+    def get_scanner(
+        self, file_path: str, batch_size: int, constants: Dict[str, Any]
+    ) -> Optional[ds.Scanner]:
+        """
+        Get a scanner for the given Parquet file with projection and filter pushed down.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+            batch_size (int): The maximum number of rows per batch.
+            constants (Dict[str, Any]): the constant columns of the file e.g. source
+
+        Returns:
+            Optional[ds.Scanner]: the scanner - None if no row of the file can match the filter
+        """
+        dataset = self.get_dataset(file_path)
+        matches, expression = self.get_filter_expression(constants, dataset.schema)
+        if not matches:
+            self.log(f"Skipping {file_path} - no match for filter")
+            return None
+        scanner = dataset.scanner(
+            columns=self.get_projection(dataset.schema),
+            filter=expression,
+            batch_size=batch_size,
+        )
+        return scanner
+
+    def iter_record_batches(
+        self,
+        file_path: str,
+        batch_size: int = 50000,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Any] = None,
+    ) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Stream the given Parquet file as prepared Arrow record batches.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+            batch_size (int): The maximum number of rows per batch.
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Any], optional): column names mapped to constant values to append
+
+        Yields:
+            pa.RecordBatch: the next prepared record batch
+        """
+        source = os.path.basename(file_path)
+        constants = {"source": source, **(extra_columns or {})}
+        scanner = self.get_scanner(file_path, batch_size, constants)
+        if scanner is None:
+            return
+        for batch in scanner.to_batches():
+            if batch.num_rows > 0:
+                yield self.prepare_batch(batch, source, column_mapping, extra_columns)
+
+    def get_record_batch_schema(
+        self,
+        file_path: str,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Any] = None,
+    ) -> pa.Schema:
+        """
+        Get the schema of the record batches `iter_record_batches` yields for the given file.
+
+        Only the Parquet footer is read. The projection is applied.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Any], optional): column names mapped to constant values to append
+
+        Returns:
+            pa.Schema: the schema of the prepared batches
+        """
+        schema = pq.ParquetFile(file_path).schema_arrow
+        empty_table = schema.empty_table()
+        projection = self.get_projection(schema)
+        if projection is not None:
+            empty_table = empty_table.select(projection)
+        source = os.path.basename(file_path)
+        prepared = self.prepare_batch(
+            empty_table, source, column_mapping, extra_columns
+        )
+        return prepared.schema
+
+    def load_parquet_file_to_sqlite(
+        self,
+        file_path: str,
+        db: SQLDB,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Any] = None,
+        batch_size: int = 50000,
+    ) -> Dict[str, Any]:
+        """
+        Load a single Parquet file into a table named after the file.
+
+        Does not commit - the caller controls the transaction.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+            db (SQLDB): the database to load into
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Any], optional): column names mapped to constant values to append
+            batch_size (int): The maximum number of rows per executemany batch.
+
+        Returns:
+            Dict[str, Any]: the table dict of the table created
+        """
+        loader = ArrowSqlLoader(db, debug=self.debug)
+        table_name = os.path.splitext(os.path.basename(file_path))[0]
+        schema = self.get_record_batch_schema(file_path, column_mapping, extra_columns)
+        batches = self.iter_record_batches(
+            file_path,
+            batch_size=batch_size,
+            column_mapping=column_mapping,
+            extra_columns=extra_columns,
+        )
+        table = loader.load(table_name, schema, batches)
+        return table
+
+    def load_parquet_file_to_sqlite_file(
+        self,
+        file_path: str,
+        db_path: str,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Any] = None,
+        batch_size: int = 50000,
+    ) -> Dict[str, Any]:
+        """
+        Load a single Parquet file into its own SQLite database file.
+
+        This is the unit of work of the parallel ingest - it runs in a worker process.
+
+        Args:
+            file_path (str): The path of the Parquet file.
+            db_path (str): The path of the SQLite database file to create.
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Any], optional): column names mapped to constant values to append
+            batch_size (int): The maximum number of rows per executemany batch.
+
+        Returns:
+            Dict[str, Any]: the table dict of the table created
+        """
+        db = SQLDB(db_path)
+        try:
+            with db.c:
+                table = self.load_parquet_file_to_sqlite(
+                    file_path, db, column_mapping, extra_columns, batch_size
+                )
+        finally:
+            db.close()
+        return table
+
+    def merge_sqlite_file(self, db: SQLDB, db_path: str, table_name: str) -> None:
+        """
+        Copy the given table from the given SQLite database file into the given database.
+
+        Args:
+            db (SQLDB): the target database
+            db_path (str): The path of the SQLite database file to copy from.
+            table_name (str): the name of the table to copy
+        """
+        # ATTACH is not allowed within a transaction
+        db.c.execute("ATTACH DATABASE ? AS source_db", (db_path,))
+        try:
+            create_cmd = db.c.execute(
+                "SELECT sql FROM source_db.sqlite_master WHERE type='table' AND name=?",
+                (table_name,),
+            ).fetchone()[0]
+            with db.c:
+                db.c.execute("BEGIN")
+                db.c.execute(f'DROP TABLE IF EXISTS main."{table_name}"')
+                db.c.execute(create_cmd)
+                db.c.execute(
+                    f'INSERT INTO main."{table_name}" SELECT * FROM source_db."{table_name}"'
+                )
+        finally:
+            db.c.execute("DETACH DATABASE source_db")
+
+    def create_view(
+        self, db: SQLDB, table_list: List[Dict[str, Any]], view_name: str
+    ) -> None:
+        """
+        (Re)create the view combining the given tables.
+
+        Does not commit - the caller controls the transaction.
+
+        Args:
+            db (SQLDB): the database
+            table_list (List[Dict[str, Any]]): the table dicts of the tables to combine
+            view_name (str): the name of the view
+        """
+        db.c.execute(f"DROP VIEW IF EXISTS {view_name}")
+        view_ddl = Schema.getGeneralViewDDL(table_list, view_name, debug=self.debug)
+        db.c.execute(view_ddl)
+        self.log(f"Created view '{view_name}' combining all tables")
+
+    def load_parquet_files_to_sqlite(
+        self,
+        directory: str,
+        db: SQLDB,
+        table_name: str = None,
+        column_mapping: Dict[str, str] = None,
+        extra_columns: Dict[str, Dict[str, Any]] = None,
+        batch_size: int = 50000,
+        max_workers: int = 1,
+        parquet_files: List[str] = None,
+        with_view: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Load all Parquet files in the given directory directly from Arrow
+        record batches into SQLite tables and create a combined view.
+
+        In contrast to `convert_parquet_to_sqlite` no row dicts are built:
+        the table layout is derived from the Arrow schema and all rows are
+        inserted with executemany in a single transaction.
+
+        With more than one worker the files are decoded and converted in a
+        process pool - each worker writes a temporary SQLite file which is then
+        merged into the given database by this process as the single writer.
+
+        Args:
+            directory (str): The path to the directory containing Parquet files.
+            db (SQLDB): the database to load into
+            table_name (str, optional): The name of the combined view. Defaults to "combined_view".
+            column_mapping (Dict[str, str], optional): Mapping of Parquet column names to SQLite column names.
+            extra_columns (Dict[str, Dict[str, Any]], optional): Parquet file names mapped to
+                the constant columns to append to the rows of that file
+            batch_size (int): The maximum number of rows per executemany batch.
+            max_workers (int): The number of worker processes - 1 for a serial load
+            parquet_files (List[str], optional): the names of the files to load - default: all files in the directory
+            with_view (bool): if True (re)create the combined view of the loaded tables
+
+        Returns:
+            List[Dict[str, Any]]: the table dicts of the tables created
+
+        Raises:
+            ValueError: If there are no Parquet files in the directory.
+        """
+        if parquet_files is None:
+            parquet_files = self.get_parquet_files(directory)
+        if not parquet_files:
+            raise ValueError("No data to convert to SQLite")
+        extra_columns = extra_columns or {}
+        view_name = table_name or "combined_view"
+        if max_workers and max_workers > 1:
+            tables = {}
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {}
+                    for parquet_file in parquet_files:
+                        file_path = os.path.join(directory, parquet_file)
+                        db_path = os.path.join(tmp_dir, f"{parquet_file}.db")
+                        future = executor.submit(
+                            self.load_parquet_file_to_sqlite_file,
+                            file_path,
+                            db_path,
+                            column_mapping,
+                            extra_columns.get(parquet_file),
+                            batch_size,
+                        )
+                        futures[future] = (parquet_file, db_path)
+                    # merge in the order of completion
+                    for future in as_completed(futures):
+                        parquet_file, db_path = futures[future]
+                        table = future.result()
+                        self.merge_sqlite_file(db, db_path, table["name"])
+                        tables[parquet_file] = table
+                        self.log(f"Merged {parquet_file}")
+            table_list = [tables[parquet_file] for parquet_file in parquet_files]
+            if with_view:
+                with db.c:
+                    self.create_view(db, table_list, view_name)
+        else:
+            table_list = []
+            with db.c:
+                if not db.c.in_transaction:
+                    # make the DDL part of the transaction as well
+                    db.c.execute("BEGIN")
+                for parquet_file in parquet_files:
+                    file_path = os.path.join(directory, parquet_file)
+                    table = self.load_parquet_file_to_sqlite(
+                        file_path,
+                        db,
+                        column_mapping,
+                        extra_columns.get(parquet_file),
+                        batch_size,
+                    )
+                    table_list.append(table)
+                if with_view:
+                    self.create_view(db, table_list, view_name)
+        return table_list
+
+    def get_table_list(self, db: SQLDB, table_names: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the table dicts of the given existing tables from the database schema.
+
+        Args:
+            db (SQLDB): the database
+            table_names (List[str]): the names of the tables
+
+        Returns:
+            List[Dict[str, Any]]: the table dicts with the declared column types
+        """
+        table_list = []
+        for name in table_names:
+            columns = [
+                {"name": row[1], "type": row[2]}
+                for row in db.c.execute(f'PRAGMA table_info("{name}")')
+            ]
+            table_list.append({"name": name, "columns": columns})
+        return table_list
+
+    def read_parquet_tables(
+        self, directory: str, extra_columns: Dict[str, Dict[str, Any]] = None
+    ) -> Dict[str, pa.Table]:
+        """
+        Read all Parquet files in the given directory as Arrow tables with the source column appended.
+
+        Args:
+            directory (str): The path to the directory containing Parquet files.
+            extra_columns (Dict[str, Dict[str, Any]], optional): Parquet file names mapped to
+                the constant columns to append to the rows of that file
+
+        Returns:
+            Dict[str, pa.Table]: A dictionary where keys are table names (derived from file names)
+                                 and values are the Arrow tables.
+
+        Raises:
+            FileNotFoundError: If the specified directory does not exist.
+        """
+        parquet_files = self.get_parquet_files(directory)
+        tables = {}
 
         for parquet_file in parquet_files:
             file_path = os.path.join(directory, parquet_file)
             table_name = os.path.splitext(parquet_file)[0]  # Remove .parquet extension
+            file_extra_columns = (extra_columns or {}).get(parquet_file)
+            constants = {"source": parquet_file, **(file_extra_columns or {})}
             try:
-                table = pq.read_table(file_path)
-                rows = table.to_pylist()
-                # Add source field to each row
-                for row in rows:
-                    row["source"] = parquet_file
-                tables_data[table_name] = rows
-                log_msg = f"Read {len(rows)} rows from {parquet_file}"
+                scanner = self.get_scanner(file_path, 50000, constants)
+                if scanner is None:
+                    continue
+                table = scanner.to_table()
+                # Add source column to the table
+                tables[table_name] = self.prepare_batch(
+                    table, parquet_file, extra_columns=file_extra_columns
+                )
+                log_msg = f"Read {table.num_rows} rows from {parquet_file}"
                 self.log(log_msg)
             except Exception as e:
                 log_msg = f"Failed to read {parquet_file}: {e}"
                 self.log(log_msg)
 
+        return tables
+
+    def read_parquet_files(self, directory: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Read all Parquet files in the given directory and return their contents as a dictionary of table names to rows.
+
+        Args:
+            directory (str): The path to the directory containing Parquet files.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: A dictionary where keys are table names (derived from file names)
+                                             and values are lists of dictionaries representing the rows.
+
+        Raises:
+            FileNotFoundError: If the specified directory does not exist.
+        """
+        tables = self.read_parquet_tables(directory)
+        tables_data = {
+            table_name: table.to_pylist() for table_name, table in tables.items()
+        }
         return tables_data
 
     def convert_parquet_to_sqlite(
         self,
-        parquet_data: Dict[str, List[Dict[str, Any]]],
+        parquet_data: Dict[
+            str,
+            Union[
+                List[Dict[str, Any]],
+                pa.Table,
+                Iterable[Union[List[Dict[str, Any]], pa.RecordBatch]],
+            ],
+        ],
         db: SQLDB,
         table_name: str = None,
         column_mapping: Dict[str, str] = None,
+        with_view: bool = True,
     ):
         """
         Converts Parquet data to SQLite tables and creates a combined view.
 
         Args:
-            parquet_data (Dict[str, List[Dict[str, Any]]]): A dictionary where keys are table names and values are lists
-                of dictionaries representing rows of data. Each dictionary in the list represents a row, with keys as
-                column names and values as column values.
+            parquet_data (Dict[str, Union[List[Dict[str, Any]], pa.Table, Iterable[Union[List[Dict[str, Any]], pa.RecordBatch]]]]):
+                A dictionary where keys are table names and values are lists of dictionaries representing rows of data.
+                Each dictionary in the list represents a row, with keys as column names and values as column values.
+                Instead of a list of rows an Arrow table or an iterable of row chunks or record batches as returned
+                by `stream_parquet_files` may be given - the chunks are then stored one by one with bounded memory.
+                Arrow data is renamed on the schema before it is turned into rows.
             db (SQLDB): An instance of the SQLDB class where the tables will be created.
             table_name (str, optional): The name of the combined view that will be created. If not provided,
                 defaults to "combined_view".
             column_mapping (Dict[str, str], optional): A dictionary mapping original column names to new column names.
                 If provided, the columns in the Parquet data will be renamed accordingly.
+            with_view (bool): if True (re)create the combined view of the converted tables
 
         Raises:
             ValueError: If `parquet_data` is empty.
@@ -127,12 +781,28 @@ class Parquet:
         table_list = []
 
         for original_table_name, rows in parquet_data.items():
-            if column_mapping:
-                rows = self._apply_column_mapping(rows, column_mapping)
-
-            entityInfo = EntityInfo(rows, original_table_name, debug=self.debug)
-            db.createTable4EntityInfo(entityInfo)
-            db.store(rows, entityInfo)
+            # a plain list of rows or an Arrow table is handled as a single chunk
+            chunks = [rows] if isinstance(rows, (list, pa.Table)) else rows
+            entityInfo = None
+            row_count = 0
+            for chunk in chunks:
+                if isinstance(chunk, (pa.Table, pa.RecordBatch)):
+                    if column_mapping:
+                        chunk = self.rename_columns(chunk, column_mapping)
+                    chunk = chunk.to_pylist()
+                elif column_mapping:
+                    chunk = self._apply_column_mapping(chunk, column_mapping)
+                if entityInfo is None:
+                    # the first chunk serves as the sample for the table layout
+                    entityInfo = EntityInfo(
+                        chunk, original_table_name, debug=self.debug
+                    )
+                    db.createTable4EntityInfo(entityInfo)
+                db.store(chunk, entityInfo)
+                row_count += len(chunk)
+            if entityInfo is None:
+                self.log(f"No rows for SQLite table '{original_table_name}'")
+                continue
 
             table = {
                 "name": original_table_name,
@@ -143,8 +813,10 @@ class Parquet:
             }
             table_list.append(table)
 
-            self.log(f"Added {len(rows)} rows to SQLite table '{original_table_name}'")
+            self.log(f"Added {row_count} rows to SQLite table '{original_table_name}'")
 
+        if not with_view:
+            return
         # Create a view that combines all tables
         view_name = table_name or "combined_view"
         view_ddl = Schema.getGeneralViewDDL(table_list, view_name, debug=self.debug)
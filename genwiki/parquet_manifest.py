@@ -0,0 +1,187 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from lodstorage.sql import SQLDB
+
+
+@dataclass
+class ManifestEntry:
+    """
+    the state of an imported Parquet file
+    """
+
+    source: str  # the Parquet file name
+    table_name: str
+    size: int
+    mtime: float
+    sha256: str
+
+
+@dataclass
+class ManifestChanges:
+    """
+    the differences between a folder of Parquet files and a manifest
+    """
+
+    added: List[ManifestEntry] = field(default_factory=list)
+    changed: List[ManifestEntry] = field(default_factory=list)
+    # unchanged content - the entries carry the current size and mtime
+    unchanged: List[ManifestEntry] = field(default_factory=list)
+    removed: List[ManifestEntry] = field(default_factory=list)
+
+    @property
+    def modified(self) -> List[ManifestEntry]:
+        """
+        the entries of the files that need to be (re)imported
+        """
+        return self.added + self.changed
+
+    @property
+    def table_set_changed(self) -> bool:
+        """
+        True if tables are to be added or removed
+        """
+        return len(self.added) > 0 or len(self.removed) > 0
+
+
+class ParquetManifest:
+    """
+    Manifest of the Parquet files imported into a SQLite database.
+
+    The manifest is kept as a table in the database itself and records
+    size, modification time and content hash of each source file so that
+    only added or changed files need to be imported again.
+    """
+
+    def __init__(
+        self, db: SQLDB, table_name: str = "parquet_manifest", debug: bool = False
+    ):
+        """
+        constructor
+
+        Args:
+            db (SQLDB): the database the manifest is stored in
+            table_name (str): the name of the manifest table
+            debug (bool): If True, enables debug output.
+        """
+        self.db = db
+        self.table_name = table_name
+        self.debug = debug
+        self.db.c.execute(f"""CREATE TABLE IF NOT EXISTS {self.table_name}(
+  source TEXT PRIMARY KEY,
+  table_name TEXT,
+  size INTEGER,
+  mtime FLOAT,
+  sha256 TEXT
+)""")
+        self.db.c.commit()
+
+    @classmethod
+    def get_hash(cls, file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """
+        get the sha256 hash of the content of the given file
+
+        Args:
+            file_path (str): the file to hash
+            chunk_size (int): the number of bytes to read at a time
+
+        Returns:
+            str: the hex digest
+        """
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def get_entries(self) -> Dict[str, ManifestEntry]:
+        """
+        get the manifest entries
+
+        Returns:
+            Dict[str, ManifestEntry]: the entries by source file name
+        """
+        entries = {}
+        for record in self.db.query(f"SELECT * FROM {self.table_name}"):
+            entry = ManifestEntry(**record)
+            entries[entry.source] = entry
+        return entries
+
+    def get_changes(self, directory: str, parquet_files: List[str]) -> ManifestChanges:
+        """
+        compare the given Parquet files with the manifest
+
+        The content hash is only computed if size or modification time differ
+        from the manifest entry.
+
+        Args:
+            directory (str): the directory of the Parquet files
+            parquet_files (List[str]): the names of the current Parquet files
+
+        Returns:
+            ManifestChanges: the added, changed, unchanged and removed files
+        """
+        changes = ManifestChanges()
+        entries = self.get_entries()
+        for parquet_file in parquet_files:
+            file_path = os.path.join(directory, parquet_file)
+            stat = os.stat(file_path)
+            old_entry = entries.pop(parquet_file, None)
+            if (
+                old_entry
+                and old_entry.size == stat.st_size
+                and old_entry.mtime == stat.st_mtime
+            ):
+                changes.unchanged.append(old_entry)
+                continue
+            entry = ManifestEntry(
+                source=parquet_file,
+                table_name=os.path.splitext(parquet_file)[0],
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                sha256=self.get_hash(file_path),
+            )
+            if old_entry is None:
+                changes.added.append(entry)
+            elif old_entry.sha256 == entry.sha256:
+                # touched but same content
+                changes.unchanged.append(entry)
+            else:
+                changes.changed.append(entry)
+        changes.removed = list(entries.values())
+        return changes
+
+    def store(self, entries: List[ManifestEntry]) -> None:
+        """
+        store the given entries - does not commit
+
+        Args:
+            entries (List[ManifestEntry]): the entries to store
+        """
+        self.db.c.executemany(
+            f"INSERT OR REPLACE INTO {self.table_name} VALUES (?,?,?,?,?)",
+            [
+                (entry.source, entry.table_name, entry.size, entry.mtime, entry.sha256)
+                for entry in entries
+            ],
+        )
+
+    def remove(self, entries: List[ManifestEntry]) -> None:
+        """
+        remove the given entries - does not commit
+
+        Args:
+            entries (List[ManifestEntry]): the entries to remove
+        """
+        self.db.c.executemany(
+            f"DELETE FROM {self.table_name} WHERE source=?",
+            [(entry.source,) for entry in entries],
+        )
@@ -0,0 +1,254 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    """
+    a cached query result
+    """
+
+    lod: List[Dict[str, Any]]
+    created: float
+    size: int  # estimated size in bytes
+    version: Any  # the version of the data source the result is based on
+
+
+class QueryResultCache:
+    """
+    LRU cache of query results keyed by language, query name and parameters
+
+    Entries expire after the time to live of their language and are
+    invalidated when the version of the data source of their language changes
+    e.g. when the sql database file has been modified.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttls: Dict[str, Optional[float]] = None,
+    ):
+        """
+        constructor
+
+        Args:
+            max_entries (int): the maximum number of entries
+            max_bytes (int): the maximum estimated size of all entries
+            ttls (Dict[str, Optional[float]]): time to live in seconds per language -
+                None for no expiry - languages not given are not cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if ttls is None:
+            ttls = {
+                "sql": None,
+                "fts": None,
+                "arrow": 600.0,
+                "sparql": 3600.0,
+                "ask": 600.0,
+            }
+        self.ttls = ttls
+        self.versions: Dict[str, Callable[[], Any]] = {}
+        self.entries: OrderedDict = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @classmethod
+    def file_version(cls, *paths: str) -> Tuple:
+        """
+        get the modification time and size of the given files as version
+
+        Args:
+            paths (str): the files e.g. a SQLite database and its write ahead log
+
+        Returns:
+            Tuple: the version - changes whenever one of the files changes
+        """
+        version = []
+        for path in paths:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            else:
+                version.append(None)
+        return tuple(version)
+
+    def set_version(self, lang: str, version_func: Callable[[], Any]) -> None:
+        """
+        set the function to get the current version of the data source of the given language
+        """
+        self.versions[lang] = version_func
+
+    def get_version(self, lang: str) -> Any:
+        """
+        get the current version of the data source of the given language
+        """
+        version_func = self.versions.get(lang)
+        return version_func() if version_func else None
+
+    @classmethod
+    def get_key(cls, lang: str, name: str, params: Dict[str, Any] = None) -> Tuple:
+        """
+        get the cache key for the given query
+        """
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        return (lang, name, params_json)
+
+    @classmethod
+    def get_size(cls, lod: List[Dict[str, Any]]) -> int:
+        """
+        estimate the memory size of the given result
+        """
+        size = len(json.dumps(lod, default=str))
+        return size
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def get(
+        self, lang: str, name: str, params: Dict[str, Any] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        get the cached result of the given query
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: a copy of the result - None if not cached
+        """
+        key = self.get_key(lang, name, params)
+        version = self.get_version(lang)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                ttl = self.ttls.get(lang)
+                if ttl is not None and time.time() - entry.created > ttl:
+                    self._remove(key)
+                    self.stats["expirations"] += 1
+                    entry = None
+                elif entry.version != version:
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+                    entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+        # callers may modify the records e.g. for formatting
+        return [dict(record) for record in entry.lod]
+
+    def put(
+        self,
+        lang: str,
+        name: str,
+        params: Dict[str, Any],
+        lod: List[Dict[str, Any]],
+        version: Any = None,
+    ) -> bool:
+        """
+        cache the given result of the given query
+
+        Args:
+            lang (str): the query language
+            name (str): the query name
+            params (Dict[str, Any]): the resolved parameters
+            lod (List[Dict[str, Any]]): the result
+            version (Any): the version of the data source before the query ran
+
+        Returns:
+            bool: True if the result has been cached
+        """
+        if lang not in self.ttls or not lod:
+            return False
+        size = self.get_size(lod)
+        if size > self.max_bytes:
+            return False
+        key = self.get_key(lang, name, params)
+        entry = CacheEntry(
+            lod=[dict(record) for record in lod],
+            created=time.time(),
+            size=size,
+            version=version,
+        )
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.total_bytes += size
+            while (
+                len(self.entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.stats["evictions"] += 1
+        return True
+
+    def get_or_query(
+        self,
+        lang: str,
+        name: str,
+        params: Dict[str, Any],
+        query_func: Callable[[], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """
+        get the cached result of the given query or run the query and cache its result
+
+        Args:
+            lang (str): the query language
+            name (str): the query name
+            params (Dict[str, Any]): the resolved parameters
+            query_func (Callable[[], List[Dict[str, Any]]]): the function to run the query
+
+        Returns:
+            List[Dict[str, Any]]: the result
+        """
+        if lang not in self.ttls:
+            return query_func()
+        lod = self.get(lang, name, params)
+        if lod is None:
+            # the version is taken before the query so that a concurrent change invalidates
+            version = self.get_version(lang)
+            lod = query_func()
+            self.put(lang, name, params, lod, version)
+        return lod
+
+    def clear(self, lang: str = None) -> None:
+        """
+        remove all entries or the entries of the given language
+        """
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if lang is None or key[0] == lang:
+                    self._remove(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        get the hit/miss statistics and the current size
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,359 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import yaml
+from lodstorage.params import Param, Params
+from lodstorage.query import Query
+
+
+class CompiledParams(Params):
+    """
+    Params with the query template split into literal text and
+    parameter references once so that applying parameters
+    does not need to parse the template again
+
+    The instances of a QueryCatalog are shared by all threads of the process:
+    applying parameters renders from a local dict and never changes the instance -
+    callers that edit params_dict need a copy as the QueryView does
+    """
+
+    def __init__(self, query: str, **kwargs):
+        """
+        constructor
+
+        Args:
+            query (str): the query template
+            kwargs: see Params
+        """
+        super().__init__(query, **kwargs)
+        # alternating literal text and (name, placeholder) tuples
+        self.parts: List = []
+        pos = 0
+        for match in self.pattern.finditer(query):
+            self.parts.append(query[pos : match.start()])
+            self.parts.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.parts.append(query[pos:])
+        self.bound_sql = None
+
+    def render(self, params_dict: Dict) -> str:
+        """
+        render the template with the given parameters - placeholders
+        of parameters not given are kept
+
+        Args:
+            params_dict (Dict): the parameter values
+
+        Returns:
+            str: the query
+        """
+        texts = []
+        for part in self.parts:
+            if isinstance(part, tuple):
+                name, placeholder = part
+                texts.append(
+                    str(params_dict[name]) if name in params_dict else placeholder
+                )
+            else:
+                texts.append(part)
+        return "".join(texts)
+
+    def audit(self, params_dict: Dict = None) -> None:
+        """
+        Audit the given parameter values.
+
+        Args:
+            params_dict (Dict): the parameter values - default: my params_dict
+
+        Raises:
+            ValueError: If potentially malicious values are detected.
+        """
+        if params_dict is None:
+            params_dict = self.params_dict
+        for param, value in params_dict.items():
+            if isinstance(value, str):
+                for char in self.illegal_chars:
+                    if char in value:
+                        raise ValueError(
+                            f"Potentially malicious value detected for parameter '{param}'"
+                        )
+
+    def apply_parameters(self) -> str:
+        """
+        Replace the parameter references in the query with the parameter values.
+
+        Returns:
+            str: the query with the parameters applied
+        """
+        if self.with_audit:
+            self.audit()
+        return self.render(self.params_dict)
+
+    def apply_parameters_with_check(
+        self, param_dict: Dict = None, param_list: List[Param] = None
+    ) -> str:
+        """
+        Apply the given parameters with the defaults of the given parameter
+        declarations as Params.apply_parameters_with_check does but without
+        setting my params_dict.
+
+        Args:
+            param_dict (Dict): the parameter values
+            param_list (List[Param]): the parameter declarations with default values
+
+        Returns:
+            str: the query with the parameters applied
+
+        Raises:
+            Exception: if parameters are required but none are given
+            ValueError: if potentially malicious values are detected
+        """
+        if not self.has_params:
+            return self.query
+        merged = {
+            param.name: param.default_value
+            for param in param_list or []
+            if param.default_value is not None
+        }
+        merged.update(param_dict or {})
+        if not merged:
+            param_names = list(dict.fromkeys(self.params))
+            displayed_params = ", ".join(param_names[:3])
+            if len(param_names) > 3:
+                displayed_params += ", ..."
+            plural_suffix = "s" if len(param_names) > 1 else ""
+            raise Exception(
+                f"Query needs {len(param_names)} parameter{plural_suffix}: {displayed_params}"
+            )
+        if self.with_audit:
+            self.audit(merged)
+        return self.render(merged)
+
+    def get_bound_sql(self) -> str:
+        """
+        get the SQL template with named placeholders e.g. :limit instead of
+        the parameter references so that the parameter values can be bound
+        and the prepared statement be reused for all values
+
+        A reference within a string literal such as '%{{name}}%' becomes a
+        concatenation '%' || :name || '%' of the literal parts and the value.
+
+        Returns:
+            str: the SQL with named placeholders
+        """
+        if self.bound_sql is None:
+            texts = []
+            quote = None
+            in_comment = False
+            for part in self.parts:
+                if isinstance(part, tuple):
+                    name, placeholder = part
+                    if in_comment:
+                        texts.append(placeholder)
+                    elif quote:
+                        texts.append(f"{quote} || :{name} || {quote}")
+                    else:
+                        texts.append(f":{name}")
+                    continue
+                for i, char in enumerate(part):
+                    if in_comment:
+                        in_comment = char != "\n"
+                    elif quote:
+                        # a doubled quote toggles out of and back into the literal
+                        if char == quote:
+                            quote = None
+                    elif char in "'\"":
+                        quote = char
+                    elif char == "-" and part[i + 1 : i + 2] == "-":
+                        in_comment = True
+                texts.append(part)
+            self.bound_sql = "".join(texts)
+        return self.bound_sql
+
+    def get_bind_values(
+        self, params_dict: Dict, param_list: List[Param] = None
+    ) -> Dict[str, Any]:
+        """
+        get the values to bind to the named placeholders of get_bound_sql
+
+        Args:
+            params_dict (Dict): the parameter values
+            param_list (List[Param]): the parameter declarations of the query
+                to convert the values to the declared types
+
+        Returns:
+            Dict[str, Any]: the values by parameter name
+        """
+        types = {param.name: param.type for param in param_list or []}
+        values = {}
+        for name in self.params:
+            value = params_dict.get(name)
+            if types.get(name) == "int" and isinstance(value, str):
+                value = int(value)
+            values[name] = value
+        return values
+
+
+class QueryCatalog:
+    """
+    process wide catalog of the queries of a yaml file in all languages
+
+    The yaml file is parsed once and reloaded only when its modification time
+    changes - the queries are indexed by name and have precompiled parameter templates.
+    """
+
+    catalogs: Dict[str, "QueryCatalog"] = {}
+    catalogs_lock = threading.Lock()
+    # the keys of a yaml query dict that hold a query text
+    languages = ["sql", "sparql", "ask", "fts", "arrow"]
+
+    def __init__(self, yaml_path: str, debug: bool = False):
+        """
+        constructor
+
+        Args:
+            yaml_path (str): the path of the queries yaml file
+            debug (bool): If True, enables debug output.
+        """
+        self.yaml_path = yaml_path
+        self.debug = debug
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.queries_by_name: Dict[str, Dict[str, Query]] = {}
+        self.load_count = 0
+        self.check_reload()
+
+    @classmethod
+    def get_instance(cls, yaml_path: str, debug: bool = False) -> "QueryCatalog":
+        """
+        get the shared catalog for the given yaml file
+
+        Args:
+            yaml_path (str): the path of the queries yaml file
+            debug (bool): If True, enables debug output.
+
+        Returns:
+            QueryCatalog: the catalog
+        """
+        key = os.path.abspath(yaml_path)
+        with cls.catalogs_lock:
+            catalog = cls.catalogs.get(key)
+            if catalog is None:
+                catalog = cls(key, debug=debug)
+                cls.catalogs[key] = catalog
+        return catalog
+
+    def check_reload(self) -> bool:
+        """
+        reload the yaml file if it has been modified
+
+        Returns:
+            bool: True if the file has been (re)loaded
+        """
+        mtime = os.stat(self.yaml_path).st_mtime_ns
+        if mtime == self.mtime:
+            return False
+        with self.lock:
+            if mtime == self.mtime:
+                return False
+            self.queries_by_name = self.load()
+            self.mtime = mtime
+            self.load_count += 1
+        return True
+
+    def to_query(self, name: str, lang: str, query_dict: dict) -> Query:
+        """
+        create the query of the given language from the given yaml dict
+        """
+        query_dict = dict(query_dict)
+        query_dict["name"] = name
+        query_dict["lang"] = lang
+        if "query" not in query_dict:
+            query_dict["query"] = query_dict[lang]
+        query = Query.from_dict(query_dict)
+        query.debug = self.debug
+        query.params = CompiledParams(query.query)
+        return query
+
+    def load(self) -> Dict[str, Dict[str, Query]]:
+        """
+        parse the yaml file
+
+        Returns:
+            Dict[str, Dict[str, Query]]: the queries by name and language
+        """
+        with open(self.yaml_path, "r") as yaml_file:
+            query_dicts = yaml.safe_load(yaml_file) or {}
+        queries_by_name = {}
+        for name, query_dict in query_dicts.items():
+            queries_by_name[name] = {
+                lang: self.to_query(name, lang, query_dict)
+                for lang in self.get_languages(query_dict)
+            }
+        return queries_by_name
+
+    @classmethod
+    def get_languages(cls, query_dict: dict) -> List[str]:
+        """
+        get the languages the given yaml query dict has a query text for
+        e.g. sql, sparql, ask or fts
+        """
+        languages = [
+            key
+            for key, value in query_dict.items()
+            if key in cls.languages and isinstance(value, str)
+        ]
+        return languages
+
+    def get_queries(self, lang: str) -> Dict[str, Query]:
+        """
+        get the queries of the given language
+
+        Returns:
+            Dict[str, Query]: the queries by name
+        """
+        self.check_reload()
+        queries = {
+            name: queries_by_lang[lang]
+            for name, queries_by_lang in self.queries_by_name.items()
+            if lang in queries_by_lang
+        }
+        return queries
+
+    def query4Name(self, name: str, languages: List[str]) -> Optional[Query]:
+        """
+        get the query with the given name in the first of the given languages it is available in
+
+        Args:
+            name (str): the name of the query
+            languages (List[str]): the languages in order of preference
+
+        Returns:
+            Optional[Query]: the query or None if there is none
+        """
+        self.check_reload()
+        queries_by_lang = self.queries_by_name.get(name, {})
+        for lang in languages:
+            if lang in queries_by_lang:
+                return queries_by_lang[lang]
+        return None
+
+    def get_query_names(self, languages: List[str]) -> List[str]:
+        """
+        get the names of the queries available in the given languages
+        grouped by language in the order of the languages
+        """
+        self.check_reload()
+        names = []
+        for lang in languages:
+            for name, queries_by_lang in self.queries_by_name.items():
+                if lang in queries_by_lang and name not in names:
+                    names.append(name)
+        return names
@@ -0,0 +1,81 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import re
+from typing import Optional
+
+
+class QueryPager:
+    """
+    rewrite SQL and SPARQL queries to fetch a single page of their results
+    """
+
+    # LIMIT and OFFSET clauses at the end of a SPARQL query
+    sparql_tail_pattern = re.compile(
+        r"((?:\s*\b(?:LIMIT|OFFSET)\s+\d+)+)\s*$", re.IGNORECASE
+    )
+
+    @classmethod
+    def can_paginate_sql(cls, sql: str) -> bool:
+        """
+        check whether the given SQL statement is a query that can be wrapped
+        """
+        statement = re.sub(r"^(\s*--[^\n]*\n)*", "", sql).lstrip().upper()
+        return statement.startswith("SELECT") or statement.startswith("WITH")
+
+    @classmethod
+    def paginate_sql(cls, sql: str, limit: int, offset: int) -> str:
+        """
+        get the SQL query for the given page of the results of the given query
+
+        Args:
+            sql (str): the query
+            limit (int): the page size
+            offset (int): the number of rows to skip
+
+        Returns:
+            str: the query for the page
+        """
+        if not cls.can_paginate_sql(sql):
+            return sql
+        sql = sql.strip().rstrip(";")
+        page_sql = f"SELECT * FROM (\n{sql}\n) LIMIT {int(limit)} OFFSET {int(offset)}"
+        return page_sql
+
+    @classmethod
+    def paginate_sparql(cls, query: str, limit: int, offset: int) -> Optional[str]:
+        """
+        get the SPARQL query for the given page of the results of the given query
+        honoring a LIMIT and OFFSET the query already has
+
+        Args:
+            query (str): the query
+            limit (int): the page size
+            offset (int): the number of rows to skip
+
+        Returns:
+            Optional[str]: the query for the page - None if the page is beyond the
+                limit of the query
+        """
+        query_limit = None
+        query_offset = 0
+        match = cls.sparql_tail_pattern.search(query)
+        if match:
+            tail = match.group(1)
+            for keyword, value in re.findall(r"(LIMIT|OFFSET)\s+(\d+)", tail, re.I):
+                if keyword.upper() == "LIMIT":
+                    query_limit = int(value)
+                else:
+                    query_offset = int(value)
+            query = query[: match.start()]
+        if query_limit is not None:
+            limit = min(limit, query_limit - offset)
+            if limit <= 0:
+                return None
+        page_query = (
+            f"{query.rstrip()}\nLIMIT {int(limit)}\nOFFSET {int(query_offset + offset)}"
+        )
+        return page_query
@@ -0,0 +1,80 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import re
+from typing import Any, Dict
+
+import yaml
+
+
+class QuerySpec:
+    """
+    yaml query specs of the fts and arrow query languages e.g.
+
+        filter: [[street, like, "%{{ straße }}%"]]
+        limit: '{{ limit }}'
+
+    The {{ name }} placeholders are resolved from the parameter values after the
+    yaml has been parsed so that user input can never change the structure of a spec.
+    """
+
+    placeholder_pattern = re.compile(r"{{\s*(\w+)\s*}}")
+
+    @classmethod
+    def get_value(cls, name: str, params: Dict[str, Any]) -> Any:
+        """
+        get the value of the parameter with the given name
+
+        Raises:
+            ValueError: if there is no value for the parameter
+        """
+        if name not in params:
+            raise ValueError(f"missing value for parameter {name}")
+        return params[name]
+
+    @classmethod
+    def resolve(cls, value: Any, params: Dict[str, Any]) -> Any:
+        """
+        resolve the placeholders in the given parsed spec value
+
+        Args:
+            value (Any): a value of the parsed spec - lists and dicts are resolved recursively
+            params (Dict[str, Any]): the parameter values by name
+
+        Returns:
+            Any: the value with the placeholders resolved - a string that is just
+                a placeholder is replaced by the parameter value as is, placeholders
+                within a string by the text of the parameter value
+        """
+        if isinstance(value, dict):
+            return {key: cls.resolve(item, params) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.resolve(item, params) for item in value]
+        if not isinstance(value, str):
+            return value
+        match = cls.placeholder_pattern.fullmatch(value.strip())
+        if match:
+            return cls.get_value(match.group(1), params)
+        resolved = cls.placeholder_pattern.sub(
+            lambda match: str(cls.get_value(match.group(1), params)), value
+        )
+        return resolved
+
+    @classmethod
+    def load(cls, spec: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        parse the given yaml spec and resolve its placeholders
+
+        Args:
+            spec (str): the yaml query spec
+            params (Dict[str, Any]): the parameter values by name
+
+        Returns:
+            Dict[str, Any]: the spec dict
+        """
+        spec_dict = yaml.safe_load(spec) or {}
+        spec_dict = cls.resolve(spec_dict, params or {})
+        return spec_dict
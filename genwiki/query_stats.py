@@ -0,0 +1,287 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class QueryStat:
+    """
+    the execution statistics of a query
+    """
+
+    lang: str
+    name: str
+    # upper bounds of the latency buckets in seconds
+    bounds: List[float]
+    count: int = 0
+    errors: int = 0
+    total_secs: float = 0.0
+    max_secs: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    # number of executions per latency bucket - the last bucket has no upper bound
+    histogram: List[int] = field(default_factory=list)
+    # number of executions and total seconds per parameter set
+    params: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.histogram:
+            self.histogram = [0] * (len(self.bounds) + 1)
+
+    def add(
+        self, secs: float, row_count: int, size: int, params_json: str, error: bool
+    ):
+        """
+        add an execution
+        """
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total_secs += secs
+        self.max_secs = max(self.max_secs, secs)
+        self.rows += row_count
+        self.bytes += size
+        self.histogram[bisect_left(self.bounds, secs)] += 1
+        param_stat = self.params.setdefault(params_json, {"count": 0, "secs": 0.0})
+        param_stat["count"] += 1
+        param_stat["secs"] += secs
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        estimate the given percentile of the latency from the histogram
+
+        Args:
+            fraction (float): the percentile as fraction e.g. 0.95
+
+        Returns:
+            Optional[float]: the upper bound of the bucket the percentile falls into -
+                the maximum latency for the last bucket - None if there are no executions
+        """
+        if self.count == 0:
+            return None
+        rank = fraction * self.count
+        total = 0
+        for i, bucket_count in enumerate(self.histogram):
+            total += bucket_count
+            if total >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max_secs
+        return self.max_secs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        get my statistics as a JSON compatible dict
+        """
+        record = {
+            "lang": self.lang,
+            "name": self.name,
+            "count": self.count,
+            "errors": self.errors,
+            "total_secs": round(self.total_secs, 6),
+            "mean_secs": round(self.total_secs / self.count, 6) if self.count else 0,
+            "p50_secs": self.percentile(0.5),
+            "p95_secs": self.percentile(0.95),
+            "max_secs": round(self.max_secs, 6),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "histogram": {
+                **{f"le_{bound}": n for bound, n in zip(self.bounds, self.histogram)},
+                "le_inf": self.histogram[-1],
+            },
+            "params": self.params,
+        }
+        return record
+
+
+class QueryStats:
+    """
+    collect wall time, row count and result size of the executed queries
+    per query name and parameter set with latency histograms
+
+    Queries slower than the threshold are kept in a slow query log which is
+    also written to a logger and optionally appended as JSON lines to a file.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = 1.0,
+        slow_log_path: str = None,
+        max_slow: int = 100,
+        max_param_sets: int = 50,
+        bounds: List[float] = None,
+    ):
+        """
+        constructor
+
+        Args:
+            slow_threshold (float): the seconds above which a query is logged as slow
+            slow_log_path (str): the optional JSON lines file for the slow queries
+            max_slow (int): the number of slow queries to keep in memory
+            max_param_sets (int): the number of parameter sets to keep statistics for per query
+            bounds (List[float]): the upper bounds of the latency buckets in seconds
+        """
+        self.slow_threshold = slow_threshold
+        self.slow_log_path = slow_log_path
+        self.max_param_sets = max_param_sets
+        if bounds is None:
+            bounds = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+        self.bounds = bounds
+        self.stats: Dict[str, QueryStat] = {}
+        self.slow_queries = deque(maxlen=max_slow)
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("genwiki.slow_queries")
+
+    @classmethod
+    def get_size(cls, lod: List[Dict[str, Any]]) -> int:
+        """
+        estimate the size of the given result in bytes
+        """
+        size = len(json.dumps(lod, default=str)) if lod else 0
+        return size
+
+    def record(
+        self,
+        lang: str,
+        name: str,
+        params: Dict[str, Any],
+        secs: float,
+        lod: List[Dict[str, Any]] = None,
+        error: Exception = None,
+        explain: Callable[[], List[Dict]] = None,
+    ) -> Dict[str, Any]:
+        """
+        record an execution of a query
+
+        Args:
+            lang (str): the query language - the backend
+            name (str): the query name
+            params (Dict[str, Any]): the parameter values
+            secs (float): the wall time in seconds
+            lod (List[Dict[str, Any]]): the result
+            error (Exception): the error of a failed execution
+            explain (Callable[[], List[Dict]]): function to get the query plan
+                which is called for slow queries only
+
+        Returns:
+            Dict[str, Any]: the record of the execution
+        """
+        row_count = len(lod) if lod else 0
+        size = self.get_size(lod)
+        params_json = json.dumps(params or {}, sort_keys=True, default=str)
+        execution = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "lang": lang,
+            "name": name,
+            "params": params or {},
+            "secs": round(secs, 6),
+            "rows": row_count,
+            "bytes": size,
+        }
+        if error is not None:
+            execution["error"] = str(error)
+        with self.lock:
+            key = f"{lang}:{name}"
+            stat = self.stats.get(key)
+            if stat is None:
+                stat = QueryStat(lang=lang, name=name, bounds=self.bounds)
+                self.stats[key] = stat
+            if (
+                params_json not in stat.params
+                and len(stat.params) >= self.max_param_sets
+            ):
+                params_json = "other"
+            stat.add(secs, row_count, size, params_json, error is not None)
+        if secs >= self.slow_threshold:
+            self.log_slow(execution, explain)
+        return execution
+
+    def log_slow(
+        self, execution: Dict[str, Any], explain: Callable[[], List[Dict]] = None
+    ):
+        """
+        add the given execution to the slow query log
+        """
+        if explain is not None:
+            try:
+                execution["plan"] = [record["detail"] for record in explain()]
+            except Exception as ex:
+                execution["plan"] = [f"EXPLAIN failed: {ex}"]
+        with self.lock:
+            self.slow_queries.append(execution)
+        self.logger.warning(
+            f"slow {execution['lang']} query {execution['name']} "
+            f"{execution['secs']:.3f}s {execution['rows']} rows params {execution['params']}"
+        )
+        if self.slow_log_path:
+            with open(self.slow_log_path, "a") as slow_log:
+                slow_log.write(json.dumps(execution, default=str) + "\n")
+
+    def timed(
+        self,
+        lang: str,
+        name: str,
+        params: Dict[str, Any],
+        query_func: Callable[[], List[Dict[str, Any]]],
+        explain: Callable[[], List[Dict]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        run the given query function and record its execution
+
+        Args:
+            lang (str): the query language
+            name (str): the query name
+            params (Dict[str, Any]): the parameter values
+            query_func (Callable[[], List[Dict[str, Any]]]): the function to run the query
+            explain (Callable[[], List[Dict]]): function to get the query plan of slow queries
+
+        Returns:
+            List[Dict[str, Any]]: the result
+        """
+        start = time.perf_counter()
+        try:
+            lod = query_func()
+        except Exception as ex:
+            self.record(lang, name, params, time.perf_counter() - start, error=ex)
+            raise
+        self.record(
+            lang, name, params, time.perf_counter() - start, lod, explain=explain
+        )
+        return lod
+
+    def get_query_stats(self) -> List[Dict[str, Any]]:
+        """
+        get the statistics of all queries sorted by total time descending
+        """
+        with self.lock:
+            records = [stat.to_dict() for stat in self.stats.values()]
+        records.sort(key=lambda record: record["total_secs"], reverse=True)
+        return records
+
+    def get_slow_queries(self) -> List[Dict[str, Any]]:
+        """
+        get the logged slow queries - the latest first
+        """
+        with self.lock:
+            slow_queries = list(reversed(self.slow_queries))
+        return slow_queries
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        get all statistics as a JSON compatible dict
+        """
+        stats = {
+            "slow_threshold": self.slow_threshold,
+            "queries": self.get_query_stats(),
+            "slow_queries": self.get_slow_queries(),
+        }
+        return stats
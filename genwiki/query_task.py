@@ -0,0 +1,313 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import http.client
+import json
+import socket
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Tuple
+from urllib.parse import urlencode, urlparse
+
+from lodstorage.params import Params
+from lodstorage.sparql import SPARQL
+from lodstorage.sql import SQLDB
+
+from genwiki.http_scheduler import HttpScheduler, RequestCancelledError
+from genwiki.metrics import MetricsRegistry
+from genwiki.sparql_adapter import SparqlAdapter
+from genwiki.sparql_cache import SparqlCache
+
+if TYPE_CHECKING:
+    # only needed for the type hints - the wiki client
+    from genwiki.wiki import Wiki
+
+
+class QueryCancelledError(Exception):
+    """
+    raised when a query has been cancelled
+    """
+
+
+class QueryTask:
+    """
+    A cooperatively cancellable query execution.
+
+    Cancelling a task really stops the work: a running SQLite statement is
+    interrupted via the progress handler and an in-flight SPARQL request is
+    aborted by shutting down its socket. An ask query stops before its
+    next request to the wiki - its in-flight request runs until it
+    completes or times out and its result is discarded.
+
+    The outcomes of all tasks are counted process-wide.
+    """
+
+    counts = Counter()
+    counts_lock = threading.Lock()
+
+    def __init__(self, name: str = None, timeout: float = None):
+        """
+        constructor
+
+        Args:
+            name (str): the name of the query
+            timeout (float): the timeout in seconds for network requests
+        """
+        self.name = name
+        self.timeout = timeout
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.http_connection = None
+
+    @classmethod
+    def count(cls, outcome: str) -> None:
+        """
+        count the given outcome e.g. completed, cancelled or failed
+        """
+        with cls.counts_lock:
+            cls.counts[outcome] += 1
+
+    @classmethod
+    def get_counts(cls) -> Dict[str, int]:
+        """
+        get the number of queries per outcome
+        """
+        with cls.counts_lock:
+            counts = {
+                outcome: cls.counts[outcome]
+                for outcome in ["completed", "cancelled", "failed"]
+            }
+        return counts
+
+    def cancel(self) -> None:
+        """
+        cancel the task - may be called from any thread
+        """
+        self.cancelled.set()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.interrupt()
+            if self.http_connection is not None and self.http_connection.sock:
+                try:
+                    self.http_connection.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def check(self) -> None:
+        """
+        check whether the task has been cancelled
+
+        Raises:
+            QueryCancelledError: if the task has been cancelled
+        """
+        if self.cancelled.is_set():
+            raise QueryCancelledError(f"query {self.name} cancelled")
+
+    def run(self, func, *args, **kwargs) -> Any:
+        """
+        run the given function and count the outcome
+
+        Returns:
+            Any: the result of the function
+        """
+        try:
+            self.check()
+            result = func(*args, **kwargs)
+            self.check()
+            self.count("completed")
+            return result
+        except QueryCancelledError:
+            self.count("cancelled")
+            raise
+        except Exception:
+            if self.cancelled.is_set():
+                self.count("cancelled")
+                raise QueryCancelledError(f"query {self.name} cancelled")
+            self.count("failed")
+            raise
+
+    @contextmanager
+    def sqlite(
+        self, db: SQLDB, progress_steps: int = 1000
+    ) -> Generator[SQLDB, None, None]:
+        """
+        make the statements executed on the given database within
+        this context interruptible by this task
+
+        Args:
+            db (SQLDB): the database
+            progress_steps (int): the number of virtual machine instructions
+                between two checks of the cancellation flag
+
+        Yields:
+            SQLDB: the database
+        """
+        self.check()
+        db.c.set_progress_handler(lambda: int(self.cancelled.is_set()), progress_steps)
+        with self.lock:
+            self.connection = db.c
+        try:
+            yield db
+        except sqlite3.OperationalError as ex:
+            if self.cancelled.is_set():
+                raise QueryCancelledError(f"query {self.name} cancelled") from ex
+            raise
+        finally:
+            with self.lock:
+                self.connection = None
+            db.c.set_progress_handler(None, 0)
+
+    def http_post(
+        self, url: str, data: Dict[str, str], headers: Dict[str, str]
+    ) -> bytes:
+        """
+        post the given form data rate limited and retried by the HttpScheduler
+        on connections that can be aborted by this task
+
+        Args:
+            url (str): the url to post to
+            data (Dict[str, str]): the form data
+            headers (Dict[str, str]): the request headers
+
+        Returns:
+            bytes: the response body
+
+        Raises:
+            QueryCancelledError: if the task has been cancelled
+            Exception: if the response status is not 200
+        """
+
+        def send():
+            response, content = self.http_post_once(url, data, headers)
+            retry_after = response.getheader("Retry-After")
+            return response.status, retry_after, (response, content)
+
+        try:
+            response, content = HttpScheduler.get_instance().call(
+                url, send, cancelled=self.cancelled
+            )
+        except RequestCancelledError as ex:
+            raise QueryCancelledError(f"query {self.name} cancelled") from ex
+        if response.status != 200:
+            raise Exception(
+                f"HTTP {response.status} {response.reason} for {url}: {content[:200]}"
+            )
+        return content
+
+    def http_post_once(
+        self, url: str, data: Dict[str, str], headers: Dict[str, str]
+    ) -> Tuple[http.client.HTTPResponse, bytes]:
+        """
+        post the given form data on a connection that can be aborted by this task
+
+        Args:
+            url (str): the url to post to
+            data (Dict[str, str]): the form data
+            headers (Dict[str, str]): the request headers
+
+        Returns:
+            Tuple[http.client.HTTPResponse, bytes]: the response and its body
+
+        Raises:
+            QueryCancelledError: if the task has been cancelled
+        """
+        self.check()
+        parsed = urlparse(url)
+        if parsed.scheme == "https":
+            connection_class = http.client.HTTPSConnection
+        else:
+            connection_class = http.client.HTTPConnection
+        connection = connection_class(parsed.netloc, timeout=self.timeout)
+        with self.lock:
+            self.http_connection = connection
+        try:
+            body = urlencode(data)
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+                **headers,
+            }
+            path = parsed.path or "/"
+            if parsed.query:
+                path += f"?{parsed.query}"
+            connection.request("POST", path, body=body, headers=headers)
+            # the cancellation check needs the socket which exists from now on
+            self.check()
+            response = connection.getresponse()
+            content = response.read()
+            return response, content
+        except (OSError, http.client.HTTPException) as ex:
+            if self.cancelled.is_set():
+                raise QueryCancelledError(f"query {self.name} cancelled") from ex
+            raise
+        finally:
+            with self.lock:
+                self.http_connection = None
+            connection.close()
+
+    def sparql_query(
+        self,
+        sparql: SPARQL,
+        query_string: str,
+        param_dict: dict = None,
+        cache: SparqlCache = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        run the given SPARQL query abortable by this task
+
+        Args:
+            sparql (SPARQL): the endpoint
+            query_string (str): the query
+            param_dict (dict): the parameters to apply to the query
+            cache (SparqlCache): the optional persistent response cache -
+                my name is used as the query name for its time to live
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+        """
+        query_string = Params(query_string).apply_parameters_with_check(param_dict)
+
+        adapter = SparqlAdapter(sparql)
+
+        def fetch() -> Dict:
+            headers = adapter.get_headers()
+            data = {"query": adapter.prepare_query(query_string)}
+            with MetricsRegistry.get_instance().timed_call("sparql", "query"):
+                return json.loads(self.http_post(adapter.url, data, headers))
+
+        if cache is None:
+            json_result = fetch()
+        else:
+            json_result = cache.get_or_fetch(
+                adapter.url, query_string, fetch, name=self.name
+            )
+        self.check()
+        lod = adapter.to_lod(json_result)
+        return lod
+
+    def ask_query(self, wiki: "Wiki", ask_query: str) -> List[Dict[str, Any]]:
+        """
+        run the given SMW ask query cancellable by this task
+
+        Args:
+            wiki (Wiki): the wiki to query
+            ask_query (str): the ask query
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+
+        Raises:
+            QueryCancelledError: if the task has been cancelled
+        """
+        self.check()
+        try:
+            qlod = wiki.query_as_list_of_dicts(ask_query, cancelled=self.cancelled)
+        except RequestCancelledError as ex:
+            raise QueryCancelledError(f"query {self.name} cancelled") from ex
+        self.check()
+        return qlod
@@ -4,6 +4,11 @@ Created on 26.08.2024
 @author: wf
 """
 
+import copy
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable
+
 from lodstorage.sparql import SPARQL
 from lodstorage.sql import SQLDB
 from ngwidgets.lod_grid import ListOfDictsGrid
@@ -11,27 +16,72 @@ from ngwidgets.widgets import Link
 from nicegui import background_tasks, run, ui
 from nicegui.events import ValueChangeEventArguments
 
+from genwiki.address_fts import AddressFullTextIndex
+from genwiki.address_index import AddressIndexer
+from genwiki.db_build import BackgroundBuild
 from genwiki.multilang_querymanager import MultiLanguageQueryManager
 from genwiki.params_view import ParamsView
-from genwiki.wiki import Wiki
+from genwiki.query_catalog import CompiledParams
+from genwiki.query_pager import QueryPager
+from genwiki.query_task import QueryCancelledError, QueryTask
+from genwiki.sql_pool import SQLDBPool
 from genwiki.wikidata import Wikidata
 
+if TYPE_CHECKING:
+    # only needed for the type hints - pyarrow and the wiki client
+    # are imported by the code paths that use them
+    from genwiki.arrow_query import ArrowQuery
+    from genwiki.wiki import Wiki
+
 
 class QueryView:
     """
     simplified version of the snapquery version snapquery_view
     """
 
+    # the languages whose results are fetched page by page
+    paginated_langs = ["sql", "sparql"]
+    # render http values as links in the browser instead of rewriting the records
+    link_renderer = (
+        "(params) => params.value === null || params.value === undefined ? '' "
+        ": typeof params.value === 'string' && params.value.startsWith('http') "
+        f"? `<a href='${{params.value}}' style='{Link.blue}'>${{params.value}}</a>` "
+        ": Array.isArray(params.value) ? params.value.join(', ') "
+        ": typeof params.value === 'object' ? JSON.stringify(params.value) "
+        ": params.value"
+    )
+
     def __init__(
-        self, solution, mlqm: MultiLanguageQueryManager, sql_db: SQLDB, wiki: Wiki
+        self,
+        solution,
+        mlqm: MultiLanguageQueryManager,
+        sql_db: SQLDB,
+        wiki: "Wiki",
+        get_arrow_query: Callable[[], "ArrowQuery"] = None,
+        sql_pool: SQLDBPool = None,
+        bind_sql_params: bool = True,
+        db_build: BackgroundBuild = None,
     ):
         self.solution = solution
         self.mlqm = mlqm
         self.wiki = wiki
         self.sql_db = sql_db
+        # the arrow query is only created - and pyarrow imported -
+        # when an arrow query is run
+        self.get_arrow_query = get_arrow_query
+        # concurrent queries use the read only connections of the pool if available
+        self.sql_pool = sql_pool
+        # pass the parameters of sql queries as bound values to prepared statements
+        self.bind_sql_params = bind_sql_params
+        # the background build of the database of the sql and fts queries
+        self.db_build = db_build
         self.load_task = None
+        self.query_task = None
         self.timeout = 5.0
         self.params_view = None
+        self.page = 1
+        self.page_size = 100
+        self.has_next_page = False
 
     def setup_ui(self):
         """
@@ -52,16 +102,43 @@ class QueryView:
                 icon="play_circle",
                 on_click=self.run_query,
             ).tooltip("ausführen")
+            self.duration_html = ui.html()
+            self.cache_label = ui.label()
+            self.update_cache_label()
+            ui.link("Statistik", "/stats").tooltip("Ausführungsstatistik der Abfragen")
         with ui.row() as self.params_row:
             pass
+        with ui.row() as self.pagination_row:
+            self.prev_button = ui.button(
+                icon="chevron_left", on_click=self.on_prev_page
+            ).tooltip("vorherige Seite")
+            self.page_label = ui.label()
+            self.next_button = ui.button(
+                icon="chevron_right", on_click=self.on_next_page
+            ).tooltip("nächste Seite")
+        self.pagination_row.set_visibility(False)
         self.grid_row = ui.row()
         pass
 
+    def update_cache_label(self):
+        """
+        show the hit/miss statistics of the result cache
+        """
+        cache = self.mlqm.cache
+        if cache is None:
+            self.cache_label.set_visibility(False)
+            return
+        stats = cache.get_stats()
+        self.cache_label.set_text(
+            f"Cache: {stats['hits']} Treffer, {stats['misses']} Fehlgriffe, {stats['entries']} Einträge"
+        )
+
     async def on_update_query(self, _vcae: ValueChangeEventArguments):
         """
         react on a changed query
         """
-        self.query = self.mlqm.query4Name(self.query_name)
+        # the queries are shared process wide - parameters are set on a copy
+        self.query = copy.deepcopy(self.mlqm.query4Name(self.query_name))
         if self.params_view:
             self.params_view.delete()
         if self.query.params.has_params:
@@ -72,73 +149,307 @@ class QueryView:
             self.params_view.setup()
             self.params_view.open()
         self.params_row.update()
+        self.page = 1
+        self.update_pagination(has_next_page=False)
 
-    def get_query_lod(self):
+    @contextmanager
+    def sql_reader(self, task: QueryTask):
+        """
+        get a database connection interruptible by the given task
         """
-        run the query
+        if self.sql_pool:
+            with self.sql_pool.reader() as db:
+                with task.sqlite(db):
+                    yield db
+        else:
+            with task.sqlite(self.sql_db):
+                yield self.sql_db
+
+    def get_query_lod(self, task: QueryTask):
+        """
+        get the result of the query from the cache or run it
+
+        Args:
+            task(QueryTask): the task to cancel the query with
         """
         query = self.query
+        params = query.params.params_dict if query.params.has_params else {}
+        if self.is_paginated():
+            params = {**params, "page": self.page, "page_size": self.page_size}
+
+        def execute():
+            stats = self.mlqm.stats
+            if stats is None:
+                return self.execute_query(task)
+            explain = (
+                (lambda: self.explain_query(task)) if query.lang == "sql" else None
+            )
+            return stats.timed(
+                query.lang,
+                query.name,
+                params,
+                lambda: self.execute_query(task),
+                explain=explain,
+            )
+
+        cache = self.mlqm.cache
+        if cache is None:
+            return execute()
+        # cache hits are not counted as executions
+        qlod = cache.get_or_query(query.lang, query.name, params, execute)
+        return qlod
+
+    def is_paginated(self) -> bool:
+        """
+        check whether the results of the current query are fetched page by page
+        """
+        return self.query.lang in self.paginated_langs
+
+    def get_page_sql(self):
+        """
+        get the SQL of the current page of the current sql query and its bind values
+        """
+        sql, bind_values = self.get_sql(self.query)
+        offset = (self.page - 1) * self.page_size
+        sql = QueryPager.paginate_sql(sql, self.page_size, offset)
+        return sql, bind_values
+
+    def explain_query(self, task: QueryTask):
+        """
+        get the query plan of the current page of the current sql query
+        """
+        sql, bind_values = self.get_page_sql()
+        with self.sql_reader(task) as db:
+            plan = AddressIndexer(db).explain(sql, bind_values)
+        return plan
+
+    def execute_query(self, task: QueryTask):
+        """
+        run the query - for the paginated languages only the current page is fetched
+
+        Args:
+            task(QueryTask): the task to cancel the query with
+        """
+        query = self.query
+        offset = (self.page - 1) * self.page_size
         if query.lang == "sql":
-            qlod = self.sql_db.query(query.query)
+            sql, bind_values = self.get_page_sql()
+            with self.sql_reader(task) as db:
+                qlod = db.query(sql, bind_values)
         elif query.lang == "sparql":
+            sparql_query = QueryPager.paginate_sparql(
+                query.query, self.page_size, offset
+            )
+            if sparql_query is None:
+                return []
             sparql = Wikidata.get_sparql()
-            qlod = sparql.queryAsListOfDicts(
-                query.query, param_dict=query.params.params_dict
+            # no persistent cache for the ad-hoc queries of the query view -
+            # the result cache keeps them for the short sparql time to live
+            qlod = task.sparql_query(
+                sparql,
+                sparql_query,
+                param_dict=query.params.params_dict,
             )
         elif query.lang == "ask":
-            qlod = self.wiki.query_as_list_of_dicts(query.query)
+            qlod = task.ask_query(self.wiki, query.query)
+        elif query.lang == "fts":
+            with self.sql_reader(task) as db:
+                qlod = AddressFullTextIndex(db).search_by_spec(
+                    query.query, query.params.params_dict
+                )
+        elif query.lang == "arrow" and self.get_arrow_query:
+            qlod = self.get_arrow_query().query_by_spec(
+                query.query, query.params.params_dict
+            )
         else:
             raise ValueError(f"query language {query.lang} not supported")
         return qlod
 
-    async def load_query_results(self):
+    def is_bound(self, query) -> bool:
+        """
+        check whether the parameters of the given query are passed as bound values
+        """
+        if query.lang in ["fts", "arrow"]:
+            # the fts and arrow specs are yaml - user input is never substituted into it
+            return query.params.has_params
+        bound = (
+            self.bind_sql_params
+            and query.lang == "sql"
+            and isinstance(query.params, CompiledParams)
+            and query.params.has_params
+        )
+        return bound
+
+    def get_sql(self, query):
+        """
+        get the SQL and the values to bind for the given sql query
+
+        Returns:
+            tuple: the SQL and the bind values - None if the parameters
+            have already been applied to the SQL text
+        """
+        if not self.is_bound(query):
+            return query.query, None
+        params = query.params
+        sql = params.get_bound_sql()
+        bind_values = params.get_bind_values(params.params_dict, query.param_list)
+        return sql, bind_values
+
+    async def load_query_results(self, task: QueryTask):
         """
         (re) load the query results
+
+        Args:
+            task(QueryTask): the task to cancel the query with
         """
         try:
             if self.query.params.has_params:
-                self.query.query = self.query.params.apply_parameters()
+                # bound values need no substitution into the query text
+                if not self.is_bound(self.query):
+                    self.query.query = self.query.params.apply_parameters()
                 self.params_view.close()
-            lod = await run.io_bound(self.get_query_lod)
+            start = time.perf_counter()
+            lod = await run.io_bound(task.run, self.get_query_lod, task)
+            duration = time.perf_counter() - start
+            self.update_cache_label()
             if not lod:
                 with self.solution.container:
-                    ui.notify("query execution failure")
+                    if self.page > 1:
+                        ui.notify("keine weiteren Ergebnisse")
+                        self.page -= 1
+                    else:
+                        ui.notify("query execution failure")
+                self.grid_row.clear()
+                self.update_pagination(has_next_page=False)
                 return
             self.grid_row.clear()
-            with self.query_row:
-                record_count = len(lod) if lod is not None else 0
-                # markup = f'<span style="color: green;">{record_count} records in {stats.duration:.2f} secs</span>'
+            record_count = len(lod) if lod is not None else 0
+            markup = f'<span style="color: green;">{record_count} records in {duration:.2f} secs</span>'
+            self.duration_html.set_content(markup)
             # tablefmt = "html"
             # self.query.preFormatWithCallBacks(lod, tablefmt=tablefmt)
             # self.query.formatWithValueFormatters(lod, tablefmt=tablefmt)
-            for record in lod:
-                for key, value in record.items():
-                    if isinstance(value, str):
-                        if value.startswith("http"):
-                            record[key] = Link.create(value, value)
             with self.grid_row:
                 self.lod_grid = ListOfDictsGrid()
-                self.lod_grid.load_lod(lod)
+                self.lod_grid.load_lod(lod, self.get_column_defs(lod))
             self.grid_row.update()
+            self.update_pagination(has_next_page=record_count == self.page_size)
+        except QueryCancelledError:
+            with self.solution.container:
+                ui.notify(f"query {self.query.name} cancelled")
         except Exception as ex:
             self.solution.handle_exception(ex)
 
+    def get_column_defs(self, lod: list) -> list:
+        """
+        get the column definitions for the given records with the link renderer
+        """
+        column_defs = []
+        for key, value in lod[0].items():
+            if isinstance(value, (int, float)):
+                col_filter = "agNumberColumnFilter"
+            else:
+                col_filter = True
+            column_defs.append(
+                {
+                    "field": key,
+                    "filter": col_filter,
+                    ":cellRenderer": self.link_renderer,
+                }
+            )
+        return column_defs
+
+    def update_pagination(self, has_next_page: bool):
+        """
+        update the pagination controls
+        """
+        self.has_next_page = has_next_page
+        paginated = self.is_paginated()
+        self.pagination_row.set_visibility(
+            paginated and (self.page > 1 or has_next_page)
+        )
+        self.page_label.set_text(f"Seite {self.page}")
+        self.prev_button.set_enabled(self.page > 1)
+        self.next_button.set_enabled(has_next_page)
+
+    async def on_prev_page(self, _args):
+        """
+        show the previous page
+        """
+        if self.page > 1:
+            self.page -= 1
+            self.start_loading()
+
+    async def on_next_page(self, _args):
+        """
+        show the next page
+        """
+        if self.has_next_page:
+            self.page += 1
+            self.start_loading()
+
     async def run_query(self, _args):
         """
-        run the current query
+        run the current query starting with the first page
+        """
+        self.page = 1
+        self.start_loading()
+
+    def needs_db(self) -> bool:
+        """
+        check whether the current query needs the database which is still being built
+        """
+        needs = (
+            self.query.lang in ["sql", "fts"]
+            and self.db_build is not None
+            and not self.db_build.is_ready()
+        )
+        return needs
+
+    def show_db_state(self):
+        """
+        show the state of the database build instead of the results
+        """
+        self.grid_row.clear()
+        with self.grid_row:
+            if self.db_build.get_state() == "failed":
+                ui.label(
+                    f"Die Adressdatenbank ist nicht verfügbar: {self.db_build.error}"
+                )
+            else:
+                ui.spinner()
+                ui.label(
+                    "Die Adressdatenbank wird noch geladen - bitte später erneut ausführen"
+                )
+        self.grid_row.update()
+        self.update_pagination(has_next_page=False)
+
+    def start_loading(self):
+        """
+        load the current page of the query results in the background
         """
+        if self.needs_db():
+            self.show_db_state()
+            return
 
-        def cancel_running():
-            if self.load_task:
-                self.load_task.cancel()
+        def cancel(query_task, load_task):
+            # stop the work in the worker thread as well
+            if query_task:
+                query_task.cancel()
+            if load_task:
+                load_task.cancel()
 
         self.grid_row.clear()
         with self.grid_row:
             ui.spinner()
         self.grid_row.update()
         # cancel task still running
-        cancel_running()
-        # cancel task if it takes too long
-        ui.timer(self.timeout, lambda: cancel_running(), once=True)
+        cancel(self.query_task, self.load_task)
         # run task in background
-        self.load_task = background_tasks.create(self.load_query_results())
+        self.query_task = QueryTask(self.query.name, timeout=self.timeout)
+        self.load_task = background_tasks.create(
+            self.load_query_results(self.query_task)
+        )
+        # cancel task if it takes too long - but not the tasks of later pages
+        query_task, load_task = self.query_task, self.load_task
+        ui.timer(self.timeout, lambda: cancel(query_task, load_task), once=True)
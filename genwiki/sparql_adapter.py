@@ -0,0 +1,79 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from typing import Any, Dict, List
+
+from lodstorage.sparql import SPARQL
+from SPARQLWrapper.SmartWrapper import Value
+
+
+class SparqlAdapter:
+    """
+    the parts of lodstorage's SPARQL and SPARQLWrapper that are needed to
+    send a SPARQL query with our own HTTP client and convert its JSON result
+
+    These are not part of the public API of lodstorage - all accesses are kept
+    here so that tests/test_sparql_adapter.py fails if they change
+    """
+
+    def __init__(self, sparql: SPARQL):
+        """
+        constructor
+
+        Args:
+            sparql (SPARQL): the endpoint
+        """
+        self.sparql = sparql
+
+    @property
+    def url(self) -> str:
+        """
+        the url of the endpoint
+        """
+        return self.sparql.url
+
+    @property
+    def agent(self) -> str:
+        """
+        the user agent configured for the endpoint
+        """
+        agent = self.sparql.sparql.agent
+        return agent
+
+    def get_headers(self) -> Dict[str, str]:
+        """
+        get the headers of a query request with a JSON result
+        """
+        headers = {
+            "Accept": "application/sparql-results+json",
+            "User-Agent": self.agent,
+        }
+        return headers
+
+    def prepare_query(self, query_string: str) -> str:
+        """
+        prepare the given query the way lodstorage sends it
+        """
+        query_string = self.sparql.fix_comments(query_string)
+        return query_string
+
+    def to_lod(self, json_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        convert the given SPARQL JSON result to a list of dicts with
+        python native values as SPARQL.queryAsListOfDicts does
+
+        Args:
+            json_result (Dict[str, Any]): the application/sparql-results+json result
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+        """
+        records = [
+            {key: Value(key, binding[key]) for key in binding}
+            for binding in json_result["results"]["bindings"]
+        ]
+        lod = self.sparql.asListOfDicts(records)
+        return lod
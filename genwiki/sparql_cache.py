@@ -0,0 +1,264 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class SparqlCacheMissError(Exception):
+    """
+    raised in offline mode for a query that is not in the cache
+    """
+
+
+class SparqlCache:
+    """
+    persistent on-disk cache of SPARQL JSON responses
+    in the spirit of the ~/.govapi cache of GOV_API
+
+    The responses are keyed by a hash of the endpoint and the normalized query text
+    and expire after the time to live of their query name. The least recently used
+    responses are evicted when the cache exceeds its size. In offline mode only
+    cached responses are returned - expired ones included - and no request is made.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        default_ttl: Optional[float] = 7 * 24 * 3600.0,
+        ttls: Dict[str, Optional[float]] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        offline: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            cache_dir (str): the directory of the cache - default: ~/.genwiki/sparql
+            default_ttl (Optional[float]): time to live in seconds - None for no expiry
+            ttls (Dict[str, Optional[float]]): time to live in seconds per query name
+            max_bytes (int): the maximum size of all cached responses
+            offline (bool): if True never query the endpoint
+        """
+        if cache_dir is None:
+            cache_dir = os.path.expanduser("~/.genwiki/sparql")
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stale_hits": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+        self.total_bytes = sum(
+            os.path.getsize(path) for path, _mtime in self.get_cache_files()
+        )
+
+    # string literals and IRIs are kept as is - whitespace runs and
+    # comments outside of them are replaced by a single blank
+    token_pattern = re.compile(
+        "|".join(
+            [
+                r'(?P<literal>"""[\s\S]*?"""',
+                r"'''[\s\S]*?'''",
+                r'"(?:[^"\\\n]|\\.)*"',
+                r"'(?:[^'\\\n]|\\.)*'",
+                r'<[^<>"{}|^`\\\s]*>)',
+                r"(?P<space>(?:\s|#[^\n]*)+)",
+            ]
+        )
+    )
+
+    @classmethod
+    def normalize(cls, query: str) -> str:
+        """
+        normalize the given query text so that formatting and comment
+        changes do not change the cache key
+
+        Args:
+            query (str): the SPARQL query
+
+        Returns:
+            str: the query without comments and with collapsed whitespace
+                outside of its string literals and IRIs
+        """
+        normalized = cls.token_pattern.sub(
+            lambda match: match.group("literal") or " ", query
+        ).strip()
+        return normalized
+
+    @classmethod
+    def get_key(cls, endpoint: str, query: str) -> str:
+        """
+        get the cache key for the given query of the given endpoint
+        """
+        text = f"{endpoint}\n{cls.normalize(query)}"
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return key
+
+    def get_path(self, key: str) -> str:
+        """
+        get the path of the cache file for the given key
+        """
+        path = os.path.join(self.cache_dir, key[:2], f"{key}.json")
+        return path
+
+    def get_cache_files(self):
+        """
+        get the paths and modification times of the cache files
+        """
+        files = []
+        for root, _dirs, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(".json"):
+                    path = os.path.join(root, filename)
+                    files.append((path, os.path.getmtime(path)))
+        return files
+
+    def get_ttl(self, name: str = None) -> Optional[float]:
+        """
+        get the time to live for the given query name
+        """
+        ttl = self.ttls.get(name, self.default_ttl) if name else self.default_ttl
+        return ttl
+
+    def get(self, endpoint: str, query: str, name: str = None) -> Optional[Dict]:
+        """
+        get the cached response of the given query
+
+        Args:
+            endpoint (str): the url of the endpoint
+            query (str): the SPARQL query
+            name (str): the name of the query for its time to live
+
+        Returns:
+            Optional[Dict]: the SPARQL JSON response - None if not cached or expired
+        """
+        path = self.get_path(self.get_key(endpoint, query))
+        try:
+            with open(path, "r") as json_file:
+                entry = json.load(json_file)
+        except (OSError, ValueError):
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+        ttl = self.get_ttl(name)
+        expired = ttl is not None and time.time() - entry["created"] > ttl
+        with self.lock:
+            if expired and not self.offline:
+                self.stats["expired"] += 1
+                return None
+            self.stats["stale_hits" if expired else "hits"] += 1
+        # the modification time tracks the last use for the eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["result"]
+
+    def put(self, endpoint: str, query: str, result: Dict, name: str = None) -> None:
+        """
+        cache the given response of the given query
+
+        Args:
+            endpoint (str): the url of the endpoint
+            query (str): the SPARQL query
+            result (Dict): the SPARQL JSON response
+            name (str): the name of the query
+        """
+        path = self.get_path(self.get_key(endpoint, query))
+        entry = {
+            "endpoint": endpoint,
+            "name": name,
+            "query": query,
+            "created": time.time(),
+            "result": result,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as json_file:
+            json.dump(entry, json_file)
+        size = os.path.getsize(tmp_path)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        # atomic so that concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.stats["writes"] += 1
+            self.total_bytes += size - old_size
+            evict = self.total_bytes > self.max_bytes
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        remove the least recently used responses until
+        the cache is below 90% of its maximum size
+        """
+        with self.lock:
+            files = sorted(self.get_cache_files(), key=lambda file: file[1])
+            for path, _mtime in files:
+                if self.total_bytes <= self.max_bytes * 0.9:
+                    break
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.total_bytes -= size
+                self.stats["evictions"] += 1
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        query: str,
+        fetch: Callable[[], Dict],
+        name: str = None,
+    ) -> Dict:
+        """
+        get the cached response of the given query or fetch and cache it
+
+        Args:
+            endpoint (str): the url of the endpoint
+            query (str): the SPARQL query
+            fetch (Callable[[], Dict]): the function to query the endpoint
+            name (str): the name of the query
+
+        Returns:
+            Dict: the SPARQL JSON response
+
+        Raises:
+            SparqlCacheMissError: in offline mode if the query is not cached
+        """
+        result = self.get(endpoint, query, name)
+        if result is None:
+            if self.offline:
+                raise SparqlCacheMissError(
+                    f"query {name or ''} not cached for offline use of {endpoint}"
+                )
+            result = fetch()
+            self.put(endpoint, query, result, name)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        get the hit/miss statistics and the current size
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["bytes"] = self.total_bytes
+        return stats
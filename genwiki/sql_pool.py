@@ -0,0 +1,175 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, List
+
+from lodstorage.sql import SQLDB
+
+
+class SQLDBPool:
+    """
+    A pool of read only connections to a SQLite database in WAL mode
+    and a single writer connection.
+
+    In WAL mode readers do not block each other nor the writer so that
+    concurrent queries of different clients do not serialize on one connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size: int = -64 * 1024,
+        temp_store: str = "MEMORY",
+        timeout: float = 5.0,
+        cached_statements: int = 256,
+        debug: bool = False,
+    ):
+        """
+        constructor
+
+        Args:
+            db_path (str): the path of the database file
+            size (int): the maximum number of read only connections
+            mmap_size (int): the number of bytes of the database to memory map
+            cache_size (int): the page cache size - negative values are in KiB
+            temp_store (str): where to keep temporary tables and indices
+            timeout (float): seconds to wait for a locked database or a free connection
+            cached_statements (int): the number of prepared statements each read only
+                connection keeps for reuse by the SQL text of queries with bound parameters
+            debug (bool): If True, enables debug output.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.temp_store = temp_store
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.debug = debug
+        self.writer = SQLDB(db_path, check_same_thread=False, timeout=timeout)
+        self.writer.c.execute("PRAGMA journal_mode=WAL")
+        # safe in WAL mode - a commit is durable after the next checkpoint
+        self.writer.c.execute("PRAGMA synchronous=NORMAL")
+        self.apply_pragmas(self.writer.c)
+        self.readers = queue.Queue()
+        self.reader_count = 0
+        # number of borrowers that had to wait for a free connection
+        self.wait_count = 0
+        self.lock = threading.Lock()
+
+    def get_pragmas(self) -> Dict[str, Any]:
+        """
+        get the tuning pragmas for the connections
+        """
+        pragmas = {
+            "mmap_size": self.mmap_size,
+            "cache_size": self.cache_size,
+            "temp_store": self.temp_store,
+        }
+        return pragmas
+
+    def apply_pragmas(self, connection: sqlite3.Connection) -> None:
+        """
+        apply the tuning pragmas to the given connection
+        """
+        for name, value in self.get_pragmas().items():
+            connection.execute(f"PRAGMA {name}={value}")
+
+    def open_reader(self) -> SQLDB:
+        """
+        open a new read only connection
+
+        Returns:
+            SQLDB: the database wrapping the connection
+        """
+        connection = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+        )
+        self.apply_pragmas(connection)
+        db = SQLDB(self.db_path, connection=connection, debug=self.debug)
+        return db
+
+    @contextmanager
+    def reader(self) -> Generator[SQLDB, None, None]:
+        """
+        borrow a read only connection - new connections are opened
+        on demand until the pool size is reached
+
+        Yields:
+            SQLDB: the database to query
+
+        Raises:
+            queue.Empty: if no connection got free within the timeout
+        """
+        try:
+            db = self.readers.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.reader_count < self.size
+                if can_open:
+                    self.reader_count += 1
+            if can_open:
+                try:
+                    db = self.open_reader()
+                except sqlite3.Error:
+                    with self.lock:
+                        self.reader_count -= 1
+                    raise
+            else:
+                with self.lock:
+                    self.wait_count += 1
+                db = self.readers.get(timeout=self.timeout)
+        try:
+            yield db
+        finally:
+            self.readers.put(db)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        get the usage of the read only connections
+        """
+        with self.lock:
+            stats = {
+                "size": self.size,
+                "open": self.reader_count,
+                "in_use": self.reader_count - self.readers.qsize(),
+                "waits": self.wait_count,
+            }
+        return stats
+
+    def query(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """
+        run the given query on a read only connection
+
+        Args:
+            sql (str): the SQL query
+            params (tuple): the query parameters if any
+
+        Returns:
+            List[Dict[str, Any]]: the result rows
+        """
+        with self.reader() as db:
+            lod = db.query(sql, params)
+        return lod
+
+    def close(self) -> None:
+        """
+        close all connections
+        """
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
+        self.writer.close()
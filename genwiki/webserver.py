@@ -5,25 +5,31 @@ Created on 2024-08-15
 """
 
 import os
+import threading
+from typing import List
 
-from lodstorage.sql import SQLDB
 from ngwidgets.input_webserver import InputWebserver, InputWebSolution
+from ngwidgets.lod_grid import ListOfDictsGrid
 from ngwidgets.login import Login
 from ngwidgets.profiler import Profiler
 from ngwidgets.users import Users
 from ngwidgets.webserver import WebserverConfig
 from ngwidgets.widgets import Link
-from nicegui import Client, ui
-from starlette.responses import RedirectResponse
-from wd.wditem_search import WikidataItemSearch
+from nicegui import Client, app, ui
+from starlette.responses import JSONResponse, PlainTextResponse, RedirectResponse
 
-from genwiki.convert import ParquetAdressbokToSql
+from genwiki.address_index import AddressIndexer
+from genwiki.db_build import BackgroundBuild
 from genwiki.genwiki_paths import GenWikiPaths
+from genwiki.metrics import Counter, Gauge, Metric, MetricsRegistry
 from genwiki.multilang_querymanager import MultiLanguageQueryManager
+from genwiki.query_cache import QueryResultCache
+from genwiki.query_stats import QueryStats
+from genwiki.query_task import QueryTask
 from genwiki.query_view import QueryView
-from genwiki.version import Version
-from genwiki.wiki import Wiki
-from genwiki.wikidata_view import WikidataItemView
+from genwiki.sql_pool import SQLDBPool
+from genwiki.webserver_config import GenWikiWebserverConfig
+from genwiki.wikidata import Wikidata
 
 
 class GenWikiWebServer(InputWebserver):
@@ -31,14 +37,7 @@ class GenWikiWebServer(InputWebserver):
 
     @classmethod
     def get_config(cls) -> WebserverConfig:
-        copy_right = "(c)2024 Wolfgang Fahl"
-        config = WebserverConfig(
-            copy_right=copy_right,
-            version=Version(),
-            default_port=9852,
-            short_name="genwiki2024",
-        )
-        server_config = WebserverConfig.get(config)
+        server_config = GenWikiWebserverConfig.get_config()
         server_config.solution_class = GenWikiSolution
         return server_config
 
@@ -52,32 +51,102 @@ class GenWikiWebServer(InputWebserver):
         users = Users(self.config.base_path)
         self.login = Login(self, users)
         address_db_path = os.path.join(self.config.storage_path, "address.db")
-        if os.path.isfile(address_db_path) and os.path.getsize(address_db_path) > 0:
-            self.sql_db = SQLDB(address_db_path, check_same_thread=False)
-        else:
-            profiler = Profiler("convert parquet files", profile=True)
-            pats = ParquetAdressbokToSql(folder=self.examples_path())
-            self.sql_db = SQLDB(address_db_path, check_same_thread=False)
-            pats.to_db(self.sql_db)
-            profiler.time()
-
+        # WAL mode: the queries of the clients run on a pool of read only
+        # connections while the ingest uses the single writer connection
+        self.sql_pool = SQLDBPool(address_db_path)
+        self.sql_db = self.sql_pool.writer
+        self.arrow_query_lock = threading.Lock()
+        self._arrow_query = None
+
+        # cached sql and fts results are invalidated when address.db changes
+        cache = QueryResultCache()
+        for lang in ["sql", "fts"]:
+            cache.set_version(
+                lang,
+                lambda: cache.file_version(address_db_path, f"{address_db_path}-wal"),
+            )
         yaml_path = os.path.join(self.examples_path(), "queries.yaml")
-        self.mlqm = MultiLanguageQueryManager(yaml_path=yaml_path)
+        # queries slower than a second are logged with their sql query plan
+        self.query_stats = QueryStats(
+            slow_log_path=os.path.join(self.config.storage_path, "slow_queries.jsonl")
+        )
+        self.mlqm = MultiLanguageQueryManager(
+            yaml_path=yaml_path, cache=cache, stats=self.query_stats
+        )
+        # the address db is built in the background - sql and fts queries
+        # are served with a loading state until the build is ready
+        self.address_db_build = BackgroundBuild("address.db", self.build_address_db)
+        self.address_db_build.start()
+
+        # other modules report to the same process wide registry
+        self.metrics = MetricsRegistry.get_instance()
+        self.metrics.add_collector(self.collect_metrics)
+        page_seconds = self.metrics.histogram(
+            "genwiki_page_render_seconds",
+            "time to render the pages",
+            ["path"],
+        )
 
         @ui.page("/")
         async def home(client: Client):
-            return await self.page(client, GenWikiSolution.home)
+            with page_seconds.time(path="/"):
+                return await self.page(client, GenWikiSolution.home)
 
         @ui.page("/wd/{qid}")
         async def wikidata_item(client: Client, qid: str):
             """
             show the wikidata item for the given Wikidata QID
             """
-            await self.page(client, GenWikiSolution.wikidata_item, qid)
+            with page_seconds.time(path="/wd/{qid}"):
+                await self.page(client, GenWikiSolution.wikidata_item, qid)
 
         @ui.page("/wd")
         async def wikidata(client: Client):
-            return await self.page(client, GenWikiSolution.wikidata)
+            with page_seconds.time(path="/wd"):
+                return await self.page(client, GenWikiSolution.wikidata)
+
+        @app.get("/health")
+        def health():
+            """
+            liveness - the server accepts connections
+            """
+            return {"status": "ok", "address_db": self.address_db_build.get_status()}
+
+        @app.get("/ready")
+        def ready():
+            """
+            readiness - the address db has been built
+            """
+            status = self.address_db_build.get_status()
+            status_code = 200 if self.address_db_build.is_ready() else 503
+            return JSONResponse(status, status_code=status_code)
+
+        @app.get("/metrics")
+        def metrics():
+            """
+            the metrics in the Prometheus text exposition format
+            """
+            return PlainTextResponse(
+                self.metrics.to_text(), media_type="text/plain; version=0.0.4"
+            )
+
+        @ui.page("/stats")
+        async def stats(client: Client):
+            # the query parameters may contain personal names
+            if not self.login.authenticated():
+                return RedirectResponse("/login")
+            return await self.page(client, GenWikiSolution.query_stats)
+
+        @app.get("/api/query_stats")
+        async def query_stats():
+            """
+            the execution statistics and the slow queries as JSON
+            for logged in users only - async to check the login in the
+            request context of the user storage
+            """
+            if not self.login.authenticated():
+                return JSONResponse({"error": "login required"}, status_code=401)
+            return self.query_stats.to_dict()
 
         @ui.page("/login")
         async def login(client: Client):
@@ -89,8 +158,125 @@ class GenWikiWebServer(InputWebserver):
                 await self.login.logout()
             return RedirectResponse("/")
 
+    @property
+    def arrow_query(self):
+        """
+        the arrow queries run directly on the parquet files - pyarrow
+        is only imported when they are needed
+        """
+        with self.arrow_query_lock:
+            if self._arrow_query is None:
+                from genwiki.arrow_query import ArrowQuery
+
+                self._arrow_query = ArrowQuery(folder=self.examples_path())
+        return self._arrow_query
+
+    def build_address_db(self):
+        """
+        (re)build the address db from the parquet files
+        """
+        from genwiki.convert import ParquetAdressbokToSql
+
+        # only added or changed parquet files are (re)imported into
+        # the indexed combined address table with the Arrow native bulk loader
+        profiler = Profiler("update address db from parquet files", profile=True)
+        pats = ParquetAdressbokToSql(
+            folder=self.examples_path(), with_fts=True, materialized=True
+        )
+        pats.update_db(self.sql_db, use_arrow=True)
+        profiler.time()
+        # report the sql queries that still need full scans
+        indexer = AddressIndexer(self.sql_db)
+        indexer.report(list(self.mlqm.get_queries("sql").values()))
+
+    def collect_metrics(self) -> List[Metric]:
+        """
+        get the metrics of the clients, queries, result cache and SQLite pool
+        """
+        clients = Gauge("genwiki_active_clients", "number of connected clients")
+        clients.set(len(Client.instances))
+        db_ready = Gauge(
+            "genwiki_address_db_ready", "1 if the address db has been built"
+        )
+        db_ready.set(int(self.address_db_build.is_ready()))
+        executions = Counter(
+            "genwiki_query_executions_total",
+            "query executions per language",
+            ["lang"],
+        )
+        errors = Counter(
+            "genwiki_query_errors_total",
+            "failed query executions per language",
+            ["lang"],
+        )
+        query_seconds = Counter(
+            "genwiki_query_seconds_total",
+            "total query execution time per language",
+            ["lang"],
+        )
+        for lang in self.mlqm.languages:
+            executions.inc(0, lang=lang)
+            errors.inc(0, lang=lang)
+            query_seconds.inc(0, lang=lang)
+        for record in self.query_stats.get_query_stats():
+            executions.inc(record["count"], lang=record["lang"])
+            errors.inc(record["errors"], lang=record["lang"])
+            query_seconds.inc(record["total_secs"], lang=record["lang"])
+        outcomes = Counter(
+            "genwiki_query_tasks_total", "query tasks by outcome", ["outcome"]
+        )
+        for outcome, count in QueryTask.get_counts().items():
+            outcomes.inc(count, outcome=outcome)
+        metrics = [clients, db_ready, executions, errors, query_seconds, outcomes]
+        cache = self.mlqm.cache
+        if cache is not None:
+            cache_stats = cache.get_stats()
+            lookups = Counter(
+                "genwiki_query_cache_lookups_total",
+                "query result cache lookups by result",
+                ["result"],
+            )
+            lookups.inc(cache_stats["hits"], result="hit")
+            lookups.inc(cache_stats["misses"], result="miss")
+            cache_gauge = Gauge(
+                "genwiki_query_cache", "query result cache usage", ["measure"]
+            )
+            for measure in ["entries", "bytes", "hit_ratio"]:
+                cache_gauge.set(cache_stats[measure], measure=measure)
+            metrics.extend([lookups, cache_gauge])
+        sparql_stats = Wikidata.get_cache().get_stats()
+        sparql_lookups = Counter(
+            "genwiki_sparql_cache_lookups_total",
+            "persistent SPARQL response cache lookups by result",
+            ["result"],
+        )
+        for result in ["hits", "stale_hits", "misses", "expired"]:
+            sparql_lookups.inc(sparql_stats[result], result=result)
+        sparql_bytes = Gauge(
+            "genwiki_sparql_cache_bytes", "size of the persistent SPARQL response cache"
+        )
+        sparql_bytes.set(sparql_stats["bytes"])
+        metrics.extend([sparql_lookups, sparql_bytes])
+        pool_gauge = Gauge(
+            "genwiki_sqlite_pool_connections",
+            "read only SQLite connections of the pool",
+            ["state"],
+        )
+        pool_stats = self.sql_pool.get_stats()
+        for state in ["size", "open", "in_use"]:
+            pool_gauge.set(pool_stats[state], state=state)
+        pool_waits = Counter(
+            "genwiki_sqlite_pool_waits_total",
+            "borrowers that waited for a free SQLite connection",
+        )
+        pool_waits.inc(pool_stats["waits"])
+        metrics.extend([pool_gauge, pool_waits])
+        return metrics
+
     def configure_run(self):
         super().configure_run()
+        from genwiki.wiki import Wiki
+
         self.wiki_id = "gensmw"
         self.wiki = Wiki(wiki_id=self.wiki_id, debug=self.args.debug)
 
@@ -112,6 +298,7 @@ class GenWikiSolution(InputWebSolution):
         self.mlqm = webserver.mlqm
         self.wiki = webserver.wiki
         self.sql_db = self.webserver.sql_db
+        self.sql_pool = self.webserver.sql_pool
 
     def authenticated(self) -> bool:
         """
@@ -145,12 +332,50 @@ class GenWikiSolution(InputWebSolution):
         def setup_home():
             """ """
             self.query_view = QueryView(
-                self, mlqm=self.mlqm, sql_db=self.sql_db, wiki=self.wiki
+                self,
+                mlqm=self.mlqm,
+                sql_db=self.sql_db,
+                wiki=self.wiki,
+                get_arrow_query=lambda: self.webserver.arrow_query,
+                sql_pool=self.sql_pool,
+                db_build=self.webserver.address_db_build,
             )
             self.query_view.setup_ui()
 
         await self.setup_content_div(setup_home)
 
+    async def query_stats(self):
+        """
+        show the execution statistics of the queries and the slow query log
+        """
+
+        def show():
+            query_stats = self.webserver.query_stats
+            lod = []
+            for record in query_stats.get_query_stats():
+                record = dict(record)
+                histogram = record.pop("histogram")
+                record["param_sets"] = len(record.pop("params"))
+                record["histogram"] = " ".join(str(n) for n in histogram.values())
+                lod.append(record)
+            ui.label("Ausführungsstatistik").classes("text-h6")
+            if lod:
+                ListOfDictsGrid().load_lod(lod)
+            slow_lod = []
+            for execution in query_stats.get_slow_queries():
+                record = dict(execution)
+                record["params"] = str(record["params"])
+                record["plan"] = "; ".join(record.get("plan", []))
+                slow_lod.append(record)
+            ui.label(
+                f"Langsame Abfragen (ab {query_stats.slow_threshold:.2f} s)"
+            ).classes("text-h6")
+            if slow_lod:
+                ListOfDictsGrid().load_lod(slow_lod)
+            ui.link("JSON", "/api/query_stats")
+
+        await self.setup_content_div(show)
+
     async def wikidata_item(self, qid: str):
         """
         show a wikidata item with the given Wikidata id
@@ -159,6 +384,8 @@ class GenWikiSolution(InputWebSolution):
             qid(str): the Wikidata id of the item to show
         """
 
+        from genwiki.wikidata_view import WikidataItemView
+
         def show():
             self.wdv = WikidataItemView(self, mlqm=self.mlqm, qid=qid)
             self.wdv.setup_ui()
@@ -169,6 +396,7 @@ class GenWikiSolution(InputWebSolution):
         """
         provide the location page
         """
+        from wd.wditem_search import WikidataItemSearch
 
         def record_filter(qid: str, record: dict):
             if "label" and "desc" in record:
@@ -0,0 +1,28 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from ngwidgets.webserver import WebserverConfig
+
+from genwiki.version import Version
+
+
+class GenWikiWebserverConfig:
+    """
+    the webserver configuration without the webserver and its
+    dependencies so that the command line handling starts fast
+    """
+
+    @classmethod
+    def get_config(cls) -> WebserverConfig:
+        copy_right = "(c)2024 Wolfgang Fahl"
+        config = WebserverConfig(
+            copy_right=copy_right,
+            version=Version(),
+            default_port=9852,
+            short_name="genwiki2024",
+        )
+        server_config = WebserverConfig.get(config)
+        return server_config
@@ -6,10 +6,14 @@ Created on 2024-08-15
 
 import logging
 import os
-from typing import Any, Dict, Generator, List, Tuple
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 from wikibot3rd.wikipush import WikiPush
 
+from genwiki.http_scheduler import HttpScheduler, ScheduledAdapter
+
 
 class Wiki:
     """
@@ -36,6 +40,8 @@ class Wiki:
         if backup_dir is None:
             backup_dir = os.path.expanduser(f"~/wikibackup/{self.wiki_id}")
         self.wiki_backup_dir = backup_dir
+        self.adapter = None
+        self.adapter_lock = threading.Lock()
 
         # Set up logging
         if self.debug:
@@ -56,15 +62,45 @@ class Wiki:
         else:
             logging.log(logging.DEBUG, message)
 
-    def query_as_dict_of_dicts(self, ask_query: str) -> Dict[str, Dict[str, Any]]:
+    def get_adapter(self) -> Optional[ScheduledAdapter]:
+        """
+        get the adapter that sends the requests of my wiki's site
+        rate limited and retried through the HttpScheduler
+
+        Returns:
+            Optional[ScheduledAdapter]: the adapter - None if there is no wiki
+        """
+        with self.adapter_lock:
+            wiki_client = self.wiki_push.fromWiki
+            if self.adapter is None and wiki_client is not None:
+                site = wiki_client.get_site()
+                self.adapter = HttpScheduler.get_instance().mount(site.connection)
+        return self.adapter
+
+    def query_as_dict_of_dicts(
+        self, ask_query: str, cancelled: threading.Event = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
         run the given SMW ask query against my wiki
+
+        Args:
+            ask_query (str): the ask query
+            cancelled (threading.Event): if given stop waiting for the rate limit
+                or a backoff and send no further request when it is set
+
+        Raises:
+            RequestCancelledError: if the cancelled event is set before a request
         """
-        qdict = self.wiki_push.queryPages(askQuery=ask_query)
+        adapter = self.get_adapter()
+        context = adapter.cancellable(cancelled) if adapter else nullcontext()
+        with context:
+            qdict = self.wiki_push.queryPages(askQuery=ask_query)
         return qdict
 
-    def query_as_list_of_dicts(self, ask_query: str) -> List[Dict[str, Any]]:
-        qdict = self.query_as_dict_of_dicts(ask_query)
+    def query_as_list_of_dicts(
+        self, ask_query: str, cancelled: threading.Event = None
+    ) -> List[Dict[str, Any]]:
+        qdict = self.query_as_dict_of_dicts(ask_query, cancelled)
         qlod = list(qdict.values())
         return qlod
 
@@ -72,6 +108,7 @@ class Wiki:
         """
         backup the pages for the given query
         """
+        self.get_adapter()
         page_lod = self.wiki_push.queryPages(ask_query)
         page_titles = list(page_lod.keys())
         self.wiki_push.backup(pageTitles=page_titles, backupPath=self.wiki_backup_dir)
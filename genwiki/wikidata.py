@@ -4,10 +4,39 @@ Created on 15.09.2024
 @author: wf
 """
 
+import os
+import threading
+
 from lodstorage.sparql import SPARQL
 
+from genwiki.sparql_cache import SparqlCache
+
 
 class Wikidata:
+    cache = None
+    cache_lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls) -> SparqlCache:
+        """
+        get the process wide persistent cache of the Wikidata SPARQL responses
+
+        GENWIKI_SPARQL_CACHE sets the cache directory and
+        GENWIKI_OFFLINE=1 answers from the cache only e.g. for tests without network
+        """
+        with cls.cache_lock:
+            if cls.cache is None:
+                cls.cache = SparqlCache(
+                    cache_dir=os.environ.get("GENWIKI_SPARQL_CACHE"),
+                    # the coordinates and hierarchies of places rarely change
+                    # and keep the default of 7 days - the items near an item
+                    # are found among all Wikidata items with coordinates
+                    # and gain newly added items so they expire after a day
+                    ttls={"WikidataItemsNearItem": 24 * 3600.0},
+                    offline=os.environ.get("GENWIKI_OFFLINE") == "1",
+                )
+        return cls.cache
+
     @classmethod
     def get_sparql(cls):
         endpoint_uri = "https://query.wikidata.org/sparql"
@@ -9,6 +9,7 @@ import re
 from nicegui import ui
 
 from genwiki.multilang_querymanager import MultiLanguageQueryManager
+from genwiki.query_task import QueryTask
 from genwiki.wikidata import Wikidata
 
 
@@ -40,10 +41,12 @@ class WikidataItemView:
         """
         ui.label(self.qid)
         query = self.item_query
-        query.params.params_dict["item"] = self.qid
+        # the query is shared process wide - do not modify its params
+        param_dict = {**query.params.params_dict, "item": self.qid}
         sparql = Wikidata.get_sparql()
-        qlod = sparql.queryAsListOfDicts(
-            query.query, param_dict=query.params.params_dict
+        task = QueryTask(query.name)
+        qlod = task.sparql_query(
+            sparql, query.query, param_dict=param_dict, cache=Wikidata.get_cache()
         )
         if len(qlod) == 1:
             record = qlod[0]
@@ -0,0 +1,46 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import threading
+
+from ngwidgets.basetest import Basetest
+
+from genwiki.db_build import BackgroundBuild
+
+
+class TestBackgroundBuild(Basetest):
+    """
+    test the background database build
+    """
+
+    def test_build(self):
+        """
+        test the loading and ready states
+        """
+        release = threading.Event()
+        build = BackgroundBuild("test.db", lambda: release.wait(5)).start()
+        self.assertEqual("loading", build.get_state())
+        self.assertFalse(build.is_ready())
+        self.assertFalse(build.wait(0.01))
+        release.set()
+        self.assertTrue(build.wait(5))
+        status = build.get_status()
+        self.assertEqual("ready", status["state"])
+        self.assertNotIn("error", status)
+
+    def test_failed_build(self):
+        """
+        test that a failing build is reported
+        """
+
+        def fail():
+            raise ValueError("no parquet files")
+
+        build = BackgroundBuild("test.db", fail).start()
+        self.assertFalse(build.wait(5))
+        status = build.get_status()
+        self.assertEqual("failed", status["state"])
+        self.assertEqual("no parquet files", status["error"])
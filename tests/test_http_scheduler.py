@@ -0,0 +1,253 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from mwclient import Site
+from ngwidgets.basetest import Basetest
+
+from genwiki.http_scheduler import HttpScheduler, RequestCancelledError, TokenBucket
+from genwiki.metrics import MetricsRegistry
+from genwiki.query_task import QueryCancelledError, QueryTask
+from genwiki.wiki import Wiki
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    a server that fails the requests to /<status>/<count>[/<retry_after>]
+    count times with the given status before it answers with 200
+    """
+
+    def respond(self):
+        parts = self.path.strip("/").split("/")
+        status, count = int(parts[0]), int(parts[1])
+        with self.server.lock:
+            calls = self.server.calls.get(self.path, 0) + 1
+            self.server.calls[self.path] = calls
+        if calls <= count:
+            self.send_response(status)
+            if len(parts) > 2:
+                self.send_header("Retry-After", parts[2])
+        else:
+            self.send_response(200)
+        content = f"call {calls}".encode()
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.respond()
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalWikiPush:
+    """
+    a wiki push whose ask query is the path of a request to the test server
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.fromWiki = self
+        host = url.split("://")[1]
+        self.site = Site(host, path="/", scheme="http", do_init=False)
+
+    def get_site(self) -> Site:
+        return self.site
+
+    def queryPages(self, askQuery: str) -> dict:
+        response = self.site.connection.get(f"{self.url}/{askQuery}")
+        return {askQuery: {"text": response.text}}
+
+
+class LocalWiki(Wiki):
+    """
+    a wiki on the test server that needs no wiki configuration
+    """
+
+    def __init__(self, url: str):
+        self.wiki_id = "local"
+        self.debug = False
+        self.adapter = None
+        self.adapter_lock = threading.Lock()
+        self.wiki_push = LocalWikiPush(url)
+
+
+class TestHttpScheduler(Basetest):
+    """
+    test the rate limited HTTP request scheduler
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.calls = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = f"127.0.0.1:{self.server.server_address[1]}"
+        self.url = f"http://{self.host}"
+        self.scheduler = HttpScheduler(backoff_base=0.05)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        Basetest.tearDown(self)
+
+    def test_token_bucket(self):
+        """
+        test that the requests after the burst are spaced by the rate
+        """
+        bucket = TokenBucket(rate=20.0, burst=2)
+        waits = [bucket.reserve() for _ in range(5)]
+        expected = [0.0, 0.0, 0.05, 0.1, 0.15]
+        for wait, expected_wait in zip(waits, expected):
+            self.assertAlmostEqual(expected_wait, wait, delta=0.01)
+        bucket.pause(1.0)
+        self.assertGreater(bucket.reserve(), 0.9)
+
+    def test_parse_retry_after(self):
+        """
+        test the delay seconds and HTTP date forms of Retry-After
+        """
+        self.assertEqual(120.0, HttpScheduler.parse_retry_after("120"))
+        secs = HttpScheduler.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+        self.assertEqual(0.0, secs)
+        self.assertIsNone(HttpScheduler.parse_retry_after("soon"))
+        self.assertIsNone(HttpScheduler.parse_retry_after(None))
+
+    def test_retry(self):
+        """
+        test the retries of 429 and 5xx responses
+        """
+        start = time.time()
+        response = self.scheduler.request("GET", f"{self.url}/429/1/1")
+        secs = time.time() - start
+        self.assertEqual(200, response.status_code)
+        # Retry-After is honored
+        self.assertGreater(secs, 0.9)
+        response = self.scheduler.request("GET", f"{self.url}/503/2")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("call 3", response.text)
+        # the last response is returned when the retries are exhausted
+        response = self.scheduler.request("GET", f"{self.url}/503/5", max_retries=1)
+        self.assertEqual(503, response.status_code)
+        # client errors are not retried
+        response = self.scheduler.request("GET", f"{self.url}/404/1")
+        self.assertEqual(404, response.status_code)
+        self.assertEqual(1, self.server.calls["/404/1"])
+        metrics_text = MetricsRegistry.get_instance().to_text()
+        self.assertIn(
+            f'genwiki_http_retries_total{{host="{self.host}"}} 4', metrics_text
+        )
+
+    def test_rate_limit(self):
+        """
+        test that concurrent requests are throttled per host
+        and the waiting requests are exposed as queue depth
+        """
+        scheduler = HttpScheduler(rates={self.host: (10.0, 1)})
+        depths = []
+
+        def get():
+            response = scheduler.request("GET", f"{self.url}/500/0")
+            self.assertEqual(200, response.status_code)
+
+        start = time.time()
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        depths.append(scheduler.get_stats()[self.host]["queue_depth"])
+        for thread in threads:
+            thread.join()
+        secs = time.time() - start
+        if self.debug:
+            print(f"5 requests in {secs:.2f}s queue depth {depths}")
+        self.assertGreater(secs, 0.35)
+        self.assertGreater(depths[0], 0)
+        self.assertEqual(0, scheduler.get_stats()[self.host]["queue_depth"])
+        metrics_text = MetricsRegistry.get_instance().to_text()
+        self.assertIn(
+            f'genwiki_http_wait_seconds_count{{host="{self.host}"}} 5', metrics_text
+        )
+
+    def test_mount(self):
+        """
+        test that the requests of a mounted session e.g. the one
+        of the wiki client are retried by the scheduler
+        """
+        session = requests.Session()
+        adapter = self.scheduler.mount(session)
+        self.assertIs(adapter, session.get_adapter(self.url))
+        response = session.get(f"{self.url}/503/2")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("call 3", response.text)
+
+    def test_query_task(self):
+        """
+        test that the SPARQL posts of a query task are retried
+        """
+        task = QueryTask("retry", timeout=5.0)
+        content = task.http_post(f"{self.url}/429/1/0", {"query": "ASK {}"}, {})
+        self.assertEqual(b"call 2", content)
+
+    def test_cancel(self):
+        """
+        test that a cancellation ends the backoff of a request at once
+        """
+        scheduler = HttpScheduler(backoff_base=30.0, max_delay=30.0)
+        cancelled = threading.Event()
+        threading.Timer(0.2, cancelled.set).start()
+        start = time.time()
+        with self.assertRaises(RequestCancelledError):
+            scheduler.request("GET", f"{self.url}/503/5/30", cancelled=cancelled)
+        self.assertLess(time.time() - start, 5.0)
+        self.assertEqual(1, self.server.calls["/503/5/30"])
+
+    def test_query_task_cancel(self):
+        """
+        test that cancelling a query task ends the backoff of its SPARQL post
+        """
+        HttpScheduler.instance = HttpScheduler(backoff_base=30.0, max_delay=30.0)
+        try:
+            task = QueryTask("cancel", timeout=5.0)
+            threading.Timer(0.2, task.cancel).start()
+            start = time.time()
+            with self.assertRaises(QueryCancelledError):
+                task.http_post(f"{self.url}/503/5", {"query": "ASK {}"}, {})
+            self.assertLess(time.time() - start, 5.0)
+        finally:
+            HttpScheduler.instance = None
+
+    def test_ask_query_cancel(self):
+        """
+        test that the ask queries of a query task are retried by the scheduler
+        and that cancelling the task ends the backoff of its wiki request
+        """
+        HttpScheduler.instance = HttpScheduler(backoff_base=30.0, max_delay=30.0)
+        try:
+            wiki = LocalWiki(self.url)
+            task = QueryTask("ask", timeout=5.0)
+            qlod = task.ask_query(wiki, "429/1/0")
+            self.assertEqual([{"text": "call 2"}], qlod)
+            task = QueryTask("cancel", timeout=5.0)
+            threading.Timer(0.2, task.cancel).start()
+            start = time.time()
+            with self.assertRaises(QueryCancelledError):
+                task.ask_query(wiki, "503/5/30")
+            self.assertLess(time.time() - start, 5.0)
+            self.assertEqual(1, self.server.calls["/503/5/30"])
+        finally:
+            HttpScheduler.instance = None
@@ -0,0 +1,46 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from ngwidgets.basetest import Basetest
+
+from benchmarks.import_benchmark import ImportBenchmark
+
+
+class TestImportBenchmark(Basetest):
+    """
+    test the startup import times of the genwiki command
+    """
+
+    def test_parse(self):
+        """
+        test parsing the python -X importtime output
+        """
+        stderr = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |       2620 | pyarrow"""
+        import_times = ImportBenchmark.parse(stderr)
+        self.assertEqual(["_io", "pyarrow"], [it.module for it in import_times])
+        self.assertEqual(1, import_times[0].level)
+        self.assertEqual(2620, import_times[1].cumulative_us)
+
+    def test_lazy_imports(self):
+        """
+        test that the command line handling does not import
+        the webserver and its heavy dependencies
+        """
+        benchmark = ImportBenchmark(repeats=1)
+        import_times = benchmark.measure("genwiki.genwiki_cmd")
+        if self.debug:
+            print(benchmark.report("genwiki.genwiki_cmd", top=10))
+        for module in [
+            "genwiki.webserver",
+            "pyarrow",
+            "lodstorage",
+            "wd",
+            "ez_wikidata",
+            "geopy",
+        ]:
+            self.assertNotIn(module, import_times)
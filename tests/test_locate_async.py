@@ -0,0 +1,198 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import asyncio
+import threading
+import time
+
+from ngwidgets.basetest import Basetest
+
+from genwiki.location_index import LocationIndex
+from genwiki.locator import Locator
+
+
+class SlowBackends:
+    """
+    slow stand-ins for the GOV, SPARQL and search backends of the Locator
+    that count the calls and the maximum number of concurrent calls
+    """
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        # the exceptions to raise by call name
+        self.failures = {}
+
+    def call(self, name: str, result):
+        with self.lock:
+            self.calls.append(name)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if name in self.failures:
+            raise self.failures[name]
+        return result
+
+    def get_raw_gov_object(self, gov_id: str):
+        gov_obj = {
+            "externalReference": [
+                {"value": "geonames:2812482"},
+                {"value": "NUTS2003:DEG05"},
+                {"value": "opengeodb:1234"},
+            ],
+            "name": [
+                {"lang": "deu", "value": "Weimar"},
+                {"lang": "pol", "value": "Weimar"},
+                {"lang": "eng", "value": "Weimar"},
+            ],
+        }
+        return self.call("gov", gov_obj)
+
+    def lookup_wikidata_id_by_geoid(self, geoid_kind: str, geo_id: str):
+        return self.call(f"{geoid_kind}:{geo_id}", "Q3955")
+
+    def locate_by_name(self, name: str, language: str):
+        item = "Q3955" if language == "de" else "Q1113"
+        return self.call(f"{name}@{language}", item)
+
+    def lookup_wikidata_id(self, location_text: str):
+        return self.call("nominatim", "Q3955")
+
+
+class TestLocateAsync(Basetest):
+    """
+    test the concurrent locate
+    """
+
+    def get_locator(self, backends: SlowBackends) -> Locator:
+        locator = Locator(location_index=LocationIndex())
+        locator.gov_api = backends
+        locator.nominatim = backends
+        locator.lookup_wikidata_id_by_geoid = backends.lookup_wikidata_id_by_geoid
+        locator.locate_by_name = backends.locate_by_name
+        # no coordinates - validate keeps all found items
+        locator.get_coordinates = lambda items: {}
+        return locator
+
+    def test_locate_async(self):
+        """
+        test that locate_async returns the items of locate with fewer
+        and concurrent backend calls
+        """
+        backends = SlowBackends()
+        locator = self.get_locator(backends)
+        start = time.time()
+        items = locator.locate("WEIMARJO50AX")
+        sync_secs = time.time() - start
+        sync_calls = len(backends.calls)
+
+        backends = SlowBackends()
+        locator = self.get_locator(backends)
+        start = time.time()
+        async_items = asyncio.run(locator.locate_async("WEIMARJO50AX"))
+        async_secs = time.time() - start
+        if self.debug:
+            print(f"locate: {sync_secs:.2f}s {sync_calls} calls {items}")
+            print(
+                f"locate_async: {async_secs:.2f}s {len(backends.calls)} calls"
+                f" max {backends.max_active} concurrent {async_items}"
+            )
+        self.assertEqual(list(items.items()), list(async_items.items()))
+        # the names are searched once instead of once per reference
+        self.assertEqual(12, sync_calls)
+        self.assertEqual(6, len(backends.calls))
+        self.assertEqual(1, backends.calls.count("Weimar@de"))
+        # the bounds are per backend
+        max_concurrency = locator.max_concurrency
+        self.assertLessEqual(
+            backends.max_active, max_concurrency["sparql"] + max_concurrency["search"]
+        )
+        self.assertGreater(backends.max_active, 1)
+        self.assertLess(async_secs, sync_secs / 2)
+
+    def test_failed_lookup(self):
+        """
+        test that locate_async keeps the items found before a failed lookup
+        and falls back to nominatim for a not found error as locate does
+        """
+        results = []
+        for use_async in [False, True]:
+            backends = SlowBackends(delay=0.01)
+            backends.failures["NUTS2003:DEG05"] = Exception("404 Not Found")
+            locator = self.get_locator(backends)
+            if use_async:
+                items = asyncio.run(locator.locate_async("WEIMARJO50AX"))
+            else:
+                items = locator.locate("WEIMARJO50AX")
+            self.assertIn("geonames:2812482", items)
+            self.assertIn("nominatim", backends.calls)
+            results.append(list(items.items()))
+        self.assertEqual(results[0], results[1])
+        # other errors are raised
+        backends = SlowBackends(delay=0.01)
+        backends.failures["Weimar@de"] = ValueError("invalid response")
+        locator = self.get_locator(backends)
+        with self.assertRaises(ValueError):
+            asyncio.run(locator.locate_async("WEIMARJO50AX"))
+
+    def test_shared_bounds(self):
+        """
+        test that concurrent calls of locate_async share the bounds per backend
+        """
+        backends = SlowBackends(delay=0.05)
+        locator = self.get_locator(backends)
+        locator.max_concurrency = {"gov": 1, "sparql": 1, "search": 1, "nominatim": 1}
+
+        async def locate_all():
+            gov_ids = ["WEIMARJO50AX", "ERFURTJO50BX", "JENJENJO50DW"]
+            return await asyncio.gather(
+                *[locator.locate_async(gov_id) for gov_id in gov_ids]
+            )
+
+        results = asyncio.run(locate_all())
+        self.assertEqual(3, len(results))
+        # at most one call per backend - without the sharing up to six
+        # sparql and search calls would run at once
+        self.assertLessEqual(backends.max_active, 3)
+        # a new event loop gets new semaphores
+        asyncio.run(locate_all())
+
+    def test_concurrent_geoid_lookups(self):
+        """
+        test that concurrent geoid lookups send their own SPARQL query
+        """
+        locator = Locator(location_index=LocationIndex())
+        query = locator.mlqm.query4Name("WikidataLookupByNutsCode")
+        params_dict = dict(query.params.params_dict)
+        mismatches = []
+
+        def query_sparql(sparql_query: str, param_dict: dict, name: str = None):
+            if f'"{param_dict["nuts_code"]}"' not in sparql_query:
+                mismatches.append(param_dict["nuts_code"])
+            return []
+
+        locator.query_sparql = query_sparql
+
+        def lookup(geoid_kind: str):
+            for i in range(2000):
+                locator.lookup_wikidata_id_by_geoid(geoid_kind, f"{geoid_kind}-{i}")
+
+        threads = [
+            threading.Thread(target=lookup, args=(geoid_kind,))
+            for geoid_kind in ["NUTS2003", "NUTS1999", "NUTS2003", "NUTS1999"]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], mismatches)
+        # the query shared by the whole process is never written to
+        self.assertEqual(params_dict, query.params.params_dict)
@@ -85,6 +85,23 @@ class TestLocations(GenealogyBasetest):
         page_title = self.locator.lookup_path_for_item(item)
         self.assertEqual("DE/TH/Weimar", page_title)
 
+    def test_lookup_items(self):
+        """
+        test the batched admin hierarchy lookup
+        """
+        items = ["Q3955", "Q255385", "Q1729"]
+        lookups = self.locator.lookup_items(items, chunk_size=2)
+        self.assertEqual(items, list(lookups.keys()))
+        self.assertEqual("DE/TH/Weimar", self.locator.to_path(lookups["Q3955"]))
+        for item in items:
+            single_locator = Locator()
+            single_qlod = single_locator.lookup_item(item)
+            self.assertEqual(
+                self.locator.to_path(single_qlod), self.locator.to_path(lookups[item])
+            )
+            # the batched results are reused
+            self.assertIs(lookups[item], self.locator.lookup_item(item))
+
     def test_sort_items(self):
         """
         test sorting items
@@ -0,0 +1,120 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import tempfile
+
+from ngwidgets.basetest import Basetest
+
+from genwiki.location_index import LocationIndex
+from genwiki.locator import Locator
+
+
+class TestLocationIndex(Basetest):
+    """
+    test the offline Wikidata location index
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "locations.db")
+        self.location_index = LocationIndex(self.db_path)
+        prefix = LocationIndex.item_prefix
+        # WikidataRegionIndex records as harvested for Thuringia
+        items_lod = [
+            {
+                "item": f"{prefix}Q183",
+                "coordinates": "Point(10.0 51.0)",
+                "country_iso_code": "DE",
+            },
+            {
+                "item": f"{prefix}Q1205",
+                "coordinates": "Point(11.0 50.9)",
+                "region_iso_code": "DE-TH",
+                "parents": "Q183",
+                "nuts_codes": "DEG",
+            },
+            {
+                "item": f"{prefix}Q3955",
+                "coordinates": "Point(11.3166 50.9833)",
+                "parents": "Q1205",
+                "geonames_ids": "2812482",
+                "nuts_codes": "DEG05",
+            },
+            # an item without coordinates
+            {"item": f"{prefix}Q7", "parents": "Q3955"},
+        ]
+        labels = {"Q183": "Deutschland", "Q1205": "Thüringen", "Q3955": "Weimar"}
+        self.location_index.add_items(items_lod)
+        self.location_index.add_labels(
+            [
+                {"item": f"{prefix}{qid}", "label": label}
+                for qid, label in labels.items()
+            ],
+            "de",
+        )
+        self.location_index.set_meta("regions", "Q1205")
+        self.location_index.commit()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        Basetest.tearDown(self)
+
+    def test_lookup_item(self):
+        """
+        test the admin hierarchy in the format of the WikidataLookup query
+        """
+        qlod = self.location_index.lookup_item("Q3955", "de")
+        if self.debug:
+            print(qlod)
+        self.assertEqual(2, len(qlod))
+        self.assertEqual(["4", "3"], [record["level"] for record in qlod])
+        self.assertEqual(["DE-TH", "DE"], [record["iso_code"] for record in qlod])
+        self.assertEqual("Weimar", qlod[0]["itemLabel"])
+        self.assertEqual("Thüringen", qlod[0]["intermediateAdminLabel"])
+        self.assertTrue(qlod[0]["intermediateAdmin"].endswith("/Q1205"))
+        # not in the index, no label and a language that has not been harvested
+        self.assertIsNone(self.location_index.lookup_item("Q64", "de"))
+        self.assertEqual([], self.location_index.lookup_item("Q7", "de"))
+        self.assertIsNone(self.location_index.lookup_item("Q3955", "pl"))
+
+    def test_locator(self):
+        """
+        test that the locator answers from the index without network access
+        """
+        locator = Locator(location_index=LocationIndex(self.db_path))
+        self.assertEqual("DE/TH/Weimar", locator.lookup_path_for_item("Q3955"))
+        lookups = locator.lookup_items(["Q3955"])
+        self.assertEqual("DE/TH/Weimar", locator.to_path(lookups["Q3955"]))
+        coords = locator.get_coordinates(["Q3955", "Q7"])
+        self.assertEqual({"Q3955": (50.9833, 11.3166)}, coords)
+        self.assertEqual(
+            "Q3955", locator.lookup_wikidata_id_by_geoid("geonames", "2812482")
+        )
+        self.assertEqual(
+            "Q3955", locator.lookup_wikidata_id_by_geoid("NUTS2003", "DEG05")
+        )
+        stats = locator.location_index.get_stats()
+        self.assertEqual(4, stats["location"])
+        self.assertEqual(
+            {"langs": "de", "regions": "Q1205"}, locator.location_index.get_meta()
+        )
+
+    def test_default_path(self):
+        """
+        test that the default index of the Locator follows the path set
+        by the --location-index command line option
+        """
+        try:
+            LocationIndex.set_default_path(self.db_path)
+            self.assertEqual(self.db_path, LocationIndex.get_default_path())
+            locator = Locator()
+            self.assertEqual(self.db_path, locator.location_index.db_path)
+            self.assertIs(LocationIndex.get_default(), locator.location_index)
+        finally:
+            LocationIndex.set_default_path(None)
+        self.assertNotEqual(self.db_path, LocationIndex.get_default_path())
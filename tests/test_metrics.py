@@ -0,0 +1,74 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from ngwidgets.basetest import Basetest
+
+from genwiki.metrics import Gauge, MetricsRegistry
+
+
+class TestMetrics(Basetest):
+    """
+    test the metrics registry and the Prometheus text exposition format
+    """
+
+    def test_text_format(self):
+        """
+        test counters, histograms and collectors in the text format
+        """
+        registry = MetricsRegistry()
+        pages = registry.counter("test_pages_total", "rendered pages", ["path"])
+        pages.inc(path="/")
+        pages.inc(2, path='/wd/"Q1"')
+        self.assertIs(pages, registry.counter("test_pages_total", "rendered pages"))
+        with self.assertRaises(ValueError):
+            registry.gauge("test_pages_total", "rendered pages")
+        with self.assertRaises(ValueError):
+            pages.inc(lang="sql")
+        seconds = registry.histogram(
+            "test_seconds", "latency", ["service"], buckets=[0.1, 1.0]
+        )
+        for value in [0.05, 0.5, 2.0]:
+            seconds.observe(value, service="sparql")
+
+        def collect():
+            gauge = Gauge("test_clients", "connected clients")
+            gauge.set(3)
+            return [gauge]
+
+        registry.add_collector(collect)
+        text = registry.to_text()
+        if self.debug:
+            print(text)
+        lines = text.splitlines()
+        self.assertIn("# TYPE test_pages_total counter", lines)
+        self.assertIn('test_pages_total{path="/"} 1', lines)
+        self.assertIn('test_pages_total{path="/wd/\\"Q1\\""} 2', lines)
+        self.assertIn('test_seconds_bucket{service="sparql",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{service="sparql",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{service="sparql",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{service="sparql"} 3', lines)
+        self.assertIn("test_clients 3", lines)
+
+    def test_timed_call(self):
+        """
+        test counting and timing the calls of external services
+        """
+        registry = MetricsRegistry()
+        with registry.timed_call("gov", "getObject"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with registry.timed_call("gov", "getObject"):
+                raise RuntimeError("HTTP 503")
+        text = registry.to_text()
+        for outcome in ["ok", "error"]:
+            self.assertIn(
+                f'genwiki_external_calls_total{{service="gov",operation="getObject",outcome="{outcome}"}} 1',
+                text,
+            )
+        self.assertIn(
+            'genwiki_external_call_seconds_count{service="gov",operation="getObject"} 2',
+            text,
+        )
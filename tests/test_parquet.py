@@ -6,14 +6,25 @@ Created on 2024-08-15
 
 import json
 import os
+import shutil
+import tempfile
+import tracemalloc
 
+import pyarrow as pa
 from lodstorage.params import Params
 from lodstorage.query import QueryManager
 from lodstorage.sql import SQLDB
 from lodstorage.uml import UML
 from ngwidgets.basetest import Basetest
 
+from benchmarks.mapping_benchmark import MappingBenchmark
+from genwiki.address_fts import AddressFullTextIndex
+from genwiki.address_index import AddressIndexer
+from genwiki.address_table import MaterializedAddressTable
+from genwiki.arrow_loader import ArrowSqlLoader
+from genwiki.arrow_query import ArrowQuery
 from genwiki.convert import ParquetAdressbokToSql
+from genwiki.parquet import Parquet
 
 
 class TestParquet(Basetest):
@@ -47,7 +58,6 @@ class TestParquet(Basetest):
                 f"No .parquet files found in {self.genwiki_examples_folder}",
             )
 
-            pats.inject_year()
             # Convert to SQLite with the correct table name and column mapping
             sql_db = SQLDB(db_path)
             pats.convert(sql_db)
@@ -111,3 +121,441 @@ class TestParquet(Basetest):
             lod = sql_db.query(query.query)
             if debug:
                 print(json.dumps(lod, indent=2))
+
+    def test_parallel_load(self):
+        """
+        test that the parallel ingest gives the same tables and view as the serial one
+        """
+        pats = ParquetAdressbokToSql(folder=self.genwiki_examples_folder)
+        serial_db = SQLDB()
+        pats.to_db(serial_db, use_arrow=True)
+        parallel_db = SQLDB()
+        pats.to_db(parallel_db, use_arrow=True, max_workers=2)
+        self.assertEqual(serial_db.getTableDict(), parallel_db.getTableDict())
+        query = "SELECT * FROM address ORDER BY year,id"
+        self.assertEqual(serial_db.query(query), parallel_db.query(query))
+        # the row dict conversion can not be parallelized
+        with self.assertRaises(ValueError):
+            pats.to_db(SQLDB(), max_workers=2)
+
+    def test_incremental_update(self):
+        """
+        test the manifest driven incremental update of the address database
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            folder = os.path.join(tmp_dir, "parquet")
+            os.makedirs(folder)
+            for name in ["weimarTH1851.parquet", "weimarTH1853.parquet"]:
+                shutil.copy(os.path.join(self.genwiki_examples_folder, name), folder)
+            pats = ParquetAdressbokToSql(folder=folder)
+            sql_db = SQLDB(os.path.join(tmp_dir, "address.db"))
+            count_query = "SELECT COUNT(*) AS count FROM address"
+
+            changes = pats.update_db(sql_db)
+            self.assertEqual(2, len(changes.added))
+            self.assertEqual(8569, sql_db.query(count_query)[0]["count"])
+
+            changes = pats.update_db(sql_db)
+            self.assertEqual(2, len(changes.unchanged))
+            self.assertEqual([], changes.modified)
+
+            # touching a file does not trigger a re-import
+            path_1853 = os.path.join(folder, "weimarTH1853.parquet")
+            os.utime(path_1853, (0, 0))
+            changes = pats.update_db(sql_db)
+            self.assertEqual([], changes.modified)
+            changes = pats.update_db(sql_db)
+            self.assertEqual(2, len(changes.unchanged))
+
+            # changed content triggers a re-import of just that file
+            shutil.copy(
+                os.path.join(self.genwiki_examples_folder, "weimarTH1851.parquet"),
+                path_1853,
+            )
+            changes = pats.update_db(sql_db)
+            self.assertEqual(
+                ["weimarTH1853.parquet"], [e.source for e in changes.changed]
+            )
+            self.assertEqual(
+                4183,
+                sql_db.query("SELECT COUNT(*) AS count FROM weimarTH1853")[0]["count"],
+            )
+
+            # removed files lead to dropped tables and a regenerated view
+            os.remove(path_1853)
+            changes = pats.update_db(sql_db)
+            self.assertEqual(
+                ["weimarTH1853.parquet"], [e.source for e in changes.removed]
+            )
+            self.assertNotIn("weimarTH1853", sql_db.getTableDict())
+            self.assertEqual(4183, sql_db.query(count_query)[0]["count"])
+            sql_db.close()
+
+    def test_update_db_loader(self):
+        """
+        test that the incremental update uses the same loader as the full import
+        """
+        pats = ParquetAdressbokToSql(folder=self.genwiki_examples_folder)
+        for use_arrow in [False, True]:
+            with self.subTest(use_arrow=use_arrow):
+                full_db = SQLDB()
+                pats.to_db(full_db, use_arrow=use_arrow)
+                update_db = SQLDB()
+                pats.update_db(update_db, use_arrow=use_arrow)
+                for table_name in ["weimarTH1851", "weimarTH1853"]:
+                    self.assertEqual(
+                        pats.parquet_handler.get_table_list(full_db, [table_name]),
+                        pats.parquet_handler.get_table_list(update_db, [table_name]),
+                    )
+                query = "SELECT * FROM address ORDER BY year,id"
+                self.assertEqual(full_db.query(query), update_db.query(query))
+        with self.assertRaises(ValueError):
+            pats.update_db(SQLDB(), max_workers=2)
+
+    def test_materialized(self):
+        """
+        test the materialized combined address table
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            folder = os.path.join(tmp_dir, "parquet")
+            os.makedirs(folder)
+            for name in ["weimarTH1851.parquet", "weimarTH1853.parquet"]:
+                shutil.copy(os.path.join(self.genwiki_examples_folder, name), folder)
+            sql_db = SQLDB(os.path.join(tmp_dir, "address.db"))
+            count_query = "SELECT source, COUNT(*) AS count FROM address GROUP BY source ORDER BY source"
+            # start with the view and switch to the materialized table
+            ParquetAdressbokToSql(folder=folder).update_db(sql_db)
+            view_counts = sql_db.query(count_query)
+            pats = ParquetAdressbokToSql(folder=folder, materialized=True)
+            changes = pats.update_db(sql_db)
+            self.assertEqual(2, len(changes.changed))
+            self.assertEqual(
+                "table", MaterializedAddressTable.get_type(sql_db, "address")
+            )
+            self.assertEqual(
+                "view", MaterializedAddressTable.get_type(sql_db, "weimarTH1851")
+            )
+            self.assertEqual(view_counts, sql_db.query(count_query))
+            indexer = AddressIndexer(sql_db)
+            scans = indexer.get_scans(
+                "SELECT COUNT(*) FROM address WHERE lastname='Ziegler'"
+            )
+            self.assertEqual([], scans)
+            # the combined table is indexed by year
+            scans = indexer.get_scans("SELECT COUNT(*) FROM address WHERE year=1853")
+            self.assertEqual([], scans)
+            # a re-import only replaces the rows of the changed source
+            path_1853 = os.path.join(folder, "weimarTH1853.parquet")
+            shutil.copy(os.path.join(folder, "weimarTH1851.parquet"), path_1853)
+            changes = pats.update_db(sql_db)
+            self.assertEqual(
+                ["weimarTH1853.parquet"], [e.source for e in changes.changed]
+            )
+            self.assertEqual(
+                4183,
+                sql_db.query("SELECT COUNT(*) AS count FROM weimarTH1853")[0]["count"],
+            )
+            self.assertEqual(
+                [{"count": 8366}],
+                sql_db.query("SELECT COUNT(*) AS count FROM address"),
+            )
+            # removed sources are deleted from the combined table
+            os.remove(path_1853)
+            pats.update_db(sql_db)
+            self.assertIsNone(MaterializedAddressTable.get_type(sql_db, "weimarTH1853"))
+            self.assertEqual(
+                [{"source": "weimarTH1851.parquet", "count": 4183}],
+                sql_db.query(count_query),
+            )
+            sql_db.close()
+
+    def test_arrow_query(self):
+        """
+        test the arrow queries directly on the parquet files against the sql results
+        """
+        sql_db = SQLDB()
+        ParquetAdressbokToSql(folder=self.genwiki_examples_folder).to_db(sql_db)
+        arrow_query = ArrowQuery(folder=self.genwiki_examples_folder)
+        yaml_path = os.path.join(self.genwiki_examples_folder, "queries.yaml")
+        qm = QueryManager(lang="arrow", queriesPath=yaml_path, with_default=False)
+        query = qm.queriesByName["JahresStatistikParquet"]
+        params_dict = {}
+        query.set_default_params(params_dict)
+        lod = arrow_query.query_by_spec(query.query, params_dict)
+        sql_lod = sql_db.query("""SELECT year, COUNT(*) AS Anzahl FROM address
+            WHERE street LIKE '%Frauen%' GROUP BY year ORDER BY year""")
+        self.assertEqual(sql_lod, lod)
+        # the parameter values can not change the structure of the spec
+        for straße in ['x"]], [[year, ">", 0', "Frauen]\nlimit: 1", "O'Brien"]:
+            lod = arrow_query.query_by_spec(query.query, {"straße": straße})
+            self.assertEqual([], lod)
+        query = qm.queriesByName["BerufStatistikParquet"]
+        lod = arrow_query.query_by_spec(query.query, {"limit": "3"})
+        self.assertEqual(3, len(lod))
+        lod = arrow_query.query(
+            {
+                "columns": ["lastname", "year"],
+                "filter": [
+                    [["lastname", "=", "Ziegler"], ["year", "=", 1853]],
+                    [["lastname", "like", "zieg%"], ["year", "=", 1851]],
+                ],
+            }
+        )
+        sql_count = sql_db.query("""SELECT COUNT(*) AS count FROM address
+            WHERE (lastname='Ziegler' AND year=1853)
+            OR (lastname LIKE 'zieg%' AND year=1851)""")[0]["count"]
+        self.assertEqual(sql_count, len(lod))
+        self.assertEqual(
+            [{"Anzahl": 8569}],
+            arrow_query.query({"aggregate": [["*", "count", "Anzahl"]]}),
+        )
+
+    def test_pushdown(self):
+        """
+        test projection and filter pushdown
+        """
+        count_query = (
+            "SELECT year, COUNT(*) AS count FROM address GROUP BY year ORDER BY year"
+        )
+        for memory_map in [False, True]:
+            for use_arrow in [True, False]:
+                # projection
+                columns = ["id", "lastname", "street", "district"]
+                pats = ParquetAdressbokToSql(
+                    folder=self.genwiki_examples_folder,
+                    columns=columns,
+                    memory_map=memory_map,
+                )
+                sql_db = SQLDB()
+                pats.to_db(sql_db, use_arrow=use_arrow)
+                table_cols = list(
+                    sql_db.getTableDict()["weimarTH1853"]["columns"].keys()
+                )
+                self.assertEqual(columns + ["source", "year"], table_cols)
+                # filter on the year is decided per file
+                pats = ParquetAdressbokToSql(
+                    folder=self.genwiki_examples_folder,
+                    filters=[("year", "=", 1853)],
+                    memory_map=memory_map,
+                )
+                sql_db = SQLDB()
+                pats.to_db(sql_db, use_arrow=use_arrow)
+                lod = sql_db.query(count_query)
+                self.assertEqual([{"year": 1853, "count": 4386}], lod)
+                # filter on the data is pushed down to the parquet reader
+                pats = ParquetAdressbokToSql(
+                    folder=self.genwiki_examples_folder,
+                    filters=[
+                        [("year", "=", 1853), ("district", "=", "Ilm-Bezirk")],
+                        [("year", "=", 1851), ("district", "in", ["C 5", "G 24"])],
+                    ],
+                    memory_map=memory_map,
+                )
+                sql_db = SQLDB()
+                pats.to_db(sql_db, use_arrow=use_arrow)
+                lod = sql_db.query(count_query)
+                expected = [{"year": 1851, "count": 14}, {"year": 1853, "count": 546}]
+                self.assertEqual(expected, lod)
+
+    def test_pushdown_missing_column(self):
+        """
+        test that a predicate on a column the file does not have
+        is not pushed down but does not match
+        """
+        file_path = os.path.join(self.genwiki_examples_folder, "weimarTH1853.parquet")
+        # no year mapping for the file
+        parquet = Parquet(filters=[("jahr", "=", 1853)])
+        batches = list(parquet.iter_record_batches(file_path))
+        self.assertEqual([], batches)
+        parquet = Parquet(
+            filters=[[("jahr", "=", 1853)], [("Bezirk", "=", "Ilm-Bezirk")]]
+        )
+        row_count = sum(
+            batch.num_rows for batch in parquet.iter_record_batches(file_path)
+        )
+        self.assertEqual(546, row_count)
+        # with the year mapping the predicate is decided by the constant
+        batches = parquet.iter_record_batches(file_path, extra_columns={"jahr": 1853})
+        row_count = sum(batch.num_rows for batch in batches)
+        self.assertEqual(4386, row_count)
+
+    def test_indexes(self):
+        """
+        test the secondary indexes and the query plan report
+        """
+        pats = ParquetAdressbokToSql(folder=self.genwiki_examples_folder)
+        sql_db = SQLDB()
+        pats.to_db(sql_db)
+        indexer = AddressIndexer(sql_db)
+        index_names = [
+            record["name"]
+            for record in sql_db.query(
+                "SELECT name FROM sqlite_master WHERE type='index' ORDER BY name"
+            )
+        ]
+        self.assertIn("weimarTH1851_lastname_idx", index_names)
+        # the year is constant per source table
+        self.assertNotIn("weimarTH1853_year_idx", index_names)
+        scans = indexer.get_scans(
+            "SELECT * FROM weimarTH1853 WHERE lastname='Ziegler' AND year=1853"
+        )
+        self.assertEqual([], scans)
+        yaml_path = os.path.join(self.genwiki_examples_folder, "queries.yaml")
+        qm = QueryManager(lang="sql", queriesPath=yaml_path, with_default=False)
+        scanning = indexer.check_queries(list(qm.queriesByName.values()))
+        if self.debug:
+            print(json.dumps(scanning, indent=2))
+        # substring searches can not use an index
+        self.assertIn("PersonenSuche", scanning)
+
+    def test_fts(self):
+        """
+        test the FTS5 full text person lookup
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["weimarTH1851.parquet", "weimarTH1853.parquet"]:
+                shutil.copy(os.path.join(self.genwiki_examples_folder, name), tmp_dir)
+            pats = ParquetAdressbokToSql(folder=tmp_dir, with_fts=True)
+            sql_db = SQLDB()
+            pats.update_db(sql_db)
+            fts = AddressFullTextIndex(sql_db)
+            lod = fts.search("Ziegler", limit=5)
+            if self.debug:
+                print(json.dumps(lod, indent=2, default=str))
+            self.assertTrue(0 < len(lod) <= 5)
+            for record in lod:
+                self.assertIn("Ziegler", json.dumps(record, ensure_ascii=False))
+            ranks = [record["rank"] for record in lod]
+            self.assertEqual(sorted(ranks), ranks)
+            page2 = fts.search("Ziegler", limit=5, page=2)
+            self.assertFalse(set(map(str, lod)) & set(map(str, page2)))
+            # the fts query language of the query manager
+            yaml_path = os.path.join(self.genwiki_examples_folder, "queries.yaml")
+            qm = QueryManager(lang="fts", queriesPath=yaml_path, with_default=False)
+            query = qm.queriesByName["PersonenVolltextSuche"]
+            params_dict = {}
+            query.set_default_params(params_dict)
+            self.assertEqual(lod, fts.search_by_spec(query.query, params_dict)[:5])
+            # user input is searched as a prefix phrase and not parsed as syntax
+            params_dict["suchbegriff"] = "Staff-Reiz"
+            lod = fts.search_by_spec(query.query, params_dict)
+            lastnames = [record["lastname"] for record in lod]
+            self.assertIn("Staff-Reizenstein, v.", lastnames)
+            for term in ["Müller-Lüd", "a:b", '"Zieg']:
+                params_dict["suchbegriff"] = term
+                lod = fts.search_by_spec(query.query, params_dict)
+                self.assertIsInstance(lod, list)
+            params_dict["suchbegriff"] = ""
+            self.assertEqual([], fts.search_by_spec(query.query, params_dict))
+            # removed sources are removed from the index
+            os.remove(os.path.join(tmp_dir, "weimarTH1851.parquet"))
+            pats.update_db(sql_db)
+            sources = sql_db.query("SELECT DISTINCT source FROM address_fts")
+            self.assertEqual([{"source": "weimarTH1853.parquet"}], sources)
+
+    def get_peak_memory(self, batch_size: int = None, use_arrow: bool = False):
+        """
+        convert the example address books to an in memory database
+
+        Returns:
+            tuple: peak of traced python memory in bytes and the number of rows stored
+        """
+        pats = ParquetAdressbokToSql(folder=self.genwiki_examples_folder)
+        sql_db = SQLDB()
+        tracemalloc.start()
+        pats.to_db(sql_db, batch_size=batch_size, use_arrow=use_arrow)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        count = sql_db.query("SELECT COUNT(*) AS count FROM address")[0]["count"]
+        sql_db.close()
+        return peak, count
+
+    def test_streaming_memory(self):
+        """
+        compare the peak memory of the full and the streaming conversion
+        """
+        full_peak, full_count = self.get_peak_memory()
+        stream_peak, stream_count = self.get_peak_memory(batch_size=500)
+        arrow_peak, arrow_count = self.get_peak_memory(batch_size=500, use_arrow=True)
+        if self.debug:
+            print(
+                f"full: {full_peak/1024/1024:.1f} MB streaming: {stream_peak/1024/1024:.1f} MB arrow: {arrow_peak/1024/1024:.1f} MB"
+            )
+        self.assertEqual(full_count, stream_count)
+        self.assertEqual(full_count, arrow_count)
+        self.assertLess(stream_peak, full_peak)
+        self.assertLess(arrow_peak, full_peak)
+
+    def test_arrow_loader(self):
+        """
+        test that the Arrow native loader creates the same tables and view
+        as the EntityInfo based conversion
+        """
+        pats = ParquetAdressbokToSql(folder=self.genwiki_examples_folder)
+        row_db = SQLDB()
+        # the EntityInfo based conversion is the default
+        pats.to_db(row_db)
+        arrow_db = SQLDB()
+        pats.to_db(arrow_db, use_arrow=True)
+        for sql_db in [row_db, arrow_db]:
+            self.assertFalse(sql_db.c.in_transaction)
+        row_tables = row_db.getTableDict()
+        arrow_tables = arrow_db.getTableDict()
+        self.assertEqual(row_tables.keys(), arrow_tables.keys())
+        for name, row_table in row_tables.items():
+            row_cols = list(row_table["columns"].keys())
+            arrow_cols = list(arrow_tables[name]["columns"].keys())
+            self.assertEqual(row_cols, arrow_cols, name)
+        query = "SELECT * FROM address ORDER BY year,id"
+        self.assertEqual(row_db.query(query), arrow_db.query(query))
+
+    def test_arrow_loader_types(self):
+        """
+        test that an all NULL column is loaded as TEXT
+        and columns of unsupported types are skipped with a warning
+        """
+        table = pa.table(
+            {
+                "name": ["Ziegler", "Müller"],
+                "note": pa.nulls(2),
+                "tags": [["a"], ["b", "c"]],
+            }
+        )
+        sql_db = SQLDB()
+        loader = ArrowSqlLoader(sql_db)
+        with self.assertLogs(level="WARNING") as logs:
+            loader.load("test", table.schema, table.to_batches())
+        # the warning is given once
+        self.assertEqual(1, len(logs.output))
+        self.assertIn("skipping column tags", logs.output[0])
+        columns = sql_db.getTableDict()["test"]["columns"]
+        self.assertEqual(["name", "note"], list(columns.keys()))
+        self.assertEqual("TEXT", columns["note"]["type"])
+        lod = sql_db.query("SELECT * FROM test")
+        self.assertEqual([{"name": "Ziegler", "note": None}], lod[:1])
+
+    def test_vectorized_mapping(self):
+        """
+        test that the import paths of to_db map the columns and inject the year
+        of a synthetic address book the same way
+        """
+        benchmark = MappingBenchmark()
+        query = "SELECT * FROM address ORDER BY id"
+        with tempfile.TemporaryDirectory() as folder:
+            benchmark.write_synthetic_address_book(folder, 1000)
+            lods = {}
+            for mode in benchmark.modes:
+                db = benchmark.import_address_books(folder, mode, chunk_size=100)
+                lods[mode] = db.query(query)
+                db.close()
+        rows = lods["read"]
+        self.assertEqual(1000, len(rows))
+        self.assertEqual("weimarTH1851.parquet", rows[0]["source"])
+        self.assertEqual(1851, rows[0]["year"])
+        self.assertIn("occupation", rows[0])
+        for mode in benchmark.modes:
+            with self.subTest(mode=mode):
+                self.assertEqual(rows, lods[mode])
+        # the timing runs as python -m benchmarks.mapping_benchmark
+        times = benchmark.run(row_count=1000, chunk_size=100)
+        self.assertEqual(set(benchmark.modes), set(times))
@@ -0,0 +1,99 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import tempfile
+import time
+
+from lodstorage.sql import SQLDB
+from ngwidgets.basetest import Basetest
+
+from genwiki.query_cache import QueryResultCache
+
+
+class TestQueryResultCache(Basetest):
+    """
+    test the query result cache
+    """
+
+    def test_lru_and_limits(self):
+        """
+        test the LRU eviction with entry and memory limits
+        """
+        cache = QueryResultCache(max_entries=2)
+        for i in range(3):
+            cache.put("sql", "q", {"i": i}, [{"i": i}])
+            if i == 1:
+                # touch the first entry so that the second one is the oldest
+                self.assertEqual([{"i": 0}], cache.get("sql", "q", {"i": 0}))
+        self.assertIsNone(cache.get("sql", "q", {"i": 1}))
+        self.assertEqual([{"i": 0}], cache.get("sql", "q", {"i": 0}))
+        stats = cache.get_stats()
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(2, stats["entries"])
+        self.assertEqual(2, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+
+        lod = [{"text": "x" * 100}]
+        cache = QueryResultCache(max_bytes=2 * QueryResultCache.get_size(lod))
+        for name in ["a", "b", "c"]:
+            self.assertTrue(cache.put("sql", name, {}, lod))
+        self.assertEqual(2, cache.get_stats()["entries"])
+        # results larger than the cache are not cached at all
+        self.assertFalse(cache.put("sql", "big", {}, lod * 3))
+        # uncached languages
+        self.assertFalse(cache.put("unknown", "a", {}, lod))
+
+    def test_ttl_and_copies(self):
+        """
+        test the per language time to live and the isolation of cached results
+        """
+        cache = QueryResultCache(ttls={"sparql": 0.05, "sql": None})
+        calls = []
+
+        def query():
+            calls.append(1)
+            return [{"item": "Q1"}]
+
+        lod = cache.get_or_query("sparql", "q", {"limit": 1}, query)
+        lod[0]["item"] = "modified"
+        self.assertEqual(
+            [{"item": "Q1"}], cache.get_or_query("sparql", "q", {"limit": 1}, query)
+        )
+        self.assertEqual(1, len(calls))
+        time.sleep(0.1)
+        cache.get_or_query("sparql", "q", {"limit": 1}, query)
+        self.assertEqual(2, len(calls))
+        self.assertEqual(1, cache.get_stats()["expirations"])
+
+    def test_sql_invalidation(self):
+        """
+        test the invalidation of sql results when the database changes
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "address.db")
+            sql_db = SQLDB(db_path)
+            sql_db.c.execute("CREATE TABLE address(lastname TEXT)")
+            sql_db.c.execute("INSERT INTO address VALUES ('Ziegler')")
+            sql_db.c.commit()
+            cache = QueryResultCache()
+            cache.set_version(
+                "sql", lambda: cache.file_version(db_path, f"{db_path}-wal")
+            )
+            sql = "SELECT COUNT(*) AS count FROM address"
+
+            def query():
+                return sql_db.query(sql)
+
+            self.assertEqual([{"count": 1}], cache.get_or_query("sql", "c", {}, query))
+            self.assertEqual([{"count": 1}], cache.get_or_query("sql", "c", {}, query))
+            # make sure the modification time differs
+            time.sleep(0.01)
+            sql_db.c.execute("INSERT INTO address VALUES ('Müller')")
+            sql_db.c.commit()
+            self.assertEqual([{"count": 2}], cache.get_or_query("sql", "c", {}, query))
+            self.assertEqual(1, cache.get_stats()["invalidations"])
+            sql_db.close()
@@ -0,0 +1,183 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from lodstorage.params import Params
+from lodstorage.query import QueryManager
+from lodstorage.sql import SQLDB
+from ngwidgets.basetest import Basetest
+
+from genwiki.genwiki_paths import GenWikiPaths
+from genwiki.multilang_querymanager import MultiLanguageQueryManager
+from genwiki.query_catalog import QueryCatalog
+
+
+class TestQueryCatalog(Basetest):
+    """
+    test the process wide query catalog
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.yaml_path = os.path.join(GenWikiPaths.get_examples_path(), "queries.yaml")
+
+    def test_catalog(self):
+        """
+        test that the catalog provides the same queries as the QueryManagers
+        """
+        mlqm = MultiLanguageQueryManager(yaml_path=self.yaml_path)
+        other_mlqm = MultiLanguageQueryManager(yaml_path=self.yaml_path)
+        self.assertIs(mlqm.catalog, other_mlqm.catalog)
+        self.assertEqual(1, mlqm.catalog.load_count)
+        names = []
+        for lang in mlqm.languages:
+            qm = QueryManager(lang=lang, queriesPath=self.yaml_path, with_default=False)
+            names.extend(qm.queriesByName.keys())
+            for name, expected in qm.queriesByName.items():
+                query = mlqm.query4Name(name)
+                self.assertEqual(expected.lang, query.lang)
+                self.assertEqual(expected.query, query.query)
+                self.assertEqual(expected.param_list, query.param_list)
+                params_dict = {}
+                query.set_default_params(params_dict)
+                if params_dict:
+                    self.assertEqual(
+                        Params(expected.query).apply_parameters_with_check(params_dict),
+                        query.params.apply_parameters_with_check(params_dict),
+                    )
+        self.assertEqual(names, mlqm.query_names)
+        self.assertIsNone(mlqm.query4Name("NoSuchQuery"))
+
+    def test_concurrent_render(self):
+        """
+        test that the shared queries render concurrently without
+        seeing each other's parameters
+        """
+        catalog = QueryCatalog.get_instance(self.yaml_path)
+        query = catalog.query4Name("WikidataLookupByNutsCode", ["sparql"])
+        params_dict = dict(query.params.params_dict)
+        errors = []
+
+        def render(thread_index: int):
+            for i in range(3000):
+                nuts_code = f"DE{thread_index}-{i}"
+                sparql_query = query.params.apply_parameters_with_check(
+                    {"nuts_code": nuts_code, "lang": "de"}
+                )
+                if f'"{nuts_code}"' not in sparql_query:
+                    errors.append(nuts_code)
+
+        threads = [threading.Thread(target=render, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        # the shared parameters are unchanged
+        self.assertEqual(params_dict, query.params.params_dict)
+
+    def test_languages(self):
+        """
+        test that only the keys of the known languages are query texts
+        """
+        query_dict = {
+            "sql": "SELECT 1",
+            "title": "Eins",
+            "comment": "no query",
+            "arrow": "{}",
+        }
+        self.assertEqual(["sql", "arrow"], QueryCatalog.get_languages(query_dict))
+
+    def test_reload(self):
+        """
+        test that the yaml file is only reloaded when modified
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            yaml_path = os.path.join(tmp_dir, "queries.yaml")
+            shutil.copy(self.yaml_path, yaml_path)
+            catalog = QueryCatalog.get_instance(yaml_path)
+            self.assertIn("Gesamtanzahl", catalog.get_queries("sql"))
+            self.assertFalse(catalog.check_reload())
+            with open(yaml_path, "a") as yaml_file:
+                yaml_file.write(
+                    "\nNeueAbfrage:\n  sql: |\n    SELECT {{ limit }} AS Anzahl\n"
+                )
+            stat = os.stat(yaml_path)
+            os.utime(yaml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            query = catalog.query4Name("NeueAbfrage", ["sql"])
+            self.assertEqual(2, catalog.load_count)
+            self.assertEqual(
+                "SELECT 3 AS Anzahl\n",
+                query.params.apply_parameters_with_check({"limit": 3}),
+            )
+
+    def test_bound_sql(self):
+        """
+        test that bound parameters give the same results as the template substitution
+        """
+        catalog = QueryCatalog.get_instance(self.yaml_path)
+        db = SQLDB(":memory:")
+        db.c.execute(
+            "CREATE TABLE address(lastname, firstname, occupation, company_name, street, location, year)"
+        )
+        rows = [
+            (
+                f"Ziegler{i}",
+                "Karl",
+                "Schuster",
+                None,
+                f"Frauengasse {i}",
+                "Weimar",
+                1851,
+            )
+            for i in range(100)
+        ]
+        rows.append(("O'Brien", "Anna", "Näherin", None, "Marktstraße", "Weimar", 1853))
+        db.c.executemany("INSERT INTO address VALUES (?,?,?,?,?,?,?)", rows)
+        for year in [1851, 1853]:
+            db.c.execute(
+                f"CREATE VIEW weimarTH{year} AS SELECT * FROM address WHERE year={year}"
+            )
+        for name, query in catalog.get_queries("sql").items():
+            if not query.params.has_params:
+                continue
+            params_dict = {}
+            query.set_default_params(params_dict)
+            expected = db.query(query.params.apply_parameters_with_check(params_dict))
+            bound_sql = query.params.get_bound_sql()
+            self.assertNotIn("{{", bound_sql)
+            values = query.params.get_bind_values(params_dict, query.param_list)
+            self.assertEqual(expected, db.query(bound_sql, values), name)
+        query = catalog.query4Name("PersonenSuche", ["sql"])
+        params_dict = {"suchbegriff": "O'Brien", "limit": "5"}
+        with self.assertRaises(ValueError):
+            query.params.apply_parameters_with_check(params_dict)
+        values = query.params.get_bind_values(params_dict, query.param_list)
+        lod = db.query(query.params.get_bound_sql(), values)
+        self.assertEqual(["Anna"], [record["Vorname"] for record in lod])
+        # distinct search terms reuse the prepared statement when bound
+        terms = [f"Ziegler{i % 100}" for i in range(2000)]
+        start = time.time()
+        for term in terms:
+            sql = query.params.apply_parameters_with_check(
+                {"suchbegriff": term, "limit": 20}
+            )
+            db.c.execute(sql).fetchall()
+        text_secs = time.time() - start
+        start = time.time()
+        bound_sql = query.params.get_bound_sql()
+        for term in terms:
+            db.c.execute(bound_sql, {"suchbegriff": term, "limit": 20}).fetchall()
+        bound_secs = time.time() - start
+        if self.debug:
+            print(
+                f"{len(terms)} searches: {text_secs:.3f}s substituted, {bound_secs:.3f}s bound"
+            )
@@ -0,0 +1,49 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+from lodstorage.sql import SQLDB
+from ngwidgets.basetest import Basetest
+
+from genwiki.query_pager import QueryPager
+
+
+class TestQueryPager(Basetest):
+    """
+    test the pagination of SQL and SPARQL queries
+    """
+
+    def test_paginate_sql(self):
+        """
+        test fetching the pages of a SQL query
+        """
+        db = SQLDB(":memory:")
+        lod = [{"id": i, "name": f"n{i:03d}"} for i in range(250)]
+        entity_info = db.createTable(lod, "Test", "id")
+        db.store(lod, entity_info)
+        sql = "-- all names\nSELECT name FROM Test ORDER BY id DESC;"
+        pages = []
+        for page in range(3):
+            page_sql = QueryPager.paginate_sql(sql, 100, page * 100)
+            pages.append(db.query(page_sql))
+        self.assertEqual([100, 100, 50], [len(page) for page in pages])
+        self.assertEqual("n249", pages[0][0]["name"])
+        self.assertEqual("n000", pages[2][-1]["name"])
+        # statements that are not queries are not modified
+        pragma = "PRAGMA table_info(Test)"
+        self.assertFalse(QueryPager.can_paginate_sql(pragma))
+        self.assertEqual(pragma, QueryPager.paginate_sql(pragma, 100, 0))
+
+    def test_paginate_sparql(self):
+        """
+        test the SPARQL page queries with and without a LIMIT of the query
+        """
+        query = "SELECT ?item WHERE { ?item ?p ?o }"
+        page_query = QueryPager.paginate_sparql(query, 100, 200)
+        self.assertTrue(page_query.endswith("LIMIT 100\nOFFSET 200"))
+        query_with_limit = f"{query}\nLIMIT 250 OFFSET 10"
+        page_query = QueryPager.paginate_sparql(query_with_limit, 100, 200)
+        self.assertTrue(page_query.endswith("}\nLIMIT 50\nOFFSET 210"), page_query)
+        self.assertIsNone(QueryPager.paginate_sparql(query_with_limit, 100, 300))
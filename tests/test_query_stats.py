@@ -0,0 +1,71 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import json
+import os
+import tempfile
+
+from lodstorage.sql import SQLDB
+from ngwidgets.basetest import Basetest
+
+from genwiki.address_index import AddressIndexer
+from genwiki.query_stats import QueryStats
+
+
+class TestQueryStats(Basetest):
+    """
+    test the query execution statistics and the slow query log
+    """
+
+    def test_stats(self):
+        """
+        test the statistics and histograms per query and parameter set
+        """
+        stats = QueryStats(slow_threshold=1.0, bounds=[0.1, 1.0])
+        for secs in [0.05, 0.05, 0.5]:
+            stats.record("sql", "q", {"limit": 10}, secs, [{"a": 1}, {"a": 2}])
+        stats.record("sql", "q", {"limit": 20}, 0.05, [])
+        with self.assertRaises(ValueError):
+            stats.timed("sparql", "broken", {}, lambda: int("x"))
+        records = {record["name"]: record for record in stats.get_query_stats()}
+        record = records["q"]
+        self.assertEqual(4, record["count"])
+        self.assertEqual(6, record["rows"])
+        self.assertEqual({"le_0.1": 3, "le_1.0": 1, "le_inf": 0}, record["histogram"])
+        self.assertEqual(0.1, record["p50_secs"])
+        self.assertEqual(1.0, record["p95_secs"])
+        self.assertEqual(2, len(record["params"]))
+        self.assertEqual(1, records["broken"]["errors"])
+        self.assertEqual([], stats.get_slow_queries())
+        # the statistics are JSON compatible
+        json.dumps(stats.to_dict())
+
+    def test_slow_query_log(self):
+        """
+        test that slow sql queries are logged with their query plan
+        """
+        db = SQLDB(":memory:")
+        db.c.execute("CREATE TABLE address(lastname, year)")
+        db.c.execute("CREATE INDEX address_year_idx ON address(year)")
+        sql = "SELECT * FROM address WHERE year=:year"
+        params = {"year": 1851}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, "slow_queries.jsonl")
+            stats = QueryStats(slow_threshold=0.0, slow_log_path=log_path)
+            lod = stats.timed(
+                "sql",
+                "Jahr",
+                params,
+                lambda: db.query(sql, params),
+                explain=lambda: AddressIndexer(db).explain(sql, params),
+            )
+            self.assertEqual([], lod)
+            with open(log_path) as log_file:
+                logged = [json.loads(line) for line in log_file]
+        self.assertEqual(1, len(logged))
+        self.assertEqual("Jahr", logged[0]["name"])
+        self.assertIn("address_year_idx", logged[0]["plan"][0])
+        self.assertEqual(logged, stats.get_slow_queries())
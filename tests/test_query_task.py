@@ -0,0 +1,123 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lodstorage.sparql import SPARQL
+from lodstorage.sql import SQLDB
+from ngwidgets.basetest import Basetest
+
+from genwiki.query_task import QueryCancelledError, QueryTask
+
+
+class SlowSparqlHandler(BaseHTTPRequestHandler):
+    """
+    a SPARQL endpoint answering after the delay given in the path
+    """
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.rfile.read(length)
+        delay = float(self.path.strip("/") or 0)
+        time.sleep(delay)
+        result = {
+            "head": {"vars": ["item", "count"]},
+            "results": {
+                "bindings": [
+                    {
+                        "item": {"type": "uri", "value": "http://example.org/a"},
+                        "count": {
+                            "type": "literal",
+                            "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+                            "value": "42",
+                        },
+                    }
+                ]
+            },
+        }
+        content = json.dumps(result).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestQueryTask(Basetest):
+    """
+    test the cancellation of queries
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSparqlHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        Basetest.tearDown(self)
+
+    def cancel_after(self, task: QueryTask, delay: float):
+        timer = threading.Timer(delay, task.cancel)
+        timer.start()
+        return timer
+
+    def test_sqlite_cancel(self):
+        """
+        test interrupting a long running SQLite query
+        """
+        sql_db = SQLDB(check_same_thread=False)
+        sql = """WITH RECURSIVE counter(n) AS (
+          SELECT 1 UNION ALL SELECT n+1 FROM counter WHERE n < 1000000000
+        ) SELECT COUNT(*) AS count FROM counter"""
+        counts = QueryTask.get_counts()
+        task = QueryTask("counter")
+
+        def count():
+            with task.sqlite(sql_db) as db:
+                return db.query(sql)
+
+        self.cancel_after(task, 0.2)
+        start = time.perf_counter()
+        with self.assertRaises(QueryCancelledError):
+            task.run(count)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(counts["cancelled"] + 1, QueryTask.get_counts()["cancelled"])
+        # the connection is usable again
+        task = QueryTask("count")
+        with task.sqlite(sql_db) as db:
+            lod = task.run(db.query, "SELECT 1 AS one")
+        self.assertEqual([{"one": 1}], lod)
+        self.assertEqual(counts["completed"] + 1, QueryTask.get_counts()["completed"])
+
+    def test_sparql_cancel(self):
+        """
+        test aborting an in-flight SPARQL request
+        """
+        sparql = SPARQL(f"{self.url}/0")
+        task = QueryTask("fast", timeout=5)
+        lod = task.run(task.sparql_query, sparql, "SELECT * WHERE { ?s ?p ?o }")
+        self.assertEqual([{"item": "http://example.org/a", "count": 42}], lod)
+
+        sparql = SPARQL(f"{self.url}/10")
+        task = QueryTask("slow", timeout=30)
+        self.cancel_after(task, 0.2)
+        start = time.perf_counter()
+        with self.assertRaises(QueryCancelledError):
+            task.run(task.sparql_query, sparql, "SELECT * WHERE { ?s ?p ?o }")
+        self.assertLess(time.perf_counter() - start, 2.0)
@@ -0,0 +1,72 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import datetime
+
+from lodstorage.sparql import SPARQL
+from ngwidgets.basetest import Basetest
+
+from genwiki.sparql_adapter import SparqlAdapter
+
+
+class TestSparqlAdapter(Basetest):
+    """
+    test the access to the lodstorage and SPARQLWrapper internals
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        sparql = SPARQL("https://query.wikidata.org/sparql", agent="genwiki-test/1.0")
+        self.adapter = SparqlAdapter(sparql)
+
+    def test_request(self):
+        """
+        test the url, headers and query of a request
+        """
+        self.assertEqual("https://query.wikidata.org/sparql", self.adapter.url)
+        headers = self.adapter.get_headers()
+        self.assertEqual("genwiki-test/1.0", headers["User-Agent"])
+        self.assertEqual("application/sparql-results+json", headers["Accept"])
+        query = self.adapter.prepare_query("# comment\nASK {}")
+        self.assertTrue(query.endswith("# comment\nASK {}"))
+
+    def test_to_lod(self):
+        """
+        test the conversion of a JSON result to python native values
+        """
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        json_result = {
+            "head": {"vars": ["item", "count", "date"]},
+            "results": {
+                "bindings": [
+                    {
+                        "item": {
+                            "type": "uri",
+                            "value": "http://www.wikidata.org/entity/Q3955",
+                        },
+                        "count": {
+                            "type": "literal",
+                            "datatype": f"{xsd}integer",
+                            "value": "42",
+                        },
+                        "date": {
+                            "type": "literal",
+                            "datatype": f"{xsd}date",
+                            "value": "1851-01-01",
+                        },
+                    }
+                ]
+            },
+        }
+        lod = self.adapter.to_lod(json_result)
+        expected = [
+            {
+                "item": "http://www.wikidata.org/entity/Q3955",
+                "count": 42,
+                "date": datetime.date(1851, 1, 1),
+            }
+        ]
+        self.assertEqual(expected, lod)
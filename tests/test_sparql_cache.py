@@ -0,0 +1,119 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from lodstorage.sparql import SPARQL
+from ngwidgets.basetest import Basetest
+
+from genwiki.query_task import QueryTask
+from genwiki.sparql_cache import SparqlCache, SparqlCacheMissError
+from tests.test_query_task import SlowSparqlHandler
+
+
+class TestSparqlCache(Basetest):
+    """
+    test the persistent SPARQL response cache
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        Basetest.tearDown(self)
+
+    def test_normalize(self):
+        """
+        test that formatting and comments do not change the key
+        """
+        query = "SELECT ?s\nWHERE {\n  # all triples\n  ?s ?p ?o .\n}"
+        other = "  SELECT ?s WHERE { ?s   ?p ?o . }"
+        self.assertEqual(
+            SparqlCache.get_key("e", query), SparqlCache.get_key("e", other)
+        )
+        self.assertNotEqual(
+            SparqlCache.get_key("e", query), SparqlCache.get_key("f", query)
+        )
+
+    def test_normalize_literals(self):
+        """
+        test that whitespace and # inside string literals and IRIs are kept
+        """
+        query = 'SELECT ?s WHERE { ?s rdfs:label "Weimar  (Thür.)" . }'
+        other = 'SELECT ?s WHERE { ?s rdfs:label "Weimar (Thür.)" . }'
+        self.assertNotEqual(
+            SparqlCache.get_key("e", query), SparqlCache.get_key("e", other)
+        )
+        query = "ASK {\n  ?s <http://example.org/a#b> '# no comment' # comment\n}"
+        expected = "ASK { ?s <http://example.org/a#b> '# no comment' }"
+        self.assertEqual(expected, SparqlCache.normalize(query))
+
+    def test_cached_query(self):
+        """
+        test that a repeated query is answered from disk without the endpoint
+        """
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSparqlHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        sparql = SPARQL(f"http://127.0.0.1:{server.server_address[1]}/0")
+        query = "SELECT * WHERE { ?item ?p {{ count }} }"
+        expected = [{"item": "http://example.org/a", "count": 42}]
+        cache = SparqlCache(cache_dir=self.cache_dir)
+        lod = QueryTask("Test", timeout=5).sparql_query(
+            sparql, query, param_dict={"count": 42}, cache=cache
+        )
+        self.assertEqual(expected, lod)
+        server.shutdown()
+        server.server_close()
+        # a new cache on the same directory - e.g. after a restart - and offline
+        offline_cache = SparqlCache(cache_dir=self.cache_dir, offline=True)
+        lod = QueryTask("Test").sparql_query(
+            sparql, query, param_dict={"count": 42}, cache=offline_cache
+        )
+        self.assertEqual(expected, lod)
+        self.assertEqual(1, offline_cache.get_stats()["hits"])
+        with self.assertRaises(SparqlCacheMissError):
+            QueryTask("Test").sparql_query(
+                sparql, query, param_dict={"count": 7}, cache=offline_cache
+            )
+
+    def test_ttl_and_eviction(self):
+        """
+        test the time to live per query name and the size bound
+        """
+        result = {"results": {"bindings": [{"x": {"type": "literal", "value": "1"}}]}}
+        cache = SparqlCache(
+            cache_dir=self.cache_dir, ttls={"Volatile": 0.0}, max_bytes=10**6
+        )
+        cache.put("e", "q1", result, name="Volatile")
+        cache.put("e", "q2", result, name="Stable")
+        time.sleep(0.01)
+        self.assertIsNone(cache.get("e", "q1", name="Volatile"))
+        self.assertEqual(result, cache.get("e", "q2", name="Stable"))
+        # offline stale responses are better than none
+        offline_cache = SparqlCache(
+            cache_dir=self.cache_dir, ttls={"Volatile": 0.0}, offline=True
+        )
+        self.assertEqual(result, offline_cache.get("e", "q1", name="Volatile"))
+        self.assertEqual(1, offline_cache.get_stats()["stale_hits"])
+
+        entry_size = cache.total_bytes // 2
+        small_cache = SparqlCache(cache_dir=self.cache_dir, max_bytes=entry_size * 3)
+        # make q1 the least recently used entry
+        os.utime(small_cache.get_path(small_cache.get_key("e", "q1")), (0, 0))
+        small_cache.put("e", "q3", result)
+        small_cache.put("e", "q4", result)
+        self.assertGreater(small_cache.get_stats()["evictions"], 0)
+        self.assertLessEqual(small_cache.total_bytes, small_cache.max_bytes)
+        self.assertIsNone(small_cache.get("e", "q1"))
+        self.assertIsNotNone(small_cache.get("e", "q4"))
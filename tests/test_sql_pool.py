@@ -0,0 +1,86 @@
+"""
+Created on 2026-10-18
+
+@author: wf
+"""
+
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from ngwidgets.basetest import Basetest
+
+from benchmarks.pool_benchmark import PoolBenchmark
+from genwiki.convert import ParquetAdressbokToSql
+from genwiki.genwiki_paths import GenWikiPaths
+from genwiki.sql_pool import SQLDBPool
+
+
+class TestSQLDBPool(Basetest):
+    """
+    test the WAL mode read only connection pool
+    """
+
+    def setUp(self, debug=False, profile=True):
+        Basetest.setUp(self, debug=debug, profile=profile)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "address.db")
+        self.pool = SQLDBPool(self.db_path, size=8)
+        pats = ParquetAdressbokToSql(
+            folder=GenWikiPaths.get_examples_path(), materialized=True
+        )
+        pats.update_db(self.pool.writer)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp_dir.cleanup()
+        Basetest.tearDown(self)
+
+    def test_pool(self):
+        """
+        test the WAL mode, the read only readers and the single writer
+        """
+        journal_mode = self.pool.writer.query("PRAGMA journal_mode")[0]
+        self.assertEqual("wal", journal_mode["journal_mode"])
+        count_query = "SELECT COUNT(*) AS count FROM address"
+        self.assertEqual(8569, self.pool.query(count_query)[0]["count"])
+        with self.pool.reader() as db:
+            with self.assertRaises(sqlite3.OperationalError):
+                db.c.execute("DELETE FROM address")
+            self.assertEqual(
+                self.pool.mmap_size, db.query("PRAGMA mmap_size")[0]["mmap_size"]
+            )
+        # commits of the writer are visible to the readers
+        with self.pool.writer.c:
+            self.pool.writer.c.execute("DELETE FROM address WHERE year=1853")
+        self.assertEqual(4183, self.pool.query(count_query)[0]["count"])
+        self.assertEqual(1, self.pool.reader_count)
+
+    def test_concurrent_readers(self):
+        """
+        test that concurrent clients get the same results from the readers
+        and that the number of readers is bounded by the pool size
+        """
+        benchmark = PoolBenchmark(self.db_path, queries=20)
+        expected = self.pool.query(benchmark.sql)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(self.pool.query, benchmark.sql) for _ in range(20)
+            ]
+            for future in futures:
+                self.assertEqual(expected, future.result())
+        self.assertLessEqual(self.pool.reader_count, 8)
+
+    def test_pool_benchmark(self):
+        """
+        test the benchmark script with a small number of queries
+        """
+        benchmark = PoolBenchmark(self.db_path, pool_size=2, queries=10)
+        results = benchmark.run([1, 2])
+        if self.debug:
+            print(results)
+        self.assertEqual([1, 2], list(results))
+        for throughput in results.values():
+            self.assertGreater(throughput["shared"], 0)
+            self.assertGreater(throughput["pool"], 0)